@@ -0,0 +1,357 @@
+from array import array
+from bisect import bisect_left
+from typing import List, Tuple, Dict, Sequence
+from graph_store import GraphStore, FRIENDS_KEY, IN_FRIEND_GRAPH
+from network_functions import get_last_name, P2F, P2N
+
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    # The batched products need NumPy and SciPy; without them each person is
+    # scored on their own with multiply_row.
+    numpy = sparse = None
+
+
+class CsrMatrix(Sequence):
+    """A sparse 0/1 matrix whose row i is the sequence of the column ids
+    targets[offsets[i]:offsets[i + 1]].
+
+    >>> m = CsrMatrix.from_rows([[1, 2], [], [0]])
+    >>> list(m[0]), list(m[1]), len(m)
+    ([1, 2], [], 3)
+    """
+
+    def __init__(self, offsets: Sequence, targets: Sequence) -> None:
+        """Initialize a matrix from its offset and target arrays.
+        """
+
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_rows(cls, rows: List[List[int]]) -> 'CsrMatrix':
+        """Return a matrix with the given rows.
+        """
+
+        offsets = array('q', [0])
+        targets = array('i')
+        for row in rows:
+            targets.extend(row)
+            offsets.append(len(targets))
+        return cls(offsets, targets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Sequence:
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+
+def row_contains(row: Sequence[int], column: int) -> bool:
+    """Return whether the sorted row contains column.
+
+    >>> row_contains([1, 4, 9], 4), row_contains([1, 4, 9], 5)
+    (True, False)
+    """
+
+    i = bisect_left(row, column)
+    return i < len(row) and row[i] == column
+
+
+def multiply_row(row: Sequence[int], matrix: Sequence[Sequence[int]], \
+                 result: Dict[int, int]) -> Dict[int, int]:
+    """Add the product of the sparse 0/1 row vector row (a sequence of column
+    ids, repeated ids counting more than once) and the sparse 0/1 matrix whose
+    rows are listed in matrix into result, and return result.
+
+    >>> multiply_row([0, 1, 1], [[1, 2], [2], [0]], {})
+    {1: 1, 2: 3}
+    """
+
+    for k in row:
+        for j in matrix[k]:
+            result[j] = result.get(j, 0) + 1
+    return result
+
+
+class BatchScorer:
+    """The sparse matrices needed to score many people of a GraphStore at once.
+    With A the friend adjacency matrix, the mutual friend scores of a batch of
+    people P are the rows P of
+
+        A . B  (for people who are not keys of person_to_friends, like
+                mutual_friend_type_1) and
+        R . S  (for people who are, like mutual_friend_type_3)
+
+    where B keeps only the columns of A that are not keys, S is A with only
+    the friendships that go both ways, and R is A with only the friends who
+    have the person in their own list. The mutual network scores are the rows
+    P of N . N^T, where N is the person by network incidence matrix.
+
+    >>> scorer = BatchScorer(GraphStore.from_dicts(P2F, P2N))
+    >>> scorer.make_recommendations('Jay Pritchett')
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1), ('Luke Dunphy', 1), \
+('Phil Dunphy', 1)]
+    """
+
+    TABLE_COUNT = 10
+
+    def __init__(self, store: GraphStore, tables: List[Sequence] = None) \
+                 -> None:
+        """Build the matrices of store, or reuse the ones in tables, a list
+        returned by the tables method of a scorer of the same store.
+        """
+
+        self._store = store
+        if tables is None:
+            tables = self._build_tables(store)
+        self._has_friends = bool(tables[0][0])
+        self._sorted_friends = CsrMatrix(tables[1], tables[2])
+        self._non_key_columns = CsrMatrix(tables[3], tables[4])
+        self._reciprocal = CsrMatrix(tables[5], tables[6])
+        self._network_members = CsrMatrix(tables[7], tables[8])
+        self._last_names = tables[9]
+        self._sparse = None
+
+    @staticmethod
+    def _build_tables(store: GraphStore) -> List[Sequence]:
+        """Return the tables of the matrices of store.
+        """
+
+        size = len(store.names)
+        flags = store.flags
+        friend_sets = [set(store.friend_ids(i)) for i in range(size)]
+        sorted_friends = []
+        non_key_columns = []
+        reciprocal = []
+
+        for i in range(size):
+            non_key = []
+            both_ways = []
+            for j in friend_sets[i]:
+                if not flags[j] & FRIENDS_KEY:
+                    non_key.append(j)
+                elif i in friend_sets[j]:
+                    both_ways.append(j)
+            sorted_friends.append(sorted(friend_sets[i]))
+            non_key_columns.append(non_key)
+            reciprocal.append(both_ways)
+
+        network_members = [[] for i in range(len(store.network_names))]
+        for i in range(size):
+            for network in store.network_ids(i):
+                network_members[network].append(i)
+
+        surnames = {}
+        last_names = array('i', [surnames.setdefault(get_last_name(name), \
+                                                     len(surnames)) \
+                                 for name in store.names])
+        has_friends = array('B', [any(flag & FRIENDS_KEY for flag in flags)])
+
+        tables = [has_friends]
+        for rows in [sorted_friends, non_key_columns, reciprocal, \
+                     network_members]:
+            matrix = CsrMatrix.from_rows(rows)
+            tables.extend([matrix.offsets, matrix.targets])
+        tables.append(last_names)
+        return tables
+
+    def tables(self) -> List[Sequence]:
+        """Return the arrays holding the matrices of this scorer.
+        """
+
+        tables = [array('B', [self._has_friends])]
+        for matrix in [self._sorted_friends, self._non_key_columns, \
+                       self._reciprocal, self._network_members]:
+            tables.extend([matrix.offsets, matrix.targets])
+        tables.append(self._last_names)
+        return tables
+
+    def network_member_ids(self, network_id: int) -> Sequence[int]:
+        """Return the ids of the members of the network with id network_id.
+        """
+
+        return self._network_members[network_id]
+
+    def get_scores(self, person_id: int) -> Dict[int, int]:
+        """Return a dictionary of the ids of the potential friends of the
+        person with id person_id and their scores iff the score is greater
+        than 0.
+        """
+
+        store = self._store
+        friend_ids = store.friend_ids(person_id)
+        sorted_friends = self._sorted_friends
+
+        friend_scores = multiply_row(friend_ids, self._non_key_columns, {})
+        knows_person = [j for j in friend_ids \
+                        if row_contains(sorted_friends[j], person_id)]
+        multiply_row(knows_person, self._reciprocal, friend_scores)
+        network_scores = multiply_row(store.network_ids(person_id), \
+                                      self._network_members, {})
+
+        excluded = set(sorted_friends[person_id])
+        flags = store.flags
+        last_names = self._last_names
+        last_name = last_names[person_id]
+        scores = {}
+
+        for candidate in friend_scores.keys() | network_scores.keys():
+            if candidate == person_id or candidate in excluded or \
+               not flags[candidate] & IN_FRIEND_GRAPH:
+                continue
+            score = friend_scores.get(candidate, 0) + \
+                network_scores.get(candidate, 0)
+            if last_names[candidate] == last_name:
+                score += 1
+            scores[candidate] = score
+
+        return scores
+
+    def _sparse_matrices(self) -> Dict[str, 'sparse.csr_matrix']:
+        """Return the SciPy matrices used by get_scores_batch, building them
+        from the CSR tables the first time.
+        """
+
+        if self._sparse is not None:
+            return self._sparse
+
+        store = self._store
+        size = len(store.names)
+
+        def matrix(offsets, targets, columns):
+            targets = numpy.asarray(targets, dtype=numpy.int32)
+            return sparse.csr_matrix((numpy.ones(len(targets), numpy.int32), \
+                                      targets, numpy.asarray(offsets)), \
+                                     shape=(len(offsets) - 1, columns))
+
+        sets = matrix(self._sorted_friends.offsets, \
+                      self._sorted_friends.targets, size)
+        friends = matrix(store.friend_offsets, store.friend_targets, size)
+        networks = matrix(store.network_offsets, store.network_targets, \
+                          len(store.network_names))
+        self._sparse = {
+            'sets': sets,
+            'friends': friends,
+            # The friends of each person who list the person back.
+            'knows': friends.multiply(sets.T).tocsr(),
+            'non_key': matrix(self._non_key_columns.offsets, \
+                              self._non_key_columns.targets, size),
+            'reciprocal': matrix(self._reciprocal.offsets, \
+                                 self._reciprocal.targets, size),
+            'networks': networks,
+            'networks_t': networks.T.tocsr(),
+            'in_graph': numpy.frombuffer(bytes(store.flags), numpy.uint8) \
+                & IN_FRIEND_GRAPH > 0,
+            'last_names': numpy.asarray(self._last_names, dtype=numpy.int32)}
+        return self._sparse
+
+    def get_scores_batch(self, person_ids: List[int]) -> List[Dict[int, int]]:
+        """Return the get_scores of each id in person_ids. With NumPy and
+        SciPy they are the rows person_ids of A . B + R . S and N . N^T,
+        computed as sparse matrix products over the whole batch; without them
+        each person is scored with get_scores.
+
+        >>> store = GraphStore.from_dicts(P2F, P2N)
+        >>> scorer = BatchScorer(store)
+        >>> ids = [store.id_of('Jay Pritchett'), store.id_of('Alex Dunphy')]
+        >>> scorer.get_scores_batch(ids) == [scorer.get_scores(i) for i in ids]
+        True
+        """
+
+        if sparse is None or not person_ids:
+            return [self.get_scores(person_id) for person_id in person_ids]
+
+        m = self._sparse_matrices()
+        batch = numpy.asarray(person_ids, dtype=numpy.int64)
+        scores = m['friends'][batch] @ m['non_key'] + \
+            m['knows'][batch] @ m['reciprocal'] + \
+            m['networks'][batch] @ m['networks_t']
+        # Drop the person and their friends, then everyone outside the
+        # friendship graph, and add the family bonus.
+        excluded = m['sets'][batch] + sparse.csr_matrix( \
+            (numpy.ones(len(batch), numpy.int32), \
+             (numpy.arange(len(batch)), batch)), shape=scores.shape)
+        scores = (scores - scores.multiply(excluded > 0)).tocoo()
+        keep = (scores.data > 0) & m['in_graph'][scores.col]
+        rows, columns = scores.row[keep], scores.col[keep]
+        last_names = m['last_names']
+        values = scores.data[keep] + \
+            (last_names[columns] == last_names[batch[rows]])
+
+        order = numpy.argsort(rows, kind='stable')
+        rows, columns, values = rows[order], columns[order], values[order]
+        bounds = numpy.searchsorted(rows, numpy.arange(len(batch) + 1))
+        columns, values = columns.tolist(), values.tolist()
+        return [dict(zip(columns[bounds[i]:bounds[i + 1]], \
+                         values[bounds[i]:bounds[i + 1]])) \
+                for i in range(len(batch))]
+
+    def _person_id(self, person: str) -> int:
+        """Return the id of person, raising KeyError if person is not a key
+        of person_to_friends.
+        """
+
+        store = self._store
+        person_id = store.id_of(person)
+        if not store.flags[person_id] & FRIENDS_KEY:
+            raise KeyError(person)
+        return person_id
+
+    def _rank(self, scores: Dict[int, int]) -> List[Tuple[str, int]]:
+        """Return scores as a make_recommendations list.
+        """
+
+        # Ids follow alphabetical order, so ties are broken by name.
+        ranked = sorted(scores.items(), key=lambda t: (-t[1], t[0]))
+        return [(self._store.names[i], score) for i, score in ranked]
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return the same list as make_recommendations for person.
+        """
+
+        if not self._has_friends:
+            return []
+        return self._rank(self.get_scores(self._person_id(person)))
+
+    def make_recommendations_batch(self, people: List[str], \
+                                   batch_size: int = 1024) -> \
+                                   List[List[Tuple[str, int]]]:
+        """Return the make_recommendations of each person in people, scoring
+        them batch_size people at a time with get_scores_batch.
+        """
+
+        if not self._has_friends:
+            return [[] for person in people]
+        person_ids = [self._person_id(person) for person in people]
+        recommendations = []
+        for i in range(0, len(person_ids), batch_size):
+            for scores in self.get_scores_batch(person_ids[i:i + batch_size]):
+                recommendations.append(self._rank(scores))
+        return recommendations
+
+
+def make_recommendations_batch(people: List[str], person_to_friends: \
+                               Dict[str, List[str]], person_to_networks: \
+                               Dict[str, List[str]]) -> \
+                               List[List[Tuple[str, int]]]:
+    """Return, for each person in people, the list make_recommendations
+    returns for them, scoring the whole batch with one set of sparse matrices
+    (see BatchScorer.get_scores_batch).
+
+    >>> batch = make_recommendations_batch(['Jay Pritchett', 'Claire Dunphy'], \
+P2F, P2N)
+    >>> batch[1]
+    [('Luke Dunphy', 3), ('Gloria Pritchett', 2), ('Cameron Tucker', 1), \
+('Manny Delgado', 1)]
+    """
+
+    scorer = BatchScorer(GraphStore.from_dicts(person_to_friends, \
+                                               person_to_networks))
+    return scorer.make_recommendations_batch(people)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,253 @@
+import argparse
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, List, Dict
+import network_functions
+from graph_generator import generate_profiles
+from graph_stats import GraphStatistics
+from minhash_index import MinHashRecommender, recall_at_k
+from recommendation_engine import RecommendationEngine
+from scoring_kernel import ScoringKernel
+
+SIZES = [1000, 100000, 1000000]
+# People at which each benchmark stops being run by default, because the
+# reference implementation is quadratic in the number of people (None runs
+# it at every size).
+LIMITS = {'load_profiles': None,
+          'get_families': 100000,
+          'get_average_friend_count': None,
+          'GraphStatistics.get_average_friend_count': None,
+          'invert_network': None,
+          'get_friends_of_friends': None,
+          'make_recommendations': 1000,
+          'RecommendationEngine': None,
+          'RecommendationEngine.make_recommendations': None,
+          'ScoringKernel.make_recommendations': 100000}
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Return the smallest wall-clock time in seconds that function took over
+    repeat calls.
+    """
+
+    best = float('inf')
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_size(people: int, seed: int = 0, queries: int = 20, \
+                   repeat: int = 3, limits: Dict[str, int] = LIMITS) -> \
+                   List[Dict[str, object]]:
+    """Return the results of the benchmarks on a generated profiles file of
+    people people. Per-person functions are timed over queries people picked
+    at random, and every timing is the best of repeat runs. A benchmark whose
+    limit is below people is reported as skipped.
+    """
+
+    text = generate_profiles(people, seed)
+    p2f, p2n = {}, {}
+    network_functions.load_profiles(io.StringIO(text), p2f, p2n)
+    rng = random.Random(seed)
+    sample = rng.sample(sorted(p2f), min(queries, len(p2f)))
+
+    def runs(name):
+        limit = limits.get(name)
+        return limit is None or people <= limit
+
+    # The indexes are only built at the sizes where a benchmark uses them.
+    engine = RecommendationEngine(p2f, p2n) \
+        if runs('RecommendationEngine.make_recommendations') else None
+    kernel = ScoringKernel(p2f, p2n) \
+        if runs('ScoringKernel.make_recommendations') else None
+    statistics = GraphStatistics(p2f, p2n) \
+        if runs('GraphStatistics.get_average_friend_count') else None
+
+    def load():
+        network_functions.load_profiles(io.StringIO(text), {}, {})
+
+    def per_person(function):
+        return lambda: [function(person) for person in sample]
+
+    benchmarks = [
+        ('load_profiles', load, 1),
+        ('get_families', lambda: network_functions.get_families(p2f), 1),
+        ('get_average_friend_count', lambda: \
+            network_functions.get_average_friend_count(p2f), 1),
+        ('GraphStatistics.get_average_friend_count', lambda: \
+            network_functions.get_average_friend_count(p2f, statistics), 1),
+        ('invert_network', lambda: network_functions.invert_network(p2n), 1),
+        ('get_friends_of_friends', per_person(lambda person: \
+            network_functions.get_friends_of_friends(p2f, person)), len(sample)),
+        ('make_recommendations', per_person(lambda person: \
+            network_functions.make_recommendations(person, p2f, p2n)), \
+            len(sample)),
+        ('RecommendationEngine', lambda: RecommendationEngine(p2f, p2n), 1),
+        ('RecommendationEngine.make_recommendations', \
+            per_person(lambda person: engine.make_recommendations(person)), \
+            len(sample)),
+        ('ScoringKernel.make_recommendations', \
+            per_person(lambda person: kernel.make_recommendations(person)), \
+            len(sample))]
+
+    results = []
+    for name, function, calls in benchmarks:
+        result = {'name': name, 'people': people, 'calls': calls}
+        if not runs(name):
+            result['skipped'] = True
+        else:
+            seconds = best_time(function, repeat)
+            result['seconds'] = seconds
+            result['seconds_per_call'] = seconds / calls
+        results.append(result)
+    return results
+
+
+def benchmark_recall(people: int, seed: int = 0, queries: int = 20, \
+                     band_counts: List[int] = [8, 16, 32, 64], k: int = 10) \
+                     -> List[Dict[str, object]]:
+    """Return the mean recall@k (see recall_at_k) of the approximate
+    MinHashRecommender.make_recommendations against the exact
+    RecommendationEngine.make_recommendations, and the time per call of each,
+    when probing each of band_counts bands, over queries people picked at
+    random from a generated profiles file of people people.
+    """
+
+    text = generate_profiles(people, seed)
+    p2f, p2n = {}, {}
+    network_functions.load_profiles(io.StringIO(text), p2f, p2n)
+    rng = random.Random(seed)
+    sample = rng.sample(sorted(p2f), min(queries, len(p2f)))
+    engine = RecommendationEngine(p2f, p2n)
+    recommender = MinHashRecommender(p2f, p2n, max(band_counts))
+
+    start = time.perf_counter()
+    exact = [engine.make_recommendations(person) for person in sample]
+    results = [{'name': 'RecommendationEngine.make_recommendations', \
+                'people': people, 'calls': len(sample), \
+                'seconds_per_call': (time.perf_counter() - start) / len(sample)}]
+    for bands in band_counts:
+        start = time.perf_counter()
+        approximate = [recommender.make_recommendations(person, bands) \
+                       for person in sample]
+        seconds = time.perf_counter() - start
+        recall = sum(recall_at_k(found, expected, k) for found, expected \
+                     in zip(approximate, exact)) / len(sample)
+        results.append({'name': 'MinHashRecommender.make_recommendations', \
+                        'people': people, 'calls': len(sample), \
+                        'bands': bands, 'recall_at_{}'.format(k): recall, \
+                        'seconds_per_call': seconds / len(sample)})
+    return results
+
+
+def git_commit() -> str:
+    """Return the hash of the checked out git commit, or '' outside a git
+    repository.
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], \
+                              capture_output=True, text=True, \
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_benchmarks(sizes: List[int] = SIZES, seed: int = 0, \
+                   queries: int = 20, repeat: int = 3, \
+                   limits: Dict[str, int] = LIMITS) -> Dict[str, object]:
+    """Return a JSON-serializable report of the benchmarks at each of sizes,
+    with the commit and Python version they were run with.
+    """
+
+    results = []
+    for people in sizes:
+        results.extend(benchmark_size(people, seed, queries, repeat, limits))
+    return {'commit': git_commit(),
+            'python': platform.python_version(),
+            'seed': seed,
+            'queries': queries,
+            'results': results}
+
+
+def compare_reports(baseline: Dict[str, object], current: Dict[str, object], \
+                    tolerance: float = 0.25) -> List[str]:
+    """Return a description of every benchmark of current that is more than
+    tolerance (a fraction) slower per call than the same benchmark at the same
+    size in baseline.
+
+    >>> baseline = {'results': [{'name': 'f', 'people': 10, \
+'seconds_per_call': 1.0}]}
+    >>> compare_reports(baseline, {'results': [{'name': 'f', 'people': 10, \
+'seconds_per_call': 1.1}]})
+    []
+    >>> compare_reports(baseline, {'results': [{'name': 'f', 'people': 10, \
+'seconds_per_call': 2.0}]})
+    ['f at 10 people: 1.000000s -> 2.000000s per call (2.00x)']
+    """
+
+    before = {(result['name'], result['people']): result['seconds_per_call'] \
+              for result in baseline['results'] if 'seconds_per_call' in result}
+    regressions = []
+    for result in current['results']:
+        key = (result['name'], result['people'])
+        if key in before and 'seconds_per_call' in result:
+            ratio = result['seconds_per_call'] / max(before[key], 1e-12)
+            if ratio > 1 + tolerance:
+                regressions.append('{} at {} people: {:.6f}s -> {:.6f}s per ' \
+                                   'call ({:.2f}x)'.format( \
+                                       key[0], key[1], before[key], \
+                                       result['seconds_per_call'], ratio))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( \
+        description='Time the network functions on generated profiles.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--all', action='store_true', \
+                        help='run every benchmark at every size')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', metavar='BASELINE', \
+                        help='report regressions against this JSON report')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--recall', action='store_true', \
+                        help='report the recall@10 and latency of the '
+                             'approximate recommendations instead')
+    args = parser.parse_args()
+
+    if args.recall:
+        results = []
+        for people in args.sizes:
+            results.extend(benchmark_recall(people, args.seed, args.queries))
+        print(json.dumps(results, indent=2))
+        sys.exit(0)
+
+    limits = {} if args.all else LIMITS
+    report = run_benchmarks(args.sizes, args.seed, args.queries, args.repeat, \
+                            limits)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare_reports(json.load(baseline_file), report, \
+                                          args.tolerance)
+        for regression in regressions:
+            print('Regression: ' + regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
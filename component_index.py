@@ -0,0 +1,267 @@
+from typing import List, Tuple, Dict, Hashable
+from network_functions import add_to_friends, add_to_network, \
+    remove_from_friends, remove_from_network, invert_network, scoring, P2F, P2N
+
+
+class UnionFind:
+    """Disjoint sets of hashable items, merged with union by size and found
+    with path halving.
+
+    >>> sets = UnionFind()
+    >>> sets.union('a', 'b')
+    >>> sets.union('c', 'd')
+    >>> sets.find('a') == sets.find('b'), sets.find('a') == sets.find('c')
+    (True, False)
+    """
+
+    def __init__(self) -> None:
+        self._parent = {}
+        self._size = {}
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._parent
+
+    def add(self, item: Hashable) -> None:
+        """Add item as a set of its own, if it is not already in a set.
+        """
+
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        """Return the representative of the set of item, adding item as a set
+        of its own if it is not in one.
+        """
+
+        parent = self._parent
+        if item not in parent:
+            self.add(item)
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item1: Hashable, item2: Hashable) -> None:
+        """Merge the sets of item1 and item2.
+        """
+
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+        if root1 == root2:
+            return
+        if self._size[root1] < self._size[root2]:
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._size[root1] += self._size.pop(root2)
+
+
+class ComponentIndex:
+    """The connected components of the people in person_to_friends, linking
+    friends (either way round) and members of the same network. A person
+    can only have a non-zero score in scoring for someone in their own
+    component: a mutual friend is a path of two friendships and a mutual
+    network is shared membership. potential_friends and make_recommendations
+    therefore only look at that component, instead of the whole graph.
+
+    Changes to the graph must go through the add and remove methods. Adding
+    merges components, and their lists of people, as it goes; since
+    union-find cannot split a set, a removal marks the components for
+    rebuilding on the next query.
+
+    >>> index = ComponentIndex(P2F, P2N)
+    >>> index.potential_friends('Haley Gwendolyn Dunphy')
+    ['Chairman D-Cat']
+    >>> index.make_recommendations('Jay Pritchett')
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1), ('Luke Dunphy', 1), \
+('Phil Dunphy', 1)]
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]]) -> None:
+        """Find the components of person_to_friends and person_to_networks.
+        """
+
+        self.person_to_friends = person_to_friends
+        self.person_to_networks = person_to_networks
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Recompute the components from scratch.
+        """
+
+        self._sets = UnionFind()
+        for person in self.person_to_friends:
+            self._sets.add(person)
+            for friend in self.person_to_friends[person]:
+                self._sets.union(person, friend)
+        # One member of each network stands for it, as all its members end up
+        # in one set.
+        self._network_member = {}
+        for network, members in invert_network(self.person_to_networks).items():
+            self._network_member[network] = members[0]
+            for member in members[1:]:
+                self._sets.union(members[0], member)
+
+        # The position of each person of the friend graph in the order
+        # potential_friends lists them: (0, i) for the i-th key, and (1, i, j)
+        # for someone who is not a key and is first listed as the j-th friend
+        # of the i-th key.
+        self._order = {}
+        for i, person in enumerate(self.person_to_friends):
+            self._order[person] = (0, i)
+        for i, person in enumerate(self.person_to_friends):
+            for j, friend in enumerate(self.person_to_friends[person]):
+                if friend not in self._order:
+                    self._order[friend] = (1, i, j)
+        self._key_count = len(self.person_to_friends)
+
+        self._members = {}
+        for person in self._order:
+            self._members.setdefault(self._sets.find(person), []) \
+                .append(person)
+        for members in self._members.values():
+            members.sort(key=self._order.__getitem__)
+        self._sorted = set(self._members)
+
+    def _union(self, person1: str, person2: str) -> None:
+        """Merge the components of person1 and person2, and their lists of
+        people, appending the shorter list to the longer one.
+        """
+
+        root1 = self._sets.find(person1)
+        root2 = self._sets.find(person2)
+        if root1 == root2:
+            return
+        self._sets.union(root1, root2)
+        root = self._sets.find(root1)
+        other = root2 if root == root1 else root1
+        merged = self._members.pop(root, [])
+        members = self._members.pop(other, [])
+        if len(members) > len(merged):
+            merged, members = members, merged
+        merged.extend(members)
+        if merged:
+            self._members[root] = merged
+        self._sorted.discard(root)
+        self._sorted.discard(other)
+
+    def _place(self, person: str, order: Tuple[int, ...]) -> None:
+        """Move person to order in the order of potential_friends, if that is
+        earlier than where they are, adding them to the people of their
+        component if they are new to the friend graph.
+        """
+
+        current = self._order.get(person)
+        if current is not None and current <= order:
+            return
+        self._order[person] = order
+        root = self._sets.find(person)
+        if current is None:
+            self._members.setdefault(root, []).append(person)
+        self._sorted.discard(root)
+
+    def component_of(self, person: str) -> List[str]:
+        """Return the people of the friend graph in the component of person,
+        in the order potential_friends lists them: keys of person_to_friends
+        first, then the other friends as they appear. The list must not be
+        modified.
+
+        >>> ComponentIndex(P2F, P2N).component_of('Dylan D-Money')
+        ['Haley Gwendolyn Dunphy', 'Dylan D-Money', 'Gilbert D-Cat', \
+'Chairman D-Cat']
+        """
+
+        if self._sets is None:
+            self._rebuild()
+        if person not in self._sets:
+            return []
+        root = self._sets.find(person)
+        members = self._members.get(root, [])
+        if root not in self._sorted:
+            members.sort(key=self._order.__getitem__)
+            self._sorted.add(root)
+        return members
+
+    def component_count(self) -> int:
+        """Return the number of components with someone in the friend graph.
+
+        >>> ComponentIndex(P2F, P2N).component_count()
+        2
+        """
+
+        if self._sets is None:
+            self._rebuild()
+        return len(self._members)
+
+    def potential_friends(self, person: str) -> List[str]:
+        """Return the people of potential_friends for person who are in the
+        component of person, in the same order.
+        """
+
+        if not self.person_to_friends:
+            return []
+        friends = set(self.person_to_friends[person])
+        return [candidate for candidate in self.component_of(person) \
+                if candidate != person and candidate not in friends]
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return the same list as make_recommendations for person, scoring
+        only the potential friends in their component.
+        """
+
+        scored = []
+        for candidate in self.potential_friends(person):
+            score = scoring(person, candidate, self.person_to_friends, \
+                            self.person_to_networks)
+            if score >= 1:
+                scored.append((candidate, score))
+        scored.sort(key=lambda t: (-t[1], t[0]))
+        return scored
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend as a value to name in person_to_friends and merge their
+        components.
+        """
+
+        was_key = name in self.person_to_friends
+        add_to_friends(name, friend, self.person_to_friends)
+        if self._sets is None:
+            return
+        self._union(name, friend)
+        if not was_key:
+            self._place(name, (0, self._key_count))
+            self._key_count += 1
+        self._place(friend, (1, self._order[name][1], \
+                             len(self.person_to_friends[name]) - 1))
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Add network as a value to name in person_to_networks and merge the
+        component of name with the ones of the other members.
+        """
+
+        add_to_network(name, network, self.person_to_networks)
+        if self._sets is not None:
+            self._union(name, self._network_member.setdefault(network, name))
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the values of name in person_to_friends. The
+        components are rebuilt on the next query.
+        """
+
+        remove_from_friends(name, friend, self.person_to_friends)
+        self._sets = None
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Remove network from the values of name in person_to_networks. The
+        components are rebuilt on the next query.
+        """
+
+        remove_from_network(name, network, self.person_to_networks)
+        self._sets = None
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
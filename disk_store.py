@@ -0,0 +1,443 @@
+import sqlite3
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import List, Tuple, Dict, Iterator, Iterable, Hashable
+from graph_store import FRIENDS_KEY, NETWORKS_KEY, IN_FRIEND_GRAPH
+from network_functions import iter_profiles, get_friends, \
+    get_friends_of_friends, get_last_name, P2F, P2N
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    flags INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS networks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS friends (
+    person INTEGER NOT NULL,
+    friend INTEGER NOT NULL,
+    UNIQUE (person, friend));
+CREATE INDEX IF NOT EXISTS friends_by_friend ON friends (friend);
+CREATE TABLE IF NOT EXISTS memberships (
+    person INTEGER NOT NULL,
+    network INTEGER NOT NULL,
+    UNIQUE (person, network));
+CREATE INDEX IF NOT EXISTS members_by_network ON memberships (network);
+"""
+
+# A (name, friends, networks) profile, as iter_profiles yields them.
+Record = Tuple[str, List[str], List[str]]
+
+
+class PageCache:
+    """An LRU cache of rows read from disk that evicts the least recently used
+    rows when the estimated size of the cached rows goes over max_bytes.
+
+    >>> cache = PageCache(200)
+    >>> cache.put('a', (1, 2, 3))
+    >>> cache.get('a'), cache.get('b')
+    ((1, 2, 3), None)
+    >>> for i in range(10):
+    ...     cache.put(i, (i,))
+    >>> 'a' in cache, cache.nbytes <= 200
+    (False, True)
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize an empty cache of at most max_bytes.
+        """
+
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._rows = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    @staticmethod
+    def estimate_size(row: object) -> int:
+        """Return an estimate of the number of bytes row takes, counting the
+        items of a tuple.
+        """
+
+        size = sys.getsizeof(row)
+        if isinstance(row, tuple):
+            size += sum(sys.getsizeof(item) for item in row)
+        return size
+
+    def get(self, key: Hashable) -> object:
+        """Return the row cached under key, or None.
+        """
+
+        row = self._rows.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._rows.move_to_end(key)
+        return row[0]
+
+    def put(self, key: Hashable, row: object) -> None:
+        """Cache row under key, evicting old rows to make room for it.
+        """
+
+        if key in self._rows:
+            self.nbytes -= self._rows.pop(key)[1]
+        size = self.estimate_size(row)
+        if size > self.max_bytes:
+            return
+        self._rows[key] = (row, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            key, (row, size) = self._rows.popitem(last=False)
+            self.nbytes -= size
+
+
+class DiskGraph:
+    """A "person to friends" and "person to networks" graph stored in a SQLite
+    database, for graphs that do not fit in memory. People, networks, friend
+    lists and network memberships are rows indexed by person (and by friend
+    and network), and rows are read on demand through a PageCache.
+
+    memory_limit bounds the memory used for rows: half of it goes to the
+    PageCache and half to SQLite's own page cache. Queries give the same
+    results as the in-memory functions, but only hold the rows they touch.
+
+    >>> graph = DiskGraph.from_dicts(':memory:', P2F, P2N)
+    >>> graph.make_recommendations('Jay Pritchett')
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1), ('Luke Dunphy', 1), \
+('Phil Dunphy', 1)]
+    >>> graph.get_friends_of_friends('Claire Dunphy')
+    ['Cameron Tucker', 'Gloria Pritchett', 'Luke Dunphy', 'Luke Dunphy', \
+'Manny Delgado']
+    >>> graph.close()
+    """
+
+    def __init__(self, path: str, memory_limit: int = 64 * 1024 * 1024) -> None:
+        """Open (or create) the graph database at path.
+        """
+
+        self.path = path
+        self.memory_limit = memory_limit
+        self.cache = PageCache(memory_limit // 2)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA cache_size = {}'.format( \
+            -max(memory_limit // 2 // 1024, 1)))
+        self._connection.executescript(SCHEMA)
+        self._has_friends = None
+
+    def __enter__(self) -> 'DiskGraph':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database.
+        """
+
+        self._connection.close()
+
+    @classmethod
+    def from_dicts(cls, path: str, person_to_friends: Dict[str, List[str]], \
+                   person_to_networks: Dict[str, List[str]], \
+                   memory_limit: int = 64 * 1024 * 1024) -> 'DiskGraph':
+        """Return a graph at path holding person_to_friends and
+        person_to_networks.
+        """
+
+        graph = cls(path, memory_limit)
+        records = [(name, friends, []) for name, friends \
+                   in person_to_friends.items()]
+        records.extend((name, [], networks) for name, networks \
+                       in person_to_networks.items())
+        graph.load_records(records)
+        return graph
+
+    @classmethod
+    def from_profiles(cls, path: str, profile_paths: List[str], \
+                      memory_limit: int = 64 * 1024 * 1024) -> 'DiskGraph':
+        """Return a graph at path holding the profiles files at profile_paths,
+        read one profile at a time, so that the graph is never in memory.
+        The graph is the same as the one load_profiles_many builds.
+        """
+
+        graph = cls(path, memory_limit)
+        for profile_path in profile_paths:
+            with open(profile_path) as profiles_file:
+                graph.load_records(iter_profiles(profiles_file))
+        return graph
+
+    def load_records(self, records: Iterable[Record]) -> None:
+        """Add the (name, friends, networks) records to the graph, the way
+        load_profiles adds profiles to the dictionaries: new friends and
+        networks are appended after the ones a person already has.
+        """
+
+        connection = self._connection
+        with connection:
+            for name, friends, networks in records:
+                if not friends and not networks:
+                    continue
+                person = self._intern('people', name)
+                friend_ids = [self._intern('people', friend) \
+                              for friend in friends]
+                connection.executemany( \
+                    'INSERT OR IGNORE INTO friends VALUES (?, ?)', \
+                    [(person, friend) for friend in friend_ids])
+                connection.executemany( \
+                    'INSERT OR IGNORE INTO memberships VALUES (?, ?)', \
+                    [(person, self._intern('networks', network)) \
+                     for network in networks])
+                # Nothing is ever removed, so flags only gain bits: set the
+                # ones of this record instead of rescanning every person.
+                flags = (FRIENDS_KEY | IN_FRIEND_GRAPH if friends else 0) | \
+                        (NETWORKS_KEY if networks else 0)
+                connection.executemany( \
+                    'UPDATE people SET flags = flags | ? WHERE id = ? AND ' \
+                    'flags & ? != ?', \
+                    [(flags, person, flags, flags)] + \
+                    [(IN_FRIEND_GRAPH, friend, IN_FRIEND_GRAPH, \
+                      IN_FRIEND_GRAPH) for friend in friend_ids])
+        self.cache = PageCache(self.cache.max_bytes)
+        self._has_friends = None
+
+    def _intern(self, table: str, name: str) -> int:
+        """Return the id of name in table (people or networks), adding it if
+        it is new.
+        """
+
+        key = (table, name)
+        row_id = self.cache.get(key)
+        if row_id is None:
+            self._connection.execute( \
+                'INSERT OR IGNORE INTO {} (name) VALUES (?)'.format(table), \
+                (name,))
+            row_id = self._connection.execute( \
+                'SELECT id FROM {} WHERE name = ?'.format(table), \
+                (name,)).fetchone()[0]
+            self.cache.put(key, row_id)
+        return row_id
+
+    def _query(self, key: Tuple, sql: str, parameter: object) -> Tuple:
+        """Return the tuple of the first column of the rows of sql run with
+        parameter, read through the cache under key.
+        """
+
+        rows = self.cache.get(key)
+        if rows is None:
+            rows = tuple(row[0] for row in \
+                         self._connection.execute(sql, (parameter,)))
+            self.cache.put(key, rows)
+        return rows
+
+    def _person(self, person_id: int) -> Tuple[str, int]:
+        """Return the name and flags of the person with id person_id.
+        """
+
+        key = ('person', person_id)
+        row = self.cache.get(key)
+        if row is None:
+            row = self._connection.execute( \
+                'SELECT name, flags FROM people WHERE id = ?', \
+                (person_id,)).fetchone()
+            self.cache.put(key, row)
+        return row
+
+    def id_of(self, name: str) -> Tuple[int, int]:
+        """Return the id and flags of the person called name, or (-1, 0) if
+        there is no such person.
+        """
+
+        key = ('id', name)
+        row = self.cache.get(key)
+        if row is None:
+            row = self._connection.execute( \
+                'SELECT id, flags FROM people WHERE name = ?', \
+                (name,)).fetchone() or (-1, 0)
+            self.cache.put(key, row)
+        return row
+
+    def friend_ids(self, person_id: int) -> Tuple[int, ...]:
+        """Return the ids of the friends of the person with id person_id, in
+        their original order.
+        """
+
+        return self._query(('friends', person_id), 'SELECT friend FROM ' \
+                           'friends WHERE person = ? ORDER BY rowid', person_id)
+
+    def network_ids(self, person_id: int) -> Tuple[int, ...]:
+        """Return the ids of the networks of the person with id person_id, in
+        their original order.
+        """
+
+        return self._query(('networks', person_id), 'SELECT network FROM ' \
+                           'memberships WHERE person = ? ORDER BY rowid', \
+                           person_id)
+
+    def member_ids(self, network_id: int) -> Tuple[int, ...]:
+        """Return the ids of the members of the network with id network_id.
+        """
+
+        return self._query(('members', network_id), 'SELECT person FROM ' \
+                           'memberships WHERE network = ?', network_id)
+
+    def network_name(self, network_id: int) -> str:
+        """Return the name of the network with id network_id.
+        """
+
+        return self._query(('network', network_id), \
+                           'SELECT name FROM networks WHERE id = ?', \
+                           network_id)[0]
+
+    def has_friends(self) -> bool:
+        """Return whether anyone has friends in the graph.
+        """
+
+        if self._has_friends is None:
+            self._has_friends = self._connection.execute( \
+                'SELECT EXISTS (SELECT 1 FROM friends)').fetchone()[0] == 1
+        return self._has_friends
+
+    def person_to_friends(self) -> 'DiskAdjacencyView':
+        """Return a read-only "person to friends" dictionary view of the graph.
+        """
+
+        return DiskAdjacencyView(self, FRIENDS_KEY)
+
+    def person_to_networks(self) -> 'DiskAdjacencyView':
+        """Return a read-only "person to networks" dictionary view of the
+        graph.
+        """
+
+        return DiskAdjacencyView(self, NETWORKS_KEY)
+
+    def get_friends(self, people: List[str]) -> List[str]:
+        """Return the same list as get_friends for the graph.
+        """
+
+        return get_friends(self.person_to_friends(), people)
+
+    def get_friends_of_friends(self, person: str) -> List[str]:
+        """Return the same list as get_friends_of_friends for the graph.
+        """
+
+        return get_friends_of_friends(self.person_to_friends(), person)
+
+    def get_scores(self, person: str) -> Dict[int, int]:
+        """Return a dictionary of the ids of the potential friends of person
+        and their scores iff the score is greater than 0.
+        """
+
+        if not self.has_friends():
+            return {}
+        person_id, flags = self.id_of(person)
+        if not flags & FRIENDS_KEY:
+            raise KeyError(person)
+
+        friends = self.friend_ids(person_id)
+        friend_scores = {}
+        for friend in friends:
+            if not self._person(friend)[1] & FRIENDS_KEY:
+                continue
+            friends_of_friend = self.friend_ids(friend)
+            knows_person = person_id in friends_of_friend
+            for candidate in friends_of_friend:
+                if self._person(candidate)[1] & FRIENDS_KEY:
+                    # mutual_friend_type_3: both must be friends both ways.
+                    if not knows_person or \
+                       friend not in self.friend_ids(candidate):
+                        continue
+                friend_scores[candidate] = friend_scores.get(candidate, 0) + 1
+
+        network_scores = {}
+        for network in self.network_ids(person_id):
+            for member in self.member_ids(network):
+                network_scores[member] = network_scores.get(member, 0) + 1
+
+        excluded = set(friends)
+        last_name = get_last_name(person)
+        scores = {}
+        for candidate in friend_scores.keys() | network_scores.keys():
+            name, flags = self._person(candidate)
+            if candidate == person_id or candidate in excluded or \
+               not flags & IN_FRIEND_GRAPH:
+                continue
+            score = friend_scores.get(candidate, 0) + \
+                network_scores.get(candidate, 0)
+            if get_last_name(name) == last_name:
+                score += 1
+            scores[candidate] = score
+        return scores
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return the same list as make_recommendations for the graph.
+        """
+
+        scores = self.get_scores(person)
+        return sorted([(self._person(candidate)[0], score) for candidate, \
+                       score in scores.items()], key=lambda t: (-t[1], t[0]))
+
+
+class DiskAdjacencyView(Mapping):
+    """A read-only dictionary view of the friends (FRIENDS_KEY) or networks
+    (NETWORKS_KEY) of a DiskGraph, so that functions written for
+    person_to_friends and person_to_networks run on it. Keys are iterated in
+    the order they were first given friends or networks, like the
+    dictionaries load_profiles builds.
+
+    >>> graph = DiskGraph.from_dicts(':memory:', P2F, P2N)
+    >>> graph.person_to_networks()['Alex Dunphy']
+    ['Chess Club', 'Orchestra']
+    >>> list(graph.person_to_friends()) == list(P2F)
+    True
+    """
+
+    def __init__(self, graph: DiskGraph, key_flag: int) -> None:
+        """Initialize a view of graph's friends or networks.
+        """
+
+        self._graph = graph
+        self._key_flag = key_flag
+
+    def __getitem__(self, name: str) -> List[str]:
+        person_id, flags = self._graph.id_of(name)
+        if not flags & self._key_flag:
+            raise KeyError(name)
+        if self._key_flag == FRIENDS_KEY:
+            return [self._graph._person(i)[0] for i in \
+                    self._graph.friend_ids(person_id)]
+        return [self._graph.network_name(i) for i in \
+                self._graph.network_ids(person_id)]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and \
+            self._graph.id_of(name)[1] & self._key_flag != 0
+
+    def _table(self) -> str:
+        return 'friends' if self._key_flag == FRIENDS_KEY else 'memberships'
+
+    def __iter__(self) -> Iterator[str]:
+        cursor = self._graph._connection.execute( \
+            'SELECT name FROM people JOIN (SELECT person, MIN(rowid) AS first ' \
+            'FROM {} GROUP BY person) ON id = person ' \
+            'ORDER BY first'.format(self._table()))
+        for row in cursor:
+            yield row[0]
+
+    def __len__(self) -> int:
+        return self._graph._connection.execute( \
+            'SELECT COUNT(DISTINCT person) FROM {}'.format( \
+                self._table())).fetchone()[0]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
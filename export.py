@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import struct
+import sys
+from itertools import islice
+from typing import List, Tuple, Iterable, Iterator, Callable
+from batch_scoring import BatchScorer
+from graph_store import GraphStore
+from network_functions import load_profiles_many, P2F, P2N
+from snapshot import load_snapshot
+
+FORMATS = ['jsonl', 'binary']
+MAGIC = b'SNRECS\x00\x00'
+VERSION = 1
+# magic, version
+HEADER = struct.Struct('<8sI4x')
+# person id, recommended person id, score
+ROW = struct.Struct('<IIi')
+
+
+def encode_jsonl(person: str, recommendations: List[Tuple[str, int]], \
+                 id_of: Callable[[str], int] = None) -> bytes:
+    """Return the JSON line that records the recommendations of person.
+
+    >>> encode_jsonl('Jay Pritchett', [('Mitchell Pritchett', 2)])
+    b'{"person": "Jay Pritchett", "recommendations": [["Mitchell Pritchett", 2]]}\\n'
+    """
+
+    record = {'person': person, 'recommendations': recommendations}
+    return json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def encode_binary(person: str, recommendations: List[Tuple[str, int]], \
+                  id_of: Callable[[str], int] = None) -> bytes:
+    """Return the fixed-width ROW records of the recommendations of person,
+    one per recommended person in order, with people given by their id_of.
+
+    >>> encode_binary('b', [('a', 2)], 'abc'.index)
+    b'\\x01\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x02\\x00\\x00\\x00'
+    """
+
+    person_id = id_of(person)
+    return b''.join([ROW.pack(person_id, id_of(name), score) \
+                     for name, score in recommendations])
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, List[Tuple[str, int]]]]:
+    """Yield the (person, recommendations) records of the JSON lines export
+    at path.
+    """
+
+    with open(path, encoding='utf-8') as export_file:
+        for line in export_file:
+            record = json.loads(line)
+            yield record['person'], \
+                [tuple(pair) for pair in record['recommendations']]
+
+
+def read_binary(path: str, block_size: int = 1 << 16) -> \
+                Iterator[Tuple[int, int, int]]:
+    """Yield the (person id, recommended person id, score) rows of the binary
+    export at path, raising ValueError if it is not one.
+    """
+
+    with open(path, 'rb') as export_file:
+        magic, version = HEADER.unpack(export_file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('not a recommendations export')
+        if version != VERSION:
+            raise ValueError('unsupported export version {}'.format(version))
+        block_size -= block_size % ROW.size
+        block = export_file.read(block_size)
+        while block:
+            yield from ROW.iter_unpack(block)
+            block = export_file.read(block_size)
+
+
+def _read_checkpoint(path: str, format: str) -> Tuple[int, int]:
+    """Return the number of people and bytes that the checkpoint of the export
+    at path records as written, or (0, 0) if there is none.
+    """
+
+    try:
+        with open(path + '.checkpoint') as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+    except FileNotFoundError:
+        return 0, 0
+    if checkpoint['format'] != format:
+        raise ValueError('checkpoint is for a {} export' \
+                         .format(checkpoint['format']))
+    return checkpoint['people'], checkpoint['offset']
+
+
+def _write_checkpoint(path: str, format: str, people: int, offset: int) \
+                      -> None:
+    """Record that the first people people, and offset bytes, of the export at
+    path are written. The checkpoint is replaced atomically.
+    """
+
+    temporary = path + '.checkpoint.tmp'
+    with open(temporary, 'w') as checkpoint_file:
+        json.dump({'format': format, 'people': people, 'offset': offset}, \
+                  checkpoint_file)
+    os.replace(temporary, path + '.checkpoint')
+
+
+def export_recommendations(path: str, people: Iterable[str], recommender, \
+                           format: str = 'jsonl', \
+                           id_of: Callable[[str], int] = None, \
+                           resume: bool = False, \
+                           checkpoint_every: int = 1000, \
+                           buffer_size: int = 1 << 20, \
+                           progress: Callable[[int, int], None] = None) -> int:
+    """Write the recommendations recommender.make_recommendations returns for
+    each person in people to the file at path, and return the number of people
+    exported.
+
+    format is 'jsonl', one encode_jsonl line per person, or 'binary', a HEADER
+    followed by the encode_binary rows of each person (which needs id_of, the
+    id of a name, like GraphStore.id_of). Only one person's recommendations
+    are held at a time, and writes go through a buffer of buffer_size bytes.
+
+    Every checkpoint_every people the file is flushed to disk and a checkpoint
+    next to it records how far the export got; progress, if given, is then
+    called with the number of people done and the total (None if people has
+    no length). If resume is true and the checkpoint of an interrupted export
+    exists, the file is cut back to it and the export carries on from there;
+    people must then be the same, in the same order. Otherwise any old
+    checkpoint is removed before anything is written, and the checkpoint is
+    removed once the export is complete.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'recommendations.jsonl')
+    >>> scorer = BatchScorer(GraphStore.from_dicts(P2F, P2N))
+    >>> export_recommendations(path, ['Jay Pritchett', 'Alex Dunphy'], scorer)
+    2
+    >>> list(read_jsonl(path))[1]
+    ('Alex Dunphy', [('Manny Delgado', 2), ('Phil Dunphy', 2), \
+('Mitchell Pritchett', 1)])
+    """
+
+    if format not in FORMATS:
+        raise ValueError('unknown export format {}'.format(format))
+    if format == 'binary' and id_of is None:
+        raise ValueError('a binary export needs id_of')
+    encode = encode_jsonl if format == 'jsonl' else encode_binary
+    total = len(people) if hasattr(people, '__len__') else None
+
+    if resume:
+        done, offset = _read_checkpoint(path, format)
+    else:
+        # A checkpoint left by an earlier export does not describe this one.
+        done, offset = 0, 0
+        if os.path.exists(path + '.checkpoint'):
+            os.remove(path + '.checkpoint')
+    if done:
+        export_file = open(path, 'r+b', buffering=buffer_size)
+        export_file.truncate(offset)
+        export_file.seek(offset)
+        people = islice(people, done, None)
+    else:
+        export_file = open(path, 'wb', buffering=buffer_size)
+        if format == 'binary':
+            export_file.write(HEADER.pack(MAGIC, VERSION))
+
+    with export_file:
+        for person in people:
+            export_file.write(encode(person, \
+                                     recommender.make_recommendations(person), \
+                                     id_of))
+            done += 1
+            if done % checkpoint_every == 0:
+                export_file.flush()
+                os.fsync(export_file.fileno())
+                _write_checkpoint(path, format, done, export_file.tell())
+                if progress is not None:
+                    progress(done, total)
+
+    if os.path.exists(path + '.checkpoint'):
+        os.remove(path + '.checkpoint')
+    if progress is not None and done % checkpoint_every != 0:
+        progress(done, total)
+    return done
+
+
+def _report_progress(done: int, total: int) -> None:
+    """Print how many people have been exported to standard error.
+    """
+
+    if total is None:
+        print('Exported {} people'.format(done), file=sys.stderr)
+    else:
+        print('Exported {}/{} people'.format(done, total), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( \
+        description='Export the recommendations of everyone in profiles files '
+                    'or a snapshot.')
+    parser.add_argument('profiles', nargs='+', \
+                        help='profiles files, or one .snap snapshot')
+    parser.add_argument('output')
+    parser.add_argument('--format', choices=FORMATS, default='jsonl')
+    parser.add_argument('--resume', action='store_true', \
+                        help='carry on from the checkpoint of an interrupted '
+                             'export')
+    parser.add_argument('--checkpoint-every', type=int, default=1000)
+    parser.add_argument('--buffer-size', type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    if len(args.profiles) == 1 and args.profiles[0].endswith('.snap'):
+        snapshot = load_snapshot(args.profiles[0])
+        store, scorer = snapshot.store, snapshot.scorer
+    else:
+        store = GraphStore.from_dicts(*load_profiles_many(args.profiles))
+        scorer = BatchScorer(store)
+    people = list(store.person_to_friends())
+    count = export_recommendations(args.output, people, scorer, args.format, \
+                                   store.id_of, args.resume, \
+                                   args.checkpoint_every, args.buffer_size, \
+                                   _report_progress)
+    print('Exported the recommendations of {} people to {}'.format( \
+        count, args.output))
@@ -0,0 +1,109 @@
+import sys
+from bisect import bisect_left, insort
+from typing import List, Dict
+from network_functions import get_last_name, get_first_name, P2F
+
+
+class FamilyIndex:
+    """An index of the people in a friendship graph by last name, kept up to
+    date with add_person and remove_person. The last name of every indexed
+    person is split off once, so family lookups are dictionary lookups, and
+    each family's first names are kept sorted.
+
+    >>> index = FamilyIndex(P2F)
+    >>> index.first_names('Dunphy')
+    ['Alex', 'Claire', 'Haley Gwendolyn', 'Luke', 'Phil']
+    >>> index.same_family('Claire Dunphy', 'Luke Dunphy')
+    True
+    >>> from network_functions import get_families
+    >>> index.get_families() == get_families(P2F)
+    True
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]] = None) -> None:
+        """Index everyone in person_to_friends, as keys or as friends, in the
+        order get_families finds them.
+        """
+
+        self._last_names = {}
+        self._families = {}
+
+        if person_to_friends is not None:
+            for person in person_to_friends:
+                self.add_person(person)
+                for friend in person_to_friends[person]:
+                    self.add_person(friend)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._last_names
+
+    def __len__(self) -> int:
+        return len(self._last_names)
+
+    def add_person(self, name: str) -> None:
+        """Add name to the family of their last name, if they are not already
+        in the index.
+
+        >>> index = FamilyIndex()
+        >>> index.add_person('Phil Dunphy')
+        >>> index.add_person('Claire Dunphy')
+        >>> index.first_names('Dunphy')
+        ['Claire', 'Phil']
+        """
+
+        if name in self._last_names:
+            return
+        # Interned, so that equal last names compare by identity.
+        last_name = sys.intern(get_last_name(name))
+        self._last_names[name] = last_name
+        insort(self._families.setdefault(last_name, []), get_first_name(name))
+
+    def remove_person(self, name: str) -> None:
+        """Remove name from the index, if they are in it.
+
+        >>> index = FamilyIndex({'Phil Dunphy': ['Claire Dunphy']})
+        >>> index.remove_person('Phil Dunphy')
+        >>> index.get_families()
+        {'Dunphy': ['Claire']}
+        """
+
+        last_name = self._last_names.pop(name, None)
+        if last_name is None:
+            return
+        first_names = self._families[last_name]
+        del first_names[bisect_left(first_names, get_first_name(name))]
+        if not first_names:
+            del self._families[last_name]
+
+    def last_name(self, name: str) -> str:
+        """Return the last name of name, without splitting it if name is in
+        the index.
+        """
+
+        last_name = self._last_names.get(name)
+        return get_last_name(name) if last_name is None else last_name
+
+    def same_family(self, name1: str, name2: str) -> bool:
+        """Return whether name1 and name2 have the same last name.
+        """
+
+        return self.last_name(name1) == self.last_name(name2)
+
+    def first_names(self, last_name: str) -> List[str]:
+        """Return the sorted first names of the indexed people with last_name.
+        The list must not be modified.
+        """
+
+        return self._families.get(last_name, [])
+
+    def get_families(self) -> Dict[str, List[str]]:
+        """Return the same dictionary as get_families for the indexed people.
+        """
+
+        return {last_name: list(first_names) for last_name, first_names \
+                in self._families.items()}
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,5 +1,12 @@
+import argparse
+import os
+import sys
 from typing import List
-from network_functions import load_profiles, make_recommendations
+from minhash_index import MinHashRecommender
+from network_functions import load_profiles_many
+from recommendation_engine import RecommendationEngine
+from recommendation_cache import RecommendationCache
+from snapshot import load_snapshot, is_current
 
 
 def display_recommendations(potential_friends: List[str]) -> None:
@@ -15,14 +22,33 @@ def display_recommendations(potential_friends: List[str]) -> None:
 
 
 if __name__ == '__main__':
-    friendships = {}
-    networks = {}
-    profiles_file = open('profiles.txt')
-    load_profiles(profiles_file, friendships, networks)
+    parser = argparse.ArgumentParser(description='Recommend friends.')
+    parser.add_argument('--approximate', type=int, metavar='BANDS', \
+                        help='score only the candidates found by a MinHash '
+                             'index of BANDS bands (more is slower but '
+                             'misses fewer recommendations)')
+    args = parser.parse_args()
+
+    if is_current('profiles.snap', ['profiles.txt']):
+        snapshot = load_snapshot('profiles.snap')
+        recommender = snapshot.scorer
+        friendships = snapshot.store.person_to_friends()
+        networks = snapshot.store.person_to_networks()
+    else:
+        if os.path.exists('profiles.snap'):
+            print('profiles.snap is older than profiles.txt and is ignored; '
+                  'run snapshot.py profiles.txt profiles.snap to rebuild it.', \
+                  file=sys.stderr)
+        friendships, networks = load_profiles_many(['profiles.txt'])
+        recommender = RecommendationEngine(friendships, networks)
+    if args.approximate:
+        recommender = MinHashRecommender(friendships, networks, \
+                                         args.approximate)
+    cache = RecommendationCache(recommender)
 
     person = input('Please enter a person (or press return to exit): ')
     while person != '':
-        potential = make_recommendations(person, friendships, networks)
+        potential = cache.make_recommendations(person)
         display_recommendations(potential)
         person = input('\nPlease enter a person (or press return to exit): ')
     print("Thank you for using the recommendation system!")
@@ -0,0 +1,160 @@
+import argparse
+import io
+import random
+from itertools import accumulate
+from typing import List, Tuple, TextIO
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ne', 'to', 'su', 'vi', 'de', 'ba']
+
+
+def syllable_name(number: int) -> str:
+    """Return a capitalized made-up name that is different for every
+    non-negative number.
+
+    >>> syllable_name(0), syllable_name(7), syllable_name(10), syllable_name(123)
+    ('Ka', 'Vi', 'Loka', 'Lomira')
+    """
+
+    name = SYLLABLES[number % 10]
+    number //= 10
+    while number > 0:
+        name = SYLLABLES[number % 10] + name
+        number //= 10
+    return name.capitalize()
+
+
+def power_law(rng: random.Random, mean: float, alpha: float, limit: int) -> int:
+    """Return a random non-negative integer from a Pareto distribution with
+    shape alpha (> 1) scaled to have roughly the given mean, capped at limit.
+    """
+
+    value = int(mean * (alpha - 1) / alpha * rng.paretovariate(alpha))
+    return min(value, limit)
+
+
+def generate_graph(people: int, seed: int = 0, mean_friends: float = 8.0, \
+                   alpha: float = 2.0, reciprocity: float = 0.5, \
+                   family_size: int = 4, networks: int = None, \
+                   mean_networks: float = 1.0) -> \
+                   Tuple[List[str], List[List[int]], List[str], \
+                         List[List[int]]]:
+    """Return a random social graph of people people as (names, friends,
+    network names, memberships), where names are in 'LastName, FirstName'
+    format, friends[i] lists the ids of the friends of person i and
+    memberships[i] the ids of the networks of person i.
+
+    Friend counts and the popularity of people and networks follow power laws
+    with shape alpha, so there are a few hubs and many people with few
+    friends. A friendship is returned with probability reciprocity. Last names
+    are shared by family_size people on average, with a skew towards common
+    ones, and each person is in mean_networks of the networks (people // 50 by
+    default) on average.
+
+    >>> names, friends, network_names, memberships = generate_graph(5, seed=1)
+    >>> names[:2]
+    ['Ka, Ka', 'Ka, Lo']
+    >>> generate_graph(5, seed=1) == (names, friends, network_names, memberships)
+    True
+    """
+
+    rng = random.Random(seed)
+    if networks is None:
+        networks = max(1, people // 50)
+
+    surname_count = max(1, people // family_size)
+    surname_weights = list(accumulate(1 / (k + 1) for k in range(surname_count)))
+    surnames = rng.choices(range(surname_count), cum_weights=surname_weights, \
+                           k=people)
+    names = ['{}, {}'.format(syllable_name(surnames[i]), syllable_name(i)) \
+             for i in range(people)]
+
+    popularity = list(accumulate(rng.paretovariate(alpha) \
+                                 for i in range(people)))
+    friends = [[] for i in range(people)]
+    known = [set() for i in range(people)]
+    for person in range(people):
+        count = power_law(rng, mean_friends, alpha, people - 1)
+        for friend in rng.choices(range(people), cum_weights=popularity, \
+                                  k=count):
+            if friend != person and friend not in known[person]:
+                known[person].add(friend)
+                friends[person].append(friend)
+                if rng.random() < reciprocity and person not in known[friend]:
+                    known[friend].add(person)
+                    friends[friend].append(person)
+
+    network_names = ['{} Club'.format(syllable_name(k)) \
+                     for k in range(networks)]
+    network_weights = list(accumulate(1 / (k + 1) for k in range(networks)))
+    memberships = []
+    for person in range(people):
+        count = min(networks, int(rng.expovariate(1 / mean_networks) + 0.5)) \
+            if mean_networks > 0 else 0
+        chosen = rng.choices(range(networks), cum_weights=network_weights, \
+                             k=count)
+        memberships.append(list(dict.fromkeys(chosen)))
+
+    return names, friends, network_names, memberships
+
+
+def write_profiles(profiles_file: TextIO, people: int, seed: int = 0, \
+                   **options) -> None:
+    """Write a random profiles file of people people to profiles_file, in the
+    format load_profiles reads. options are passed to generate_graph.
+    """
+
+    names, friends, network_names, memberships = \
+        generate_graph(people, seed, **options)
+    for person in range(people):
+        if person > 0:
+            profiles_file.write('\n')
+        profiles_file.write(names[person] + '\n')
+        for friend in friends[person]:
+            profiles_file.write(names[friend] + '\n')
+        for network in memberships[person]:
+            profiles_file.write(network_names[network] + '\n')
+
+
+def generate_profiles(people: int, seed: int = 0, **options) -> str:
+    """Return the contents of a random profiles file of people people. options
+    are passed to generate_graph.
+
+    >>> print(generate_profiles(3, seed=2, mean_friends=2, networks=1))
+    Ka, Ka
+    Ka, Lo
+    Ka Club
+    <BLANKLINE>
+    Ka, Lo
+    Ka, Mi
+    Ka Club
+    <BLANKLINE>
+    Ka, Mi
+    Ka, Lo
+    Ka Club
+    <BLANKLINE>
+    """
+
+    profiles_file = io.StringIO()
+    write_profiles(profiles_file, people, seed, **options)
+    return profiles_file.getvalue()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( \
+        description='Write a random profiles file.')
+    parser.add_argument('people', type=int)
+    parser.add_argument('output')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mean-friends', type=float, default=8.0)
+    parser.add_argument('--alpha', type=float, default=2.0)
+    parser.add_argument('--reciprocity', type=float, default=0.5)
+    parser.add_argument('--family-size', type=int, default=4)
+    parser.add_argument('--networks', type=int, default=None)
+    parser.add_argument('--mean-networks', type=float, default=1.0)
+    args = parser.parse_args()
+    with open(args.output, 'w') as output:
+        write_profiles(output, args.people, args.seed, \
+                       mean_friends=args.mean_friends, alpha=args.alpha, \
+                       reciprocity=args.reciprocity, \
+                       family_size=args.family_size, networks=args.networks, \
+                       mean_networks=args.mean_networks)
@@ -0,0 +1,279 @@
+import math
+from bisect import bisect_left, insort
+from typing import List, Tuple, Dict, Hashable
+from network_functions import add_to_friends, add_to_network, \
+    remove_from_friends, remove_from_network, invert_network, P2F, P2N
+
+
+class Distribution:
+    """A non-negative integer value for each of a set of items, with the
+    number of items of each value kept in a Fenwick tree, so that the mean is
+    O(1) and percentiles are O(log m), where m is the largest value. The items
+    of each value are kept in a sorted bucket, so top(k) is O(k log m). Items
+    must be orderable with each other.
+
+    >>> sizes = Distribution()
+    >>> for item, value in [('a', 3), ('b', 1), ('c', 3), ('d', 7)]:
+    ...     sizes.set(item, value)
+    >>> sizes.histogram()
+    {1: 1, 3: 2, 7: 1}
+    >>> sizes.mean(), sizes.percentile(50), sizes.percentile(100)
+    (3.5, 3, 7)
+    >>> sizes.top(3)
+    [('d', 7), ('a', 3), ('c', 3)]
+    """
+
+    def __init__(self, values: Dict[Hashable, int] = None) -> None:
+        """Initialize a distribution of the items of values, if it is given,
+        with their values.
+        """
+
+        self.values = dict(values or {})
+        self.total = sum(self.values.values())
+        self._buckets = {}
+        for item, value in self.values.items():
+            self._buckets.setdefault(value, []).append(item)
+        for bucket in self._buckets.values():
+            bucket.sort()
+        self._size = 1
+        self._grow(max(self._buckets, default=0))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _update(self, value: int, delta: int) -> None:
+        """Add delta to the number of items of value in the tree.
+        """
+
+        tree = self._tree
+        size = self._size
+        i = value + 1
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def _grow(self, value: int) -> None:
+        """Make the tree large enough to hold value.
+        """
+
+        while self._size <= value:
+            self._size *= 2
+        self._tree = [0] * (self._size + 1)
+        for bucket_value, bucket in self._buckets.items():
+            self._update(bucket_value, len(bucket))
+
+    def _find(self, rank: int) -> int:
+        """Return the value of the item of rank rank (from 1) in increasing
+        order of value.
+        """
+
+        tree = self._tree
+        position = 0
+        step = self._size
+        while step:
+            if position + step <= self._size and tree[position + step] < rank:
+                position += step
+                rank -= tree[position]
+            step //= 2
+        return position
+
+    def set(self, item: Hashable, value: int) -> None:
+        """Make value the value of item.
+        """
+
+        self.discard(item)
+        if value >= self._size:
+            self._grow(value)
+        self.values[item] = value
+        self.total += value
+        insort(self._buckets.setdefault(value, []), item)
+        self._update(value, 1)
+
+    def add(self, item: Hashable, delta: int) -> None:
+        """Add delta to the value of item, which is 0 if item has none.
+        """
+
+        self.set(item, self.values.get(item, 0) + delta)
+
+    def discard(self, item: Hashable) -> None:
+        """Remove item and its value, if it has one.
+        """
+
+        value = self.values.pop(item, None)
+        if value is not None:
+            self.total -= value
+            bucket = self._buckets[value]
+            del bucket[bisect_left(bucket, item)]
+            if not bucket:
+                del self._buckets[value]
+            self._update(value, -1)
+
+    def mean(self) -> float:
+        """Return the mean of the values, or 0 if there are none.
+        """
+
+        if not self.values:
+            return 0
+        return self.total / len(self.values)
+
+    def percentile(self, q: float) -> int:
+        """Return the nearest-rank q-th percentile of the values: the
+        smallest value that at least q percent of the items have or are under.
+        Return 0 if there are no values.
+        """
+
+        if not 0 <= q <= 100:
+            raise ValueError('percentile must be between 0 and 100')
+        if not self.values:
+            return 0
+        return self._find(max(1, math.ceil(q * len(self.values) / 100)))
+
+    def histogram(self) -> Dict[int, int]:
+        """Return the number of items with each value, in increasing order of
+        value.
+        """
+
+        return {value: len(self._buckets[value]) \
+                for value in sorted(self._buckets)}
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """Return the k items with the largest values, with their values,
+        ordered by value from largest to smallest and then by item.
+        """
+
+        top = []
+        rank = len(self.values)
+        while rank > 0 and len(top) < k:
+            value = self._find(rank)
+            bucket = self._buckets[value]
+            top.extend((item, value) for item in bucket[:k - len(top)])
+            rank -= len(bucket)
+        return top
+
+
+class GraphStatistics:
+    """Statistics of person_to_friends and person_to_networks kept up to date
+    as they change: the distribution of the friend counts of the people who
+    are keys of person_to_friends, the distribution of network sizes, and the
+    reciprocity of friendships, that is the fraction of "name lists friend"
+    entries for which friend also lists name.
+
+    Changes to the graph must go through the add and remove methods, which
+    update the counters in O(log m) time, m being the largest friend count or
+    network size, plus a move between two sorted buckets of items.
+
+    >>> stats = GraphStatistics(P2F, P2N)
+    >>> round(stats.get_average_friend_count(), 2)
+    2.55
+    >>> stats.friend_counts.top(2)
+    [('Luke Dunphy', 4), ('Claire Dunphy', 3)]
+    >>> stats.network_sizes.histogram()
+    {1: 5, 2: 2}
+    >>> stats.reciprocal_friendships, stats.friendships
+    (26, 28)
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]]) -> None:
+        """Count the friends, network members and reciprocal friendships of
+        person_to_friends and person_to_networks.
+        """
+
+        self.person_to_friends = person_to_friends
+        self.person_to_networks = person_to_networks
+        self.friend_counts = Distribution({person: len(friends) for \
+            person, friends in person_to_friends.items()})
+        self.network_sizes = Distribution({network: len(members) for \
+            network, members in invert_network(person_to_networks).items()})
+        self._friend_sets = {person: set(friends) for person, friends \
+                             in person_to_friends.items()}
+
+        self.friendships = self.friend_counts.total
+        self.reciprocal_friendships = 0
+        for person, friends in self._friend_sets.items():
+            for friend in friends:
+                if person in self._friend_sets.get(friend, ()):
+                    self.reciprocal_friendships += 1
+
+    def get_average_friend_count(self) -> float:
+        """Return the same average as get_average_friend_count for
+        person_to_friends, from the friend counts.
+        """
+
+        return self.friend_counts.mean()
+
+    def reciprocity(self) -> float:
+        """Return the fraction of friendships whose reverse is a friendship
+        too, or 0 if there are no friendships.
+        """
+
+        if not self.friendships:
+            return 0
+        return self.reciprocal_friendships / self.friendships
+
+    def _reciprocal_count(self, name: str, friend: str) -> int:
+        """Return the number of reciprocal friendships that the friendship of
+        name with friend makes, given that the one of friend with name is
+        already counted if it exists.
+        """
+
+        if name == friend:
+            return 1
+        if name in self._friend_sets.get(friend, ()):
+            return 2
+        return 0
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend as a value to name in person_to_friends and count it.
+        """
+
+        friends = self._friend_sets.setdefault(name, set())
+        if friend not in friends:
+            friends.add(friend)
+            self.friend_counts.add(name, 1)
+            self.friendships += 1
+            self.reciprocal_friendships += self._reciprocal_count(name, friend)
+        add_to_friends(name, friend, self.person_to_friends)
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the values of name in person_to_friends and
+        uncount it.
+        """
+
+        friends = self._friend_sets.get(name, ())
+        if friend in friends:
+            self.reciprocal_friendships -= self._reciprocal_count(name, friend)
+            friends.remove(friend)
+            self.friendships -= 1
+            if friends:
+                self.friend_counts.add(name, -1)
+            else:
+                del self._friend_sets[name]
+                self.friend_counts.discard(name)
+        remove_from_friends(name, friend, self.person_to_friends)
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Add network as a value to name in person_to_networks and count the
+        new member.
+        """
+
+        if network not in self.person_to_networks.get(name, ()):
+            self.network_sizes.add(network, 1)
+        add_to_network(name, network, self.person_to_networks)
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Remove network from the values of name in person_to_networks and
+        uncount the member.
+        """
+
+        if network in self.person_to_networks.get(name, ()):
+            if self.network_sizes.values[network] == 1:
+                self.network_sizes.discard(network)
+            else:
+                self.network_sizes.add(network, -1)
+        remove_from_network(name, network, self.person_to_networks)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
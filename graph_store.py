@@ -0,0 +1,333 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from typing import List, Tuple, Dict, Iterator
+from network_functions import P2F, P2N
+
+FRIENDS_KEY = 1
+NETWORKS_KEY = 2
+IN_FRIEND_GRAPH = 4
+
+
+class NameTable(Sequence):
+    """An alphabetically sorted table of names stored as one UTF-8 blob and an
+    array of offsets into it, so that a name costs its bytes plus 8 bytes
+    instead of a full Python string object.
+
+    >>> names = NameTable.from_names(['Luke Dunphy', 'Alex Dunphy'])
+    >>> list(names)
+    ['Alex Dunphy', 'Luke Dunphy']
+    >>> names.index_of('Luke Dunphy')
+    1
+    """
+
+    def __init__(self, offsets: Sequence, data: bytes) -> None:
+        """Initialize a table from the offsets and data of sorted names.
+        """
+
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_names(cls, names: List[str]) -> 'NameTable':
+        """Return a table of the distinct names in names.
+        """
+
+        offsets = array('q', [0])
+        data = bytearray()
+        for name in sorted(set(names)):
+            data += name.encode('utf-8')
+            offsets.append(len(data))
+        return cls(offsets, bytes(data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def index_of(self, name: str) -> int:
+        """Return the position of name in the table, or -1 if it is not there.
+        """
+
+        i = bisect_left(self, name)
+        if i < len(self) and self[i] == name:
+            return i
+        return -1
+
+
+class GraphStore:
+    """A compact, read-only copy of a "person to friends" and a "person to
+    networks" dictionary. Names and network names are interned to integer ids
+    (their positions in sorted NameTables) and each person's friends and
+    networks are kept, in their original order, as slices of one flat
+    neighbour array indexed by an offset array (CSR adjacency).
+
+    The whole store is held in TABLE_COUNT flat tables (see the tables
+    method), so it can be copied to or viewed from any buffer.
+
+    >>> store = GraphStore.from_dicts(P2F, P2N)
+    >>> store.friends_of('Alex Dunphy')
+    ['Luke Dunphy']
+    >>> store.networks_of('Alex Dunphy')
+    ['Chess Club', 'Orchestra']
+    >>> store.person_to_friends()['Phil Dunphy']
+    ['Claire Dunphy', 'Luke Dunphy']
+    """
+
+    TABLE_COUNT = 9
+
+    def __init__(self, names: NameTable, network_names: NameTable, \
+                 flags: bytes, friend_offsets: Sequence, \
+                 friend_targets: Sequence, network_offsets: Sequence, \
+                 network_targets: Sequence) -> None:
+        """Initialize a store from its tables. flags holds, for each person id,
+        the FRIENDS_KEY, NETWORKS_KEY and IN_FRIEND_GRAPH bits.
+        """
+
+        self.names = names
+        self.network_names = network_names
+        self.flags = flags
+        self.friend_offsets = friend_offsets
+        self.friend_targets = friend_targets
+        self.network_offsets = network_offsets
+        self.network_targets = network_targets
+
+    @classmethod
+    def from_dicts(cls, person_to_friends: Dict[str, List[str]], \
+                   person_to_networks: Dict[str, List[str]]) -> 'GraphStore':
+        """Return a store holding person_to_friends and person_to_networks.
+        """
+
+        everyone = set(person_to_friends) | set(person_to_networks)
+        for friends in person_to_friends.values():
+            everyone.update(friends)
+        names = NameTable.from_names(list(everyone))
+        person_ids = {name: i for i, name in enumerate(names)}
+        network_names = NameTable.from_names( \
+            [n for networks in person_to_networks.values() for n in networks])
+        network_ids = {name: i for i, name in enumerate(network_names)}
+
+        flags = bytearray(len(names))
+        friend_offsets = array('q', [0])
+        friend_targets = array('i')
+        network_offsets = array('q', [0])
+        network_targets = array('i')
+
+        for name in person_to_friends:
+            flags[person_ids[name]] |= FRIENDS_KEY | IN_FRIEND_GRAPH
+            for friend in person_to_friends[name]:
+                flags[person_ids[friend]] |= IN_FRIEND_GRAPH
+        for name in person_to_networks:
+            flags[person_ids[name]] |= NETWORKS_KEY
+
+        for name in names:
+            for friend in person_to_friends.get(name, []):
+                friend_targets.append(person_ids[friend])
+            friend_offsets.append(len(friend_targets))
+            for network in person_to_networks.get(name, []):
+                network_targets.append(network_ids[network])
+            network_offsets.append(len(network_targets))
+
+        return cls(names, network_names, bytes(flags), friend_offsets, \
+                   friend_targets, network_offsets, network_targets)
+
+    @classmethod
+    def from_tables(cls, tables: List[Sequence]) -> 'GraphStore':
+        """Return a store made of tables, a list returned by the tables method
+        of a store. The tables are used as they are, so they may be views of
+        shared or memory-mapped buffers.
+        """
+
+        return cls(NameTable(tables[0], tables[1]), \
+                   NameTable(tables[2], tables[3]), *tables[4:])
+
+    def tables(self) -> List[Sequence]:
+        """Return the arrays holding this store, in the order from_tables takes
+        them.
+        """
+
+        return [self.names.offsets, self.names.data, \
+                self.network_names.offsets, self.network_names.data, \
+                self.flags, self.friend_offsets, self.friend_targets, \
+                self.network_offsets, self.network_targets]
+
+    def id_of(self, name: str) -> int:
+        """Return the id of the person called name.
+
+        >>> store = GraphStore.from_dicts(P2F, P2N)
+        >>> store.name_of(store.id_of('Luke Dunphy'))
+        'Luke Dunphy'
+        """
+
+        i = self.names.index_of(name)
+        if i == -1:
+            raise KeyError(name)
+        return i
+
+    def name_of(self, person_id: int) -> str:
+        """Return the name of the person with id person_id.
+        """
+
+        return self.names[person_id]
+
+    def friend_ids(self, person_id: int) -> Sequence:
+        """Return the ids of the friends of the person with id person_id.
+        """
+
+        offsets = self.friend_offsets
+        return self.friend_targets[offsets[person_id]:offsets[person_id + 1]]
+
+    def network_ids(self, person_id: int) -> Sequence:
+        """Return the ids of the networks of the person with id person_id.
+        """
+
+        offsets = self.network_offsets
+        return self.network_targets[offsets[person_id]:offsets[person_id + 1]]
+
+    def friends_of(self, name: str) -> List[str]:
+        """Return the friends of the person called name, in their original
+        order.
+        """
+
+        return [self.names[i] for i in self.friend_ids(self.id_of(name))]
+
+    def networks_of(self, name: str) -> List[str]:
+        """Return the networks of the person called name, in their original
+        order.
+        """
+
+        return [self.network_names[i] for i in \
+                self.network_ids(self.id_of(name))]
+
+    def person_to_friends(self) -> 'AdjacencyView':
+        """Return a read-only "person to friends" dictionary view of the store.
+        """
+
+        return AdjacencyView(self, FRIENDS_KEY)
+
+    def person_to_networks(self) -> 'AdjacencyView':
+        """Return a read-only "person to networks" dictionary view of the
+        store.
+        """
+
+        return AdjacencyView(self, NETWORKS_KEY)
+
+    def nbytes(self) -> int:
+        """Return the number of bytes taken by the tables of the store.
+
+        >>> GraphStore.from_dicts({}, {}).nbytes()
+        32
+        """
+
+        return sum(memoryview(table).nbytes for table in self.tables())
+
+
+def layout_tables(tables: List[Sequence]) -> Tuple[List[Tuple[str, int, int]], \
+                                                  int]:
+    """Return the layout of tables laid end to end in one buffer, as a list of
+    (format, offset, number of bytes) for each table with offsets aligned to
+    8 bytes, and the size of the buffer.
+
+    >>> layout_tables([array('q', [1, 2]), b'abc', array('i', [3])])
+    ([('q', 0, 16), ('B', 16, 3), ('i', 24, 4)], 28)
+    """
+
+    layout = []
+    size = 0
+    for table in tables:
+        view = memoryview(table)
+        size += -size % 8
+        layout.append((view.format, size, view.nbytes))
+        size += view.nbytes
+    return layout, size
+
+
+def write_tables(buffer: memoryview, tables: List[Sequence], \
+                 layout: List[Tuple[str, int, int]]) -> None:
+    """Copy tables into buffer at the places given by layout.
+    """
+
+    for table, (format, offset, nbytes) in zip(tables, layout):
+        buffer[offset:offset + nbytes] = memoryview(table).cast('B')
+
+
+def read_tables(buffer: memoryview, layout: List[Tuple[str, int, int]]) \
+                -> List[memoryview]:
+    """Return typed views of the tables laid out in buffer, without copying
+    them.
+
+    >>> tables = [array('q', [1, 2]), b'abc', array('i', [3])]
+    >>> layout, size = layout_tables(tables)
+    >>> buffer = memoryview(bytearray(size))
+    >>> write_tables(buffer, tables, layout)
+    >>> [list(table) for table in read_tables(buffer, layout)]
+    [[1, 2], [97, 98, 99], [3]]
+    """
+
+    return [buffer[offset:offset + nbytes].cast(format) \
+            for format, offset, nbytes in layout]
+
+
+class AdjacencyView(Mapping):
+    """A read-only dictionary view of the friends (FRIENDS_KEY) or networks
+    (NETWORKS_KEY) of a GraphStore, so that functions written for
+    person_to_friends and person_to_networks, like get_friends,
+    get_friends_of_friends, invert_network and make_recommendations, run
+    directly on the store. Keys are iterated in alphabetical order.
+
+    >>> from network_functions import get_friends_of_friends, invert_network
+    >>> store = GraphStore.from_dicts(P2F, P2N)
+    >>> get_friends_of_friends(store.person_to_friends(), 'Claire Dunphy')
+    ['Cameron Tucker', 'Gloria Pritchett', 'Luke Dunphy', 'Luke Dunphy', \
+'Manny Delgado']
+    >>> invert_network(store.person_to_networks())['Chess Club']
+    ['Alex Dunphy', 'Manny Delgado']
+    """
+
+    def __init__(self, store: GraphStore, key_flag: int) -> None:
+        """Initialize a view of store's friends or networks.
+        """
+
+        self._store = store
+        self._key_flag = key_flag
+        self._len = None
+
+    def _id_of(self, name: str) -> int:
+        i = self._store.names.index_of(name)
+        if i == -1 or not self._store.flags[i] & self._key_flag:
+            return -1
+        return i
+
+    def __getitem__(self, name: str) -> List[str]:
+        i = self._id_of(name)
+        if i == -1:
+            raise KeyError(name)
+        if self._key_flag == FRIENDS_KEY:
+            names = self._store.names
+            return [names[j] for j in self._store.friend_ids(i)]
+        names = self._store.network_names
+        return [names[j] for j in self._store.network_ids(i)]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._id_of(name) != -1
+
+    def __iter__(self) -> Iterator[str]:
+        flags = self._store.flags
+        names = self._store.names
+        for i in range(len(names)):
+            if flags[i] & self._key_flag:
+                yield names[i]
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for flag in self._store.flags \
+                            if flag & self._key_flag)
+        return self._len
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
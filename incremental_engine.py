@@ -0,0 +1,210 @@
+from typing import List, Tuple, Dict, Set
+from recommendation_engine import RecommendationEngine
+from network_functions import P2F, P2N
+
+# A (person, friend, candidate) triple: one possible mutual friend of a pair.
+Triple = Tuple[str, str, str]
+
+
+class IncrementalRecommendationEngine(RecommendationEngine):
+    """A RecommendationEngine that keeps a table of the mutual friend score and
+    the mutual network score of every pair of people with a non-zero score,
+    and updates only the affected pairs when friends or networks are added or
+    removed. A friendship change costs time proportional to the number of
+    friends of the two people involved, and a network change time
+    proportional to the size of the network, instead of a full rescore.
+
+    Friend and network lists must not have duplicates, which add_to_friends
+    and add_to_network guarantee.
+
+    >>> engine = IncrementalRecommendationEngine({'Jay Pritchett': \
+['Claire Dunphy'], 'Claire Dunphy': ['Jay Pritchett']}, {})
+    >>> engine.add_to_friends('Claire Dunphy', 'Phil Dunphy')
+    >>> engine.add_to_friends('Phil Dunphy', 'Claire Dunphy')
+    >>> engine.make_recommendations('Jay Pritchett')
+    [('Phil Dunphy', 1)]
+    >>> engine.remove_from_friends('Claire Dunphy', 'Phil Dunphy')
+    >>> engine.make_recommendations('Jay Pritchett')
+    []
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]]) -> None:
+        """Index person_to_friends and person_to_networks and score every pair
+        of people once.
+        """
+
+        RecommendationEngine.__init__(self, person_to_friends, \
+                                      person_to_networks)
+        self._friend_counts = {}
+        self._network_counts = {}
+
+        for person in person_to_friends:
+            scores = RecommendationEngine.get_mutual_friend_scores(self, person)
+            if scores:
+                self._friend_counts[person] = scores
+        for person in person_to_networks:
+            scores = RecommendationEngine.get_mutual_network_scores(self, person)
+            if scores:
+                self._network_counts[person] = scores
+
+    def get_mutual_friend_scores(self, person: str) -> Dict[str, int]:
+        """Return the maintained dictionary of the non-zero
+        get_mutual_friend_score of every person with respect to person. It
+        must not be modified.
+
+        >>> engine = IncrementalRecommendationEngine(P2F, P2N)
+        >>> engine.get_mutual_friend_scores('Haley Gwendolyn Dunphy')['Chairman D-Cat']
+        1
+        """
+
+        return self._friend_counts.get(person, {})
+
+    def get_mutual_network_scores(self, person: str) -> Dict[str, int]:
+        """Return the maintained dictionary of the non-zero
+        get_mutual_network_score of every person with respect to person. It
+        must not be modified.
+
+        >>> engine = IncrementalRecommendationEngine(P2F, P2N)
+        >>> engine.get_mutual_network_scores('Claire Dunphy')
+        {'Claire Dunphy': 1, 'Gloria Pritchett': 1}
+        """
+
+        return self._network_counts.get(person, {})
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend as a value to name in person_to_friends and update the
+        scores of the affected pairs.
+        """
+
+        if friend in self._friends.get(name, set()):
+            return
+        was_key = name in self._friends
+        RecommendationEngine.add_to_friends(self, name, friend)
+        self._update_friend_counts(name, friend, was_key, 1)
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the values of name in person_to_friends and
+        update the scores of the affected pairs.
+        """
+
+        if friend not in self._friends.get(name, set()):
+            return
+        stays_key = len(self.person_to_friends[name]) > 1
+        self._update_friend_counts(name, friend, stays_key, -1)
+        RecommendationEngine.remove_from_friends(self, name, friend)
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Add network as a value to name in person_to_networks and update the
+        scores of the affected pairs.
+        """
+
+        if network in self.person_to_networks.get(name, []):
+            return
+        for member in self._networks.members(network):
+            self._add_count(self._network_counts, name, member, 1)
+            self._add_count(self._network_counts, member, name, 1)
+        self._add_count(self._network_counts, name, name, 1)
+        RecommendationEngine.add_to_network(self, name, network)
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Remove network from the values of name in person_to_networks and
+        update the scores of the affected pairs.
+        """
+
+        if network not in self.person_to_networks.get(name, []):
+            return
+        RecommendationEngine.remove_from_network(self, name, network)
+        for member in self._networks.members(network):
+            self._add_count(self._network_counts, name, member, -1)
+            self._add_count(self._network_counts, member, name, -1)
+        self._add_count(self._network_counts, name, name, -1)
+
+    def _update_friend_counts(self, name: str, friend: str, \
+                              key_without: bool, sign: int) -> None:
+        """Add sign times the change that the friendship from name to friend
+        makes to the mutual friend scores. It must be called while friend is
+        one of the friends of name; key_without tells whether name is a key
+        of person_to_friends without that friendship.
+        """
+
+        without = (name, friend, key_without)
+        for person, via, candidate in self._triples(name, friend, key_without):
+            change = self._contribution(person, via, candidate, None) - \
+                self._contribution(person, via, candidate, without)
+            if change:
+                self._add_count(self._friend_counts, person, candidate, \
+                                sign * change)
+
+    def _triples(self, name: str, friend: str, key_without: bool) -> \
+                 Set[Triple]:
+        """Return the (person, friend, candidate) triples whose contribution
+        to the mutual friend score of person and candidate can depend on the
+        friendship from name to friend.
+        """
+
+        friends = self._friends
+        listed_by = self._listed_by
+        triples = set()
+
+        for candidate in friends.get(friend, set()):
+            triples.add((name, friend, candidate))
+        for person in listed_by.get(name, set()):
+            triples.add((person, name, friend))
+        for candidate in friends[name]:
+            triples.add((friend, name, candidate))
+        for person in listed_by.get(friend, set()):
+            triples.add((person, friend, name))
+
+        if not key_without:
+            # name stops or starts being a key of person_to_friends, which
+            # switches between mutual_friend_type_1 and mutual_friend_type_3.
+            for via in listed_by.get(name, set()):
+                for person in listed_by.get(via, set()):
+                    triples.add((person, via, name))
+                for candidate in friends[name]:
+                    triples.add((via, name, candidate))
+
+        return triples
+
+    def _contribution(self, person: str, via: str, candidate: str, \
+                      without: Tuple[str, str, bool]) -> int:
+        """Return 1 iff via counts as a mutual friend of person and candidate
+        in get_mutual_friend_score. If without is (name, friend, key_without),
+        the friendship from name to friend is left out and name is a key of
+        person_to_friends iff key_without.
+        """
+
+        def lists(someone: str, other: str) -> bool:
+            if without is not None and someone == without[0] and \
+               other == without[1]:
+                return False
+            return other in self._friends.get(someone, ())
+
+        def is_key(someone: str) -> bool:
+            if without is not None and someone == without[0]:
+                return without[2]
+            return someone in self._friends
+
+        if not lists(person, via) or not is_key(via) or \
+           not lists(via, candidate):
+            return 0
+        if is_key(candidate) and \
+           not (lists(candidate, via) and lists(via, person)):
+            return 0
+        return 1
+
+    @staticmethod
+    def _add_count(counts: Dict[str, Dict[str, int]], person: str, \
+                   other: str, change: int) -> None:
+        row = counts.setdefault(person, {})
+        row[other] = row.get(other, 0) + change
+        if row[other] == 0:
+            del row[other]
+            if not row:
+                del counts[person]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
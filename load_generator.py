@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import List, Dict
+from network_functions import load_profiles_many
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the value below which fraction of the sorted list values lies,
+    using the nearest rank.
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.5)
+    2.0
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.99)
+    4.0
+    >>> percentile([], 0.5)
+    0.0
+    """
+
+    if not values:
+        return 0.0
+    rank = min(max(math.ceil(fraction * len(values)), 1), len(values))
+    return values[rank - 1]
+
+
+async def _client(host: str, port: int, people: List[str], \
+                  latencies: List[float], errors: List[str]) -> None:
+    """Send the requests for people over one connection, one at a time, and
+    record their latencies.
+    """
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for person in people:
+            start = time.perf_counter()
+            writer.write(person.encode('utf-8') + b'\n')
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if 'error' in response:
+                errors.append(person)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(host: str, port: int, people: List[str], requests: int, \
+                   concurrency: int, seed: int = 0) -> Dict[str, float]:
+    """Send requests queries for people picked at random from people over
+    concurrency connections, and return the throughput in queries per second,
+    the p50 and p99 latencies in milliseconds and the number of errors.
+    """
+
+    rng = random.Random(seed)
+    queries = [rng.choice(people) for i in range(requests)]
+    latencies = []
+    errors = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, queries[i::concurrency], \
+                                   latencies, errors) \
+                           for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {'requests': len(latencies),
+            'errors': len(errors),
+            'qps': len(latencies) / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( \
+        description='Load-test a recommendation_server.')
+    parser.add_argument('profiles', nargs='*', default=['profiles.txt'], \
+                        help='profiles files to pick the queried people from')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    person_to_friends, person_to_networks = load_profiles_many(args.profiles)
+    report = asyncio.run(run_load(args.host, args.port, list(person_to_friends), \
+                                  args.requests, args.concurrency, args.seed))
+    print(json.dumps(report, indent=2))
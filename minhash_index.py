@@ -0,0 +1,174 @@
+import random
+from array import array
+from typing import List, Tuple, Dict, Set
+from network_functions import invert_network, P2F, P2N
+from scoring_kernel import ScoringKernel
+
+# The Mersenne prime the hash functions of the sketches work modulo.
+PRIME = (1 << 61) - 1
+
+
+class MinHashRecommender:
+    """An approximate version of make_recommendations. Every person of the
+    friend graph has a MinHash sketch of the set of their friends (either
+    way round) and networks, cut into bands of rows values each. People whose
+    sketches agree on a whole band share a bucket of the LSH index of that
+    band, which happens with a probability that grows steeply with the
+    Jaccard similarity of their sets, so the people who share a bucket with
+    a person are the ones most likely to share friends and networks with
+    them. Only those candidates are scored, exactly, by a ScoringKernel.
+
+    bands, in make_recommendations, is the recall/latency knob: probing
+    fewer of the indexed bands gives fewer candidates, which are scored
+    faster but miss more of the exact recommendations.
+
+    The index is built from a fixed person_to_friends and person_to_networks;
+    it must be rebuilt after they change.
+
+    >>> recommender = MinHashRecommender(P2F, P2N)
+    >>> recommender.make_recommendations('Claire Dunphy')[:2]
+    [('Luke Dunphy', 3), ('Gloria Pritchett', 2)]
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]], bands: int = 64, \
+                 rows: int = 1, seed: int = 0) -> None:
+        """Sketch everyone in person_to_friends with bands * rows hash
+        functions picked with seed, and index the sketches.
+        """
+
+        self.kernel = ScoringKernel(person_to_friends, person_to_networks)
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, PRIME), rng.randrange(PRIME)) \
+                        for i in range(bands * rows)]
+
+        # Friends are elements 0 to n - 1, networks n onwards.
+        ids = self.kernel.ids
+        forward = self.kernel.graph.forward
+        reverse = self.kernel.graph.reverse
+        self._people = sorted(set(forward) | set(reverse))
+        members = invert_network(person_to_networks)
+        self._networks = {}
+        for network_id, network in enumerate(members):
+            for member in members[network]:
+                self._networks.setdefault(ids[member], []) \
+                    .append(len(ids) + network_id)
+
+        self._buckets = [{} for i in range(bands)]
+        hashed = {}
+        for person_id in self._people:
+            columns = []
+            for element in self._elements(person_id):
+                values = hashed.get(element)
+                if values is None:
+                    values = array('Q', [(a * element + b) % PRIME \
+                                         for a, b in self._hashes])
+                    hashed[element] = values
+                columns.append(values)
+            if columns:
+                self._index(person_id, list(map(min, zip(*columns))))
+
+    def _elements(self, person_id: int) -> Set[int]:
+        """Return the elements of the set sketched for the person with id
+        person_id: their friends, the people who list them, and their
+        networks.
+        """
+
+        graph = self.kernel.graph
+        elements = set(graph.forward.get(person_id, ()))
+        elements.update(graph.reverse.get(person_id, ()))
+        elements.update(self._networks.get(person_id, ()))
+        return elements
+
+    def _index(self, person_id: int, signature: List[int]) -> None:
+        """Add the person with id person_id to the bucket of each band of
+        their signature.
+        """
+
+        rows = self.rows
+        for band, buckets in enumerate(self._buckets):
+            key = hash(tuple(signature[band * rows:(band + 1) * rows]))
+            buckets.setdefault(key, []).append(person_id)
+
+    def signature(self, person_id: int) -> List[int]:
+        """Return the MinHash signature of the person with id person_id, or an
+        empty list if their set is empty.
+        """
+
+        elements = self._elements(person_id)
+        if not elements:
+            return []
+        return [min((a * element + b) % PRIME for element in elements) \
+                for a, b in self._hashes]
+
+    def candidates(self, person: str, bands: int = None) -> Set[int]:
+        """Return the ids of the potential friends of person who share a
+        bucket with them in one of the first bands bands (all of them by
+        default).
+        """
+
+        person_id = self.kernel.ids[person]
+        signature = self.signature(person_id)
+        if not signature:
+            return set()
+        rows = self.rows
+        found = set()
+        for band in range(self.bands if bands is None else bands):
+            key = hash(tuple(signature[band * rows:(band + 1) * rows]))
+            found.update(self._buckets[band].get(key, ()))
+        found.discard(person_id)
+        found.difference_update(self.kernel.graph.forward[person_id])
+        return found
+
+    def make_recommendations(self, person: str, bands: int = None) -> \
+                             List[Tuple[str, int]]:
+        """Return the candidates of person with a non-zero score, scored and
+        ordered like make_recommendations. It is a subset of the exact list.
+        """
+
+        kernel = self.kernel
+        if not kernel.graph.forward:
+            return []
+        person_id = kernel.ids.get(person)
+        if person_id not in kernel.graph.forward:
+            raise KeyError(person)
+
+        scored = []
+        for candidate in self.candidates(person, bands):
+            score = kernel.score_ids(person_id, candidate)
+            if score:
+                scored.append((-score, candidate))
+        scored.sort()
+        return [(kernel.names[i], -score) for score, i in scored]
+
+
+def recall_at_k(approximate: List[Tuple[str, int]], \
+                exact: List[Tuple[str, int]], k: int = 10) -> float:
+    """Return the fraction of the first k exact recommendations that the
+    first k approximate ones (a subset of the exact ones, with the same
+    scores) recover (1.0 if there are no exact ones). Names are only broken
+    ties, so an approximate recommendation counts if its score is at least
+    the k-th exact score.
+
+    >>> exact = [('Luke Dunphy', 3), ('Gloria Pritchett', 2), \
+('Manny Delgado', 1), ('Cameron Tucker', 1)]
+    >>> recall_at_k([('Luke Dunphy', 3)], exact, 2)
+    0.5
+    >>> recall_at_k([('Luke Dunphy', 3), ('Gloria Pritchett', 2), \
+('Cameron Tucker', 1)], exact, 3)
+    1.0
+    """
+
+    expected = exact[:k]
+    if not expected:
+        return 1.0
+    threshold = expected[-1][1]
+    found = sum(1 for name, score in approximate[:k] if score >= threshold)
+    return min(found, len(expected)) / len(expected)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,485 @@
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from typing import List, Tuple, Dict, BinaryIO
+from graph_store import GraphStore
+from network_functions import add_to_friends, add_to_network, \
+    remove_from_friends, remove_from_network, P2F, P2N
+from snapshot import save_snapshot, load_snapshot
+
+MAGIC = b'SNWAL\x00\x00\x00'
+VERSION = 1
+# magic, version
+HEADER = struct.Struct('<8sI4x')
+# marker, number of new strings, number of friend mutations, number of
+# network mutations, payload bytes, CRC-32 of the payload
+FRAME = struct.Struct('<4sIIIII')
+FRAME_MARKER = b'MUTS'
+ADD_FRIEND, REMOVE_FRIEND, ADD_NETWORK, REMOVE_NETWORK = range(4)
+# The files of a DurableGraph generation, with the generation as group 1.
+GENERATION_FILE = re.compile(r'(?:snapshot|log)-(\d+)\.(?:snap|wal)$')
+
+
+class Mutations:
+    """The mutations of one table (friends or networks) as three columns: the
+    ids of the names, the ids of the friends or networks, and whether each
+    mutation is a removal (1) or an addition (0).
+    """
+
+    def __init__(self) -> None:
+        self.names = array('I')
+        self.values = array('I')
+        self.removals = array('B')
+
+    def __len__(self) -> int:
+        return len(self.removals)
+
+    def append(self, name_id: int, value_id: int, removal: int) -> None:
+        self.names.append(name_id)
+        self.values.append(value_id)
+        self.removals.append(removal)
+
+    def to_bytes(self) -> bytes:
+        """Return the little-endian columns, one after the other.
+        """
+
+        columns = [self.names, self.values]
+        if sys.byteorder == 'big':
+            columns = [array('I', column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        return b''.join(column.tobytes() for column in columns) + \
+            self.removals.tobytes()
+
+    def extend_from_bytes(self, data: bytes, count: int) -> None:
+        """Append the count mutations whose to_bytes are data.
+        """
+
+        names = array('I', data[:4 * count])
+        values = array('I', data[4 * count:8 * count])
+        if sys.byteorder == 'big':
+            names.byteswap()
+            values.byteswap()
+        self.names += names
+        self.values += values
+        self.removals.frombytes(data[8 * count:9 * count])
+
+    def apply(self, strings: List[str], \
+              person_to_values: Dict[str, List[str]]) -> None:
+        """Apply the mutations, whose ids index strings, to person_to_values in
+        order, the way add_to_friends and remove_from_friends (or the network
+        functions) would.
+        """
+
+        # The values of each touched name id, as an insertion-ordered dict, so
+        # that membership checks do not grow with the degree of the name.
+        touched = [None] * len(strings)
+        for name, value, removal in zip(self.names, self.values, \
+                                        self.removals):
+            values = touched[name]
+            if values is None:
+                values = touched[name] = \
+                    dict.fromkeys(person_to_values.get(strings[name], ()))
+            if removal:
+                values.pop(strings[value], None)
+            else:
+                values[strings[value]] = None
+        for name, values in enumerate(touched):
+            if values is not None:
+                if values:
+                    person_to_values[strings[name]] = list(values)
+                else:
+                    person_to_values.pop(strings[name], None)
+
+
+def _read_frames(log_file: BinaryIO, strings: List[str], \
+                 friends: Mutations, networks: Mutations) -> int:
+    """Read the complete, uncorrupted frames of log_file from its current
+    position, adding the strings they define to strings and their mutations
+    to friends and networks, and return the offset where those frames end.
+    Reading stops at the first frame that is cut short or fails its checksum,
+    which is where a crash in the middle of a write leaves the log.
+    """
+
+    end = log_file.tell()
+    while True:
+        header = log_file.read(FRAME.size)
+        if len(header) < FRAME.size:
+            break
+        marker, string_count, friend_count, network_count, nbytes, crc = \
+            FRAME.unpack(header)
+        payload = log_file.read(nbytes)
+        if marker != FRAME_MARKER or len(payload) < nbytes or \
+           zlib.crc32(payload) != crc:
+            break
+        lengths = struct.unpack_from('<{}I'.format(string_count), payload)
+        start = 4 * string_count
+        for length in lengths:
+            strings.append(payload[start:start + length].decode('utf-8'))
+            start += length
+        friends.extend_from_bytes(payload[start:start + 9 * friend_count], \
+                                  friend_count)
+        start += 9 * friend_count
+        networks.extend_from_bytes(payload[start:], network_count)
+        end = log_file.tell()
+    return end
+
+
+def replay(path: str, person_to_friends: Dict[str, List[str]], \
+           person_to_networks: Dict[str, List[str]]) -> int:
+    """Apply the mutations of the log at path to person_to_friends and
+    person_to_networks and return how many there were.
+    """
+
+    return _replay(path, person_to_friends, person_to_networks)[0]
+
+
+def _replay(path: str, person_to_friends: Dict[str, List[str]], \
+            person_to_networks: Dict[str, List[str]]) -> \
+            Tuple[int, List[str], int]:
+    """Replay the log at path and return the number of mutations, the strings
+    it defines and the offset where its last complete frame ends (0 if even
+    its header is incomplete).
+    """
+
+    strings = []
+    friends = Mutations()
+    networks = Mutations()
+    with open(path, 'rb') as log_file:
+        header = log_file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            # A crash while the log was being created: it has no frames.
+            if not MAGIC.startswith(header[:len(MAGIC)]):
+                raise ValueError('not a mutation log')
+            return 0, strings, 0
+        magic, version = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError('not a mutation log')
+        if version != VERSION:
+            raise ValueError('unsupported mutation log version {}' \
+                             .format(version))
+        end = _read_frames(log_file, strings, friends, networks)
+    if person_to_friends is not None:
+        friends.apply(strings, person_to_friends)
+        networks.apply(strings, person_to_networks)
+    return len(friends) + len(networks), strings, end
+
+
+class MutationLog:
+    """An append-only binary log of graph mutations. Each sync writes one
+    frame with the strings first used since the last one (mutations refer to
+    strings by id) and the pending friend and network Mutations as columns,
+    followed by a single fsync, so mutations are durable in batches: up to
+    batch_size appended mutations are only in memory until the next sync,
+    which a batch_size of 1 makes happen on every append. A frame's checksum
+    lets replay drop a frame that a crash cut short.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'graph.wal')
+    >>> log = MutationLog(path)
+    >>> log.append(ADD_FRIEND, 'Jay Pritchett', 'Claire Dunphy')
+    >>> log.append(ADD_NETWORK, 'Jay Pritchett', 'Golf Club')
+    >>> log.append(ADD_FRIEND, 'Jay Pritchett', 'Gloria Pritchett')
+    >>> log.append(REMOVE_FRIEND, 'Jay Pritchett', 'Claire Dunphy')
+    >>> log.close()
+    >>> p2f, p2n = {}, {}
+    >>> replay(path, p2f, p2n), p2f, p2n
+    (4, {'Jay Pritchett': ['Gloria Pritchett']}, {'Jay Pritchett': ['Golf Club']})
+    """
+
+    def __init__(self, path: str, batch_size: int = 4096, \
+                 person_to_friends: Dict[str, List[str]] = None, \
+                 person_to_networks: Dict[str, List[str]] = None) -> None:
+        """Open the log at path for appending, creating it if it does not
+        exist and cutting off any incomplete frame at its end. The mutations
+        already in the log are applied to person_to_friends and
+        person_to_networks, if they are given. Pending mutations are synced
+        every batch_size mutations.
+        """
+
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._ids = {}
+        self._new_strings = []
+        self._friends = Mutations()
+        self._networks = Mutations()
+
+        end = 0
+        if os.path.exists(path):
+            self.count, strings, end = _replay(path, person_to_friends, \
+                                               person_to_networks)
+            self._ids = {string: i for i, string in enumerate(strings)}
+        if end:
+            self._file = open(path, 'r+b')
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(HEADER.pack(MAGIC, VERSION))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _id_of(self, string: str) -> int:
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = len(self._ids)
+            self._ids[string] = string_id
+            self._new_strings.append(string)
+        return string_id
+
+    def append(self, op: int, name: str, value: str) -> None:
+        """Log the mutation op (ADD_FRIEND, REMOVE_FRIEND, ADD_NETWORK or
+        REMOVE_NETWORK) of value to name, and count it. It is durable after
+        the next sync.
+        """
+
+        mutations = self._friends if op < ADD_NETWORK else self._networks
+        mutations.append(self._id_of(name), self._id_of(value), op & 1)
+        self.count += 1
+        if len(self._friends) + len(self._networks) >= self.batch_size:
+            self.sync()
+
+    def sync(self) -> None:
+        """Write the pending mutations as one frame and fsync the log.
+        """
+
+        pending = len(self._friends) + len(self._networks)
+        if not pending:
+            return
+        encoded = [string.encode('utf-8') for string in self._new_strings]
+        payload = struct.pack('<{}I'.format(len(encoded)), \
+                              *[len(data) for data in encoded]) + \
+            b''.join(encoded) + self._friends.to_bytes() + \
+            self._networks.to_bytes()
+        self._file.write(FRAME.pack(FRAME_MARKER, len(encoded), \
+                                    len(self._friends), len(self._networks), \
+                                    len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._new_strings = []
+        self._friends = Mutations()
+        self._networks = Mutations()
+
+    def close(self) -> None:
+        """Sync the pending mutations and close the log.
+        """
+
+        self.sync()
+        self._file.close()
+
+
+def _fsync_directory(directory: str) -> None:
+    """fsync directory, so that the files just created or renamed in it
+    survive a crash. Systems that cannot open a directory are skipped.
+    """
+
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _dicts_from_store(store: GraphStore) -> Tuple[Dict[str, List[str]], \
+                                                  Dict[str, List[str]]]:
+    """Return "person to friends" and "person to networks" dictionaries with
+    the contents of store.
+    """
+
+    return {name: list(friends) for name, friends \
+            in store.person_to_friends().items()}, \
+        {name: list(networks) for name, networks \
+         in store.person_to_networks().items()}
+
+
+class DurableGraph:
+    """A "person to friends" and "person to networks" graph kept in a
+    directory as a snapshot (see snapshot.py) and a MutationLog of the changes
+    made since. Opening the graph loads the latest snapshot and replays its
+    log instead of parsing profiles; compact saves the current graph as a new
+    snapshot and starts an empty log, which happens on its own once the log
+    holds compact_every mutations.
+
+    Files belong to a generation: snapshot-<n>.snap and log-<n>.wal. A new
+    generation's snapshot is complete before its log is created and the old
+    files are removed, so a crash during compaction leaves either generation
+    whole; opening the graph removes the files of the generations before the
+    one it loads. Keys come back in alphabetical order after a snapshot is
+    loaded.
+
+    A compaction that fails on its own (for example, because the disk is
+    full) does not fail the change that triggered it, which is already logged
+    and applied: the error is kept in compaction_error, and the next attempt
+    waits for another compact_every mutations.
+
+    Each change is appended to the log before it is applied, but the log
+    writes and fsyncs its mutations in batches of batch_size: a crash loses
+    the changes made since the last sync, up to batch_size - 1 of them, which
+    readers of the dictionaries have already seen. Call sync to make them
+    durable, or use a batch_size of 1 to sync every change.
+
+    >>> import tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> graph = DurableGraph(directory, P2F, P2N)
+    >>> graph.add_to_friends('Alex Dunphy', 'Jay Pritchett')
+    >>> graph.close()
+    >>> DurableGraph(directory).person_to_friends['Alex Dunphy']
+    ['Luke Dunphy', 'Jay Pritchett']
+    """
+
+    def __init__(self, directory: str, \
+                 person_to_friends: Dict[str, List[str]] = None, \
+                 person_to_networks: Dict[str, List[str]] = None, \
+                 batch_size: int = 4096, compact_every: int = 1 << 20) -> None:
+        """Open the graph in directory. If it has none yet, it starts as a
+        copy of person_to_friends and person_to_networks (empty if None).
+        """
+
+        self.directory = directory
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+        self.compaction_error = None
+        self._compact_at = compact_every
+        generations = [int(match.group(1)) for match in \
+                       map(re.compile(r'snapshot-(\d+)\.snap$').match, \
+                           os.listdir(directory)) if match]
+
+        if generations:
+            self.generation = max(generations)
+            snapshot = load_snapshot(self._path('snapshot'))
+            self.person_to_friends, self.person_to_networks = \
+                _dicts_from_store(snapshot.store)
+            snapshot.close()
+            self._log = MutationLog(self._path('log'), batch_size, \
+                                    self.person_to_friends, \
+                                    self.person_to_networks)
+            self._remove_old_generations()
+        else:
+            self.generation = 0
+            self.person_to_friends = {name: list(friends) for name, friends \
+                                      in (person_to_friends or {}).items()}
+            self.person_to_networks = {name: list(networks) for name, networks \
+                                       in (person_to_networks or {}).items()}
+            self._log = None
+            self.compact()
+
+    def _path(self, kind: str, generation: int = None) -> str:
+        if generation is None:
+            generation = self.generation
+        extension = 'snap' if kind == 'snapshot' else 'wal'
+        return os.path.join(self.directory, '{}-{}.{}'.format( \
+            kind, generation, extension))
+
+    def _maybe_compact(self) -> None:
+        """Compact once the log, pending mutations included, holds
+        compact_every mutations, or compact_every more than when the last
+        compaction failed.
+        """
+
+        if self._log.count >= self._compact_at:
+            try:
+                self.compact()
+            except Exception as error:
+                self.compaction_error = error
+                self._compact_at = self._log.count + self.compact_every
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Log adding friend as a value to name, then add it in
+        person_to_friends.
+        """
+
+        self._log.append(ADD_FRIEND, name, friend)
+        add_to_friends(name, friend, self.person_to_friends)
+        self._maybe_compact()
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Log removing friend from the values of name, then remove it in
+        person_to_friends.
+        """
+
+        self._log.append(REMOVE_FRIEND, name, friend)
+        remove_from_friends(name, friend, self.person_to_friends)
+        self._maybe_compact()
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Log adding network as a value to name, then add it in
+        person_to_networks.
+        """
+
+        self._log.append(ADD_NETWORK, name, network)
+        add_to_network(name, network, self.person_to_networks)
+        self._maybe_compact()
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Log removing network from the values of name, then remove it in
+        person_to_networks.
+        """
+
+        self._log.append(REMOVE_NETWORK, name, network)
+        remove_from_network(name, network, self.person_to_networks)
+        self._maybe_compact()
+
+    def sync(self) -> None:
+        """Make every change so far durable, by writing and fsyncing the
+        pending mutations of the log.
+        """
+
+        self._log.sync()
+
+    def compact(self) -> None:
+        """Save the graph as the snapshot of a new generation with an empty
+        log, and remove the files of the previous one. If the snapshot cannot
+        be saved, the graph keeps logging to the current generation.
+        """
+
+        if self._log is not None:
+            self._log.sync()
+        new = self.generation + 1
+        temporary = self._path('snapshot', new) + '.tmp'
+        try:
+            save_snapshot(temporary, GraphStore.from_dicts( \
+                self.person_to_friends, self.person_to_networks))
+            with open(temporary, 'rb') as snapshot_file:
+                os.fsync(snapshot_file.fileno())
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        os.replace(temporary, self._path('snapshot', new))
+        log = MutationLog(self._path('log', new), self.batch_size)
+        if self._log is not None:
+            self._log.close()
+        self.generation = new
+        self._log = log
+        self._compact_at = self.compact_every
+        self.compaction_error = None
+        _fsync_directory(self.directory)
+        self._remove_old_generations()
+
+    def _remove_old_generations(self) -> None:
+        """Remove the snapshots and logs of the generations before the
+        current one, which a crash during compaction may have left behind.
+        """
+
+        for filename in os.listdir(self.directory):
+            match = GENERATION_FILE.match(filename)
+            if match and int(match.group(1)) < self.generation:
+                os.remove(os.path.join(self.directory, filename))
+
+    def close(self) -> None:
+        """Sync the log and close it.
+        """
+
+        self._log.close()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,4 +1,9 @@
-from typing import List, Tuple, Dict, TextIO
+import sys
+from itertools import chain
+from typing import List, Tuple, Dict, Set, TextIO, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from graph_stats import GraphStatistics
 
 
 P2F = {'Jay Pritchett': ['Claire Dunphy', 'Gloria Pritchett', 'Manny Delgado'],
@@ -32,22 +37,129 @@ def load_profiles(profiles_file: TextIO, person_to_friends: Dict[str, List[str]]
     Docstring examples not given since result depends on input data.
     """
 
-    current_line = profiles_file.readline()
-    next_line = profiles_file.readline()
-    name = convert_name(current_line.rstrip())
-    while next_line != '':
-        if ',' in next_line:
-            friend = convert_name(next_line.rstrip())
-            add_to_friends(name, friend, person_to_friends)
-            next_line = profiles_file.readline()
-        elif next_line != '\n':
-            network = next_line.rstrip()
-            add_to_network(name, network, person_to_networks)
-            next_line = profiles_file.readline()
+    _load_records(iter_profiles(profiles_file), person_to_friends, \
+                  person_to_networks, {}, {})
+
+
+def load_profiles_many(paths: List[str]) -> Tuple[Dict[str, List[str]], \
+                                                  Dict[str, List[str]]]:
+    """Return a new "person to friends" dictionary and a new "person to
+    networks" dictionary built from the profiles files at paths, in order.
+    The result is the same as calling load_profiles on each file in turn.
+
+    Docstring examples not given since result depends on input data.
+    """
+
+    person_to_friends = {}
+    person_to_networks = {}
+    seen_friends = {}
+    seen_networks = {}
+
+    for path in paths:
+        with open(path) as profiles_file:
+            _load_records(iter_profiles(profiles_file), person_to_friends, \
+                          person_to_networks, seen_friends, seen_networks)
+
+    return person_to_friends, person_to_networks
+
+
+def _load_records(records: Iterator[Tuple[str, List[str], List[str]]], \
+                  person_to_friends: Dict[str, List[str]], \
+                  person_to_networks: Dict[str, List[str]], \
+                  seen_friends: Dict[str, Set[str]], \
+                  seen_networks: Dict[str, Set[str]]) -> None:
+    """Fold the (name, friends, networks) records into person_to_friends and
+    person_to_networks, the way add_to_friends and add_to_network would.
+    """
+
+    for name, friends, networks in records:
+        if friends:
+            _merge_seen(name, friends, person_to_friends, seen_friends)
+        if networks:
+            _merge_seen(name, networks, person_to_networks, seen_networks)
+
+
+def _merge_seen(name: str, values: List[str], person_to_values: \
+                Dict[str, List[str]], seen: Dict[str, Set[str]]) -> None:
+    """Append the values not yet in person_to_values[name] to it, keeping the
+    order in which they first appear. seen[name] remembers the values of
+    person_to_values[name] so they are not searched for in the list.
+
+    >>> d = {'Jay Pritchett': ['Claire Dunphy']}
+    >>> _merge_seen('Jay Pritchett', ['Manny Delgado', 'Claire Dunphy'], d, {})
+    >>> d
+    {'Jay Pritchett': ['Claire Dunphy', 'Manny Delgado']}
+    """
+
+    if name not in person_to_values:
+        person_to_values[name] = values
+        seen[name] = set(values)
+    else:
+        if name not in seen:
+            seen[name] = set(person_to_values[name])
+        known = seen[name]
+        current = person_to_values[name]
+        for value in values:
+            if value not in known:
+                known.add(value)
+                current.append(value)
+
+
+def iter_profiles(profiles_file: TextIO, chunk_size: int = 1 << 20) -> \
+                  Iterator[Tuple[str, List[str], List[str]]]:
+    """Yield a (name, friends, networks) tuple for each profile in
+    profiles_file, reading it in chunks of chunk_size characters. Names are
+    converted with convert_name and interned, and the friends and networks of
+    a profile have no duplicates.
+
+    >>> import io
+    >>> f = io.StringIO('Pritchett, Jay\\nDunphy, Claire\\nChess Club\\n\\n\
+Dunphy, Phil\\nDunphy, Luke\\nDunphy, Luke\\n')
+    >>> list(iter_profiles(f, 8))
+    [('Jay Pritchett', ['Claire Dunphy'], ['Chess Club']), \
+('Phil Dunphy', ['Luke Dunphy'], [])]
+    """
+
+    intern = sys.intern
+    name = None
+    friends = []
+    networks = []
+    seen_friends = set()
+    seen_networks = set()
+    rest = ''
+
+    while True:
+        chunk = profiles_file.read(chunk_size)
+        if chunk == '':
+            lines = [rest] if rest != '' else []
         else:
-            current_line = profiles_file.readline()
-            next_line = profiles_file.readline()
-            name = convert_name(current_line.rstrip())
+            lines = (rest + chunk).split('\n')
+            rest = lines.pop()
+        for line in lines:
+            if name is None:
+                name = intern(convert_name(line.rstrip()))
+            elif ',' in line:
+                friend = intern(convert_name(line.rstrip()))
+                if friend not in seen_friends:
+                    seen_friends.add(friend)
+                    friends.append(friend)
+            elif line != '':
+                network = intern(line.rstrip())
+                if network not in seen_networks:
+                    seen_networks.add(network)
+                    networks.append(network)
+            else:
+                yield name, friends, networks
+                name = None
+                friends = []
+                networks = []
+                seen_friends = set()
+                seen_networks = set()
+        if chunk == '':
+            break
+
+    if name is not None:
+        yield name, friends, networks
 
 
 def add_to_friends(name: str, friend: str, person_to_friends: \
@@ -105,6 +217,46 @@ def add_to_network(name: str, network: str, person_to_networks: \
             person_to_networks[name].append(network)
 
 
+def remove_from_friends(name: str, friend: str, person_to_friends: \
+                        Dict[str, List[str]]) -> None:
+    """Remove friend from the values of name in person_to_friends. name is
+    removed from person_to_friends when they have no friends left.
+
+    >>> d = {'Jay Pritchett': ['Claire Dunphy', 'Manny Delgado']}
+    >>> remove_from_friends('Jay Pritchett', 'Claire Dunphy', d)
+    >>> d
+    {'Jay Pritchett': ['Manny Delgado']}
+    >>> remove_from_friends('Jay Pritchett', 'Manny Delgado', d)
+    >>> d
+    {}
+    """
+
+    if name in person_to_friends and friend in person_to_friends[name]:
+        person_to_friends[name].remove(friend)
+        if person_to_friends[name] == []:
+            del person_to_friends[name]
+
+
+def remove_from_network(name: str, network: str, person_to_networks: \
+                        Dict[str, List[str]]) -> None:
+    """Remove network from the values of name in person_to_networks. name is
+    removed from person_to_networks when they have no networks left.
+
+    >>> d = {'Alex Dunphy': ['Chess Club', 'Orchestra']}
+    >>> remove_from_network('Alex Dunphy', 'Orchestra', d)
+    >>> d
+    {'Alex Dunphy': ['Chess Club']}
+    >>> remove_from_network('Alex Dunphy', 'Chess Club', d)
+    >>> d
+    {}
+    """
+
+    if name in person_to_networks and network in person_to_networks[name]:
+        person_to_networks[name].remove(network)
+        if person_to_networks[name] == []:
+            del person_to_networks[name]
+
+
 def convert_name(name: str) -> str:
     """Convert name to the format 'FirstName LastName'.
 
@@ -121,9 +273,12 @@ def convert_name(name: str) -> str:
     return full_name
 
 
-def get_average_friend_count(person_to_friends: Dict[str, List[str]]) -> float:
+def get_average_friend_count(person_to_friends: Dict[str, List[str]], \
+                             statistics: 'GraphStatistics' = None) -> float:
     """Return the average number of friends that people who appear as keys in
-    person_to_friends have.
+    person_to_friends have. If statistics, a GraphStatistics (see
+    graph_stats.py) kept up to date with person_to_friends, is given, the
+    average is read from its counters instead of walking person_to_friends.
 
     >>> get_average_friend_count({'Meredith Shepherd-Grey': ['Derek Shepherd-Grey'], \
 'Amelia Hunt': ['Derek Shepherd-Grey', 'Alex Michael Karev', 'Owen Hunt'], \
@@ -133,6 +288,9 @@ def get_average_friend_count(person_to_friends: Dict[str, List[str]]) -> float:
     0
     """
 
+    if statistics is not None:
+        return statistics.get_average_friend_count()
+
     total = 0
     count = 0
     size = len(person_to_friends)
@@ -159,23 +317,14 @@ def get_families(person_to_friends: Dict[str, List[str]]) -> Dict[str, List[str]
     """
 
     family = {}
+    seen = set()
 
     for key in person_to_friends:
-        last_name = get_last_name(key)
-        first_name = get_first_name(key)
-        if last_name not in family:
-            family[last_name] = [first_name]
-        else:
-            if first_name not in family[last_name]:
-                family[last_name].append(first_name)
-        for value in person_to_friends[key]:
-            family_name = get_last_name(value)
-            given_name = get_first_name(value)
-            if family_name not in family:
-                family[family_name] = [given_name]
-            else:
-                if given_name not in family[family_name]:
-                    family[family_name].append(given_name)
+        for name in chain((key,), person_to_friends[key]):
+            if name not in seen:
+                seen.add(name)
+                family.setdefault(get_last_name(name), []).append( \
+                    get_first_name(name))
 
     return sort_dict_values(family)
 
@@ -646,8 +795,9 @@ def scoring(person1: str, person2: str, person_to_friends: Dict[str, List[str]],
 
     score += get_mutual_friend_score(person1, person2, person_to_friends)
     score += get_mutual_network_score(person1, person2, person_to_networks)
-    score += get_mutual_family_score(person1, person2, person_to_friends, \
-                                     person_to_networks)
+    # The family bonus of get_mutual_family_score, without rescoring the pair.
+    if score >= 1 and get_last_name(person1) == get_last_name(person2):
+        score += 1
 
     return score
 
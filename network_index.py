@@ -0,0 +1,163 @@
+import random
+from typing import List, Tuple, Dict, Set
+from network_functions import invert_network, P2N
+
+
+class NetworkIndex:
+    """An inverted index of person_to_networks, built with invert_network and
+    kept up to date with add_member and remove_member, that gives the number
+    of networks a person shares with each of their co-members in one pass
+    over the members of their networks.
+
+    Networks with more than max_expansion members (if it is given) are not
+    expanded in full: only max_expansion of their members, picked at random
+    with a fixed seed, become candidates. The counts returned for candidates
+    are still exact, but the candidates may miss some co-members, which the
+    exactness flag of co_member_counts reports.
+
+    >>> index = NetworkIndex(P2N)
+    >>> index.co_member_counts('Claire Dunphy')
+    ({'Claire Dunphy': 1, 'Gloria Pritchett': 1}, True)
+    >>> index.shared_count('Alex Dunphy', 'Manny Delgado')
+    1
+    """
+
+    def __init__(self, person_to_networks: Dict[str, List[str]], \
+                 max_expansion: int = None, seed: int = 0) -> None:
+        """Index person_to_networks, which the index reads the networks of
+        each person from.
+        """
+
+        self.person_to_networks = person_to_networks
+        self.max_expansion = max_expansion
+        self.seed = seed
+        self._members = invert_network(person_to_networks)
+        self._member_sets = {network: set(members) for network, members \
+                             in self._members.items()}
+        self._samples = {}
+
+    def members(self, network: str) -> List[str]:
+        """Return the members of network, in the order invert_network gives
+        them. The list must not be modified.
+
+        >>> NetworkIndex(P2N).members('Chess Club')
+        ['Manny Delgado', 'Alex Dunphy']
+        """
+
+        return self._members.get(network, [])
+
+    def size(self, network: str) -> int:
+        """Return the number of members of network.
+        """
+
+        return len(self._members.get(network, []))
+
+    def add_member(self, network: str, name: str) -> None:
+        """Add name to the members of network, if they are not already one.
+        """
+
+        members = self._member_sets.setdefault(network, set())
+        if name not in members:
+            members.add(name)
+            self._members.setdefault(network, []).append(name)
+            self._samples.pop(network, None)
+
+    def remove_member(self, network: str, name: str) -> None:
+        """Remove name from the members of network, if they are one.
+        """
+
+        members = self._member_sets.get(network, set())
+        if name in members:
+            members.discard(name)
+            self._members[network].remove(name)
+            self._samples.pop(network, None)
+            if not members:
+                del self._members[network]
+                del self._member_sets[network]
+
+    def is_capped(self, network: str) -> bool:
+        """Return whether network is too large to be expanded in full.
+        """
+
+        return self.max_expansion is not None and \
+            self.size(network) > self.max_expansion
+
+    def is_exact(self, person: str) -> bool:
+        """Return whether co_member_counts(person) finds all the co-members of
+        person.
+        """
+
+        return not any(self.is_capped(network) for network in \
+                       self.person_to_networks.get(person, []))
+
+    def _sample(self, network: str) -> List[str]:
+        """Return the max_expansion members of the capped network that stand
+        for all of them, picked once per change of its members.
+        """
+
+        if network not in self._samples:
+            rng = random.Random('{}:{}'.format(self.seed, network))
+            self._samples[network] = rng.sample(self._members[network], \
+                                                self.max_expansion)
+        return self._samples[network]
+
+    def co_members(self, person: str) -> Set[str]:
+        """Return everyone who shares a network with person, person included
+        if they are in a network. Networks are always expanded in full.
+
+        >>> sorted(NetworkIndex(P2N, max_expansion=1).co_members('Alex Dunphy'))
+        ['Alex Dunphy', 'Manny Delgado']
+        """
+
+        people = set()
+        for network in self.person_to_networks.get(person, []):
+            people.update(self._members.get(network, []))
+        return people
+
+    def shared_count(self, person: str, other: str) -> int:
+        """Return the number of networks that person and other are both in.
+        """
+
+        count = 0
+        for network in self.person_to_networks.get(person, []):
+            if other in self._member_sets.get(network, set()):
+                count += 1
+        return count
+
+    def co_member_counts(self, person: str) -> Tuple[Dict[str, int], bool]:
+        """Return a dictionary of the number of networks each co-member of
+        person shares with them (person included), and whether every
+        co-member is in it. Only a sample of the members of capped networks
+        is looked at, but the counts of the co-members found are exact.
+
+        >>> index = NetworkIndex({'A B': ['X', 'Y'], 'C D': ['X'], \
+'E F': ['X', 'Y']}, max_expansion=2)
+        >>> index.co_member_counts('A B')
+        ({'A B': 2, 'E F': 2}, False)
+        """
+
+        counts = {}
+        capped = []
+
+        for network in self.person_to_networks.get(person, []):
+            if self.is_capped(network):
+                capped.append(network)
+            else:
+                for member in self._members.get(network, []):
+                    counts[member] = counts.get(member, 0) + 1
+
+        if capped:
+            for network in capped:
+                for member in self._sample(network):
+                    counts.setdefault(member, 0)
+            for member in counts:
+                for network in capped:
+                    if member in self._member_sets[network]:
+                        counts[member] += 1
+
+        return counts, not capped
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,134 @@
+import io
+import os
+import re
+import sys
+from multiprocessing import Pool
+from typing import List, Tuple, Dict, Set
+from network_functions import iter_profiles, _load_records, _merge_seen
+
+# A non-empty line followed by an empty one. The empty line ends the profile
+# the non-empty line belongs to, so a shard can start right after it.
+BOUNDARY = re.compile(rb'[^\r\n]\r?\n\r?\n')
+
+# A (path, start, end) byte range of a profiles file.
+Shard = Tuple[str, int, int]
+
+
+def find_boundary(profiles_file: io.BufferedIOBase, offset: int, \
+                  block_size: int = 1 << 16) -> int:
+    """Return the offset of the first profile that starts after a blank line
+    at or after offset in the binary profiles_file, or the size of the file if
+    there is none.
+
+    >>> f = io.BytesIO(b'Pritchett, Jay\\nDunphy, Claire\\n\\nDunphy, Phil\\n')
+    >>> find_boundary(f, 0), find_boundary(f, 31)
+    (31, 44)
+    """
+
+    profiles_file.seek(offset)
+    data = b''
+    while True:
+        block = profiles_file.read(block_size)
+        data += block
+        match = BOUNDARY.search(data)
+        if match is not None:
+            return offset + match.end()
+        if block == b'':
+            return offset + len(data)
+        # Keep enough of the end of the data for a match across blocks.
+        offset += len(data) - 4
+        data = data[-4:]
+
+
+def find_shards(path: str, shard_bytes: int) -> List[Shard]:
+    """Return the shards of about shard_bytes bytes the profiles file at path
+    splits into, cut only where a profile ends with a blank line.
+    """
+
+    size = os.path.getsize(path)
+    shards = []
+    start = 0
+    with open(path, 'rb') as profiles_file:
+        while start < size:
+            end = size if start + shard_bytes >= size else \
+                find_boundary(profiles_file, start + shard_bytes - 1)
+            shards.append((path, start, end))
+            start = end
+    return shards
+
+
+def _load_shard(shard: Shard) -> Tuple[Dict[str, List[str]], \
+                                       Dict[str, List[str]]]:
+    """Return the "person to friends" and "person to networks" dictionaries
+    that load_profiles builds from the shard alone.
+    """
+
+    path, start, end = shard
+    with open(path, 'rb') as profiles_file:
+        profiles_file.seek(start)
+        data = profiles_file.read(end - start)
+
+    # Decoded the way open(path) would, newlines included.
+    profiles_file = io.TextIOWrapper(io.BytesIO(data))
+    person_to_friends = {}
+    person_to_networks = {}
+    _load_records(iter_profiles(profiles_file), person_to_friends, \
+                  person_to_networks, {}, {})
+    return person_to_friends, person_to_networks
+
+
+def _merge_partial(partial: Dict[str, List[str]], \
+                   person_to_values: Dict[str, List[str]], \
+                   seen: Dict[str, Set[str]]) -> None:
+    """Merge the dictionary of a shard into person_to_values, as if its
+    profiles were loaded after the ones already in it.
+    """
+
+    intern = sys.intern
+    for name, values in partial.items():
+        _merge_seen(intern(name), [intern(value) for value in values], \
+                    person_to_values, seen)
+
+
+def load_profiles_parallel(paths: List[str], processes: int = None, \
+                           shard_bytes: int = 1 << 26) -> \
+                           Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Return the same dictionaries as load_profiles_many(paths), parsing the
+    files in parallel with processes worker processes (one per CPU by
+    default).
+
+    Each file is split into shards of about shard_bytes bytes at profile
+    boundaries, each shard is loaded into its own dictionaries by a worker,
+    and the dictionaries are merged in file and shard order. Since every
+    shard keeps the order in which people, friends and networks first appear
+    in it, the merged dictionaries have the same order as sequential loading.
+
+    Docstring examples not given since result depends on input data.
+    """
+
+    shards = []
+    for path in paths:
+        shards.extend(find_shards(path, shard_bytes))
+
+    person_to_friends = {}
+    person_to_networks = {}
+    seen_friends = {}
+    seen_networks = {}
+
+    def merge(results):
+        for partial_friends, partial_networks in results:
+            _merge_partial(partial_friends, person_to_friends, seen_friends)
+            _merge_partial(partial_networks, person_to_networks, seen_networks)
+
+    if processes == 1 or len(shards) <= 1:
+        merge(map(_load_shard, shards))
+    else:
+        with Pool(processes) as pool:
+            merge(pool.imap(_load_shard, shards))
+
+    return person_to_friends, person_to_networks
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,84 @@
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple, Iterator, Sequence
+from batch_scoring import BatchScorer
+from graph_store import GraphStore, layout_tables, write_tables, read_tables
+
+# The scorer of a worker process and the shared memory block its tables live
+# in, set up by _attach_worker.
+_worker_scorer = None
+_worker_memory = None
+
+
+def share_tables(tables: List[Sequence]) -> Tuple[SharedMemory, \
+                                                  List[Tuple[str, int, int]]]:
+    """Return a new shared memory block holding a copy of tables, and the
+    layout of the tables in it. The caller must close and unlink the block.
+    """
+
+    layout, size = layout_tables(tables)
+    memory = SharedMemory(create=True, size=max(size, 1))
+    write_tables(memory.buf, tables, layout)
+    return memory, layout
+
+
+def _attach_worker(memory_name: str, layout: List[Tuple[str, int, int]]) \
+                   -> None:
+    """Attach this worker process to the shared memory block memory_name and
+    build its scorer over the tables in it, without copying them.
+    """
+
+    global _worker_scorer, _worker_memory
+
+    _worker_memory = SharedMemory(name=memory_name)
+    tables = read_tables(_worker_memory.buf, layout)
+    store = GraphStore.from_tables(tables[:GraphStore.TABLE_COUNT])
+    _worker_scorer = BatchScorer(store, tables[GraphStore.TABLE_COUNT:])
+
+
+def _recommend_shard(people: List[str]) -> List[List[Tuple[str, int]]]:
+    """Return the recommendations of each person in people, using the scorer
+    of this worker.
+    """
+
+    return [_worker_scorer.make_recommendations(person) for person in people]
+
+
+def run_recommendations(people: List[str], store: GraphStore, \
+                        processes: int = None, shard_size: int = 256) -> \
+                        Iterator[Tuple[str, List[Tuple[str, int]]]]:
+    """Yield (person, recommendations) for each person in people, in order,
+    where recommendations is the list make_recommendations returns for them.
+
+    people is split into shards of shard_size people that are scored by a
+    pool of processes worker processes (one per CPU by default). The workers
+    read the graph from one shared memory block instead of receiving a copy.
+
+    >>> from network_functions import P2F, P2N
+    >>> store = GraphStore.from_dicts(P2F, P2N)
+    >>> results = run_recommendations(['Jay Pritchett', 'Alex Dunphy'], store, 2)
+    >>> list(results)[1]
+    ('Alex Dunphy', [('Manny Delgado', 2), ('Phil Dunphy', 2), \
+('Mitchell Pritchett', 1)])
+    """
+
+    scorer = BatchScorer(store)
+    memory, layout = share_tables(store.tables() + scorer.tables())
+    shards = [people[i:i + shard_size] \
+              for i in range(0, len(people), shard_size)]
+
+    try:
+        with Pool(processes, initializer=_attach_worker, \
+                  initargs=(memory.name, layout)) as pool:
+            results = pool.imap(_recommend_shard, shards)
+            for shard, recommendations in zip(shards, results):
+                for person, recommended in zip(shard, recommendations):
+                    yield person, recommended
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
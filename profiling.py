@@ -0,0 +1,290 @@
+import functools
+import inspect
+import json
+import math
+import time
+from typing import Callable, List, Dict, TextIO
+import network_functions
+from batch_scoring import BatchScorer
+from incremental_engine import IncrementalRecommendationEngine
+from recommendation_engine import RecommendationEngine
+
+# (owner, attribute, stage, counter, measure, person argument name): calls
+# to owner.attribute are timed as stage, and when counter is not None,
+# measure(result) is added to it. A call that is not made from inside another
+# instrumented call is a query, whose person is the argument with that name.
+INSTRUMENTED = []
+
+
+def instrument(owner: object, attribute: str, stage: str, counter: str = None, \
+               measure: Callable[[object], int] = len, person: str = None) \
+               -> None:
+    """Register owner.attribute (a module function or a method defined on
+    the class owner) to be timed as stage while a Profiler is active. See
+    INSTRUMENTED for the other arguments.
+    """
+
+    INSTRUMENTED.append((owner, attribute, stage, counter, measure, person))
+
+
+for _name in ['mutual_friend_type_1', 'mutual_friend_type_2', \
+              'mutual_friend_type_3']:
+    instrument(network_functions, _name, _name, _name, bool)
+instrument(network_functions, 'make_recommendations', 'sort', \
+           'recommendations', person='person')
+instrument(network_functions, 'get_list', 'get_list', 'scored', person='person')
+instrument(network_functions, 'potential_friends', 'potential_friends', \
+           'candidates', person='person')
+instrument(network_functions, 'scoring', 'scoring', person='person1')
+instrument(network_functions, 'get_mutual_friend_score', \
+           'get_mutual_friend_score', person='person1')
+instrument(network_functions, 'get_mutual_network_score', \
+           'get_mutual_network_score', 'network_matches', bool, \
+           person='person1')
+instrument(network_functions, 'get_mutual_family_score', \
+           'get_mutual_family_score', 'family_matches', bool, \
+           person='person1')
+instrument(network_functions, 'get_max_score', 'sort')
+instrument(network_functions, 'match_score_with_name', 'sort')
+
+for _engine in [RecommendationEngine, IncrementalRecommendationEngine]:
+    instrument(_engine, 'get_mutual_friend_scores', \
+               'get_mutual_friend_scores', 'friend_candidates', \
+               person='person')
+    instrument(_engine, 'get_mutual_network_scores', \
+               'get_mutual_network_scores', 'network_candidates', \
+               person='person')
+instrument(RecommendationEngine, 'get_partial_scores', 'get_partial_scores', \
+           'candidates', person='person')
+instrument(RecommendationEngine, 'get_scores', 'get_scores', person='person')
+instrument(RecommendationEngine, 'make_recommendations', 'sort', \
+           'recommendations', person='person')
+instrument(RecommendationEngine, 'make_top_recommendations', 'top_k', \
+           'recommendations', person='person')
+instrument(BatchScorer, 'get_scores', 'BatchScorer.get_scores', 'candidates', \
+           person='person_id')
+instrument(BatchScorer, 'make_recommendations', 'sort', 'recommendations', \
+           person='person')
+
+
+class Histogram:
+    """Counts of non-negative values in power-of-two buckets. The bucket with
+    upper bound 2 ** e holds the values in [2 ** (e - 1), 2 ** e), and the
+    bucket 0 holds the zeros.
+
+    >>> histogram = Histogram()
+    >>> for value in [0, 1, 3, 3.5, 100]:
+    ...     histogram.add(value)
+    >>> histogram.counts
+    {0: 1, 2: 1, 4: 2, 128: 1}
+    >>> histogram.count, histogram.total, histogram.max
+    (5, 107.5, 100)
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram.
+        """
+
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value: float) -> None:
+        """Count value.
+        """
+
+        bound = 2 ** math.frexp(value)[1] if value > 0 else 0
+        self.counts[bound] = self.counts.get(bound, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return the histogram as a JSON-serializable dictionary.
+        """
+
+        return {'count': self.count, 'total': self.total, 'max': self.max,
+                'buckets': {str(bound): self.counts[bound] \
+                            for bound in sorted(self.counts)}}
+
+
+class Profiler:
+    """A context manager that times the scoring stages of the reference
+    make_recommendations (calls through the network_functions module),
+    RecommendationEngine and BatchScorer while it is active.
+
+    Entering it replaces the functions registered in INSTRUMENTED by timing
+    wrappers, and leaving it puts the originals back, so nothing is measured
+    and nothing is slowed down outside of it. It is not thread-safe.
+
+    Each query (an instrumented call made outside of any other) gives a trace
+    with the time spent in each stage, excluding the time spent in the stages
+    it called, and the counters of the query, such as its number of
+    candidates. A query that raises still gives a trace, with 'failed' set,
+    up to where it stopped. Traces are passed to callback, kept in traces if
+    keep_traces is true, and summed into per-stage totals and histograms.
+
+    >>> with Profiler() as profiler:
+    ...     recommendations = network_functions.make_recommendations( \
+'Jay Pritchett', network_functions.P2F, network_functions.P2N)
+    >>> trace = profiler.traces[0]
+    >>> trace['query'], trace['person'], trace['counters']['candidates']
+    ('make_recommendations', 'Jay Pritchett', 9)
+    >>> trace['counters']['recommendations'], trace['stages']['scoring']['calls']
+    (4, 13)
+    """
+
+    def __init__(self, callback: Callable[[Dict[str, object]], None] = None, \
+                 keep_traces: bool = True) -> None:
+        """Initialize a profiler passing each finished trace to callback.
+        """
+
+        self.callback = callback
+        self.keep_traces = keep_traces
+        self.traces = []
+        self.queries = 0
+        self.failed = 0
+        self.stages = {}
+        self.counters = {}
+        self.histograms = {}
+        self._stack = []
+        self._trace = None
+        self._saved = []
+
+    def __enter__(self) -> 'Profiler':
+        for owner, attribute, stage, counter, measure, person in INSTRUMENTED:
+            original = vars(owner)[attribute]
+            self._saved.append((owner, attribute, original))
+            setattr(owner, attribute, self._wrap(original, stage, counter, \
+                                                 measure, person))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for owner, attribute, original in reversed(self._saved):
+            setattr(owner, attribute, original)
+        self._saved = []
+
+    def _wrap(self, function: Callable, stage: str, counter: str, \
+              measure: Callable[[object], int], person: str) -> Callable:
+        """Return a wrapper of function timing its calls as stage.
+        """
+
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self._stack:
+                name = None
+                if person is not None:
+                    arguments = signature.bind(*args, **kwargs).arguments
+                    name = arguments.get(person)
+                self._start_trace(function.__qualname__, name)
+            frame = [0.0]
+            self._stack.append(frame)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+            finally:
+                elapsed = time.perf_counter() - start
+                self._stack.pop()
+                self._add_stage(stage, elapsed - frame[0])
+                if self._stack:
+                    self._stack[-1][0] += elapsed
+                else:
+                    self._trace['seconds'] = elapsed
+                    if failed:
+                        self._trace['failed'] = True
+                        self._finish_trace()
+            if counter is not None:
+                self._add_counter(counter, measure(result))
+            if not self._stack:
+                self._finish_trace()
+            return result
+
+        return wrapper
+
+    def _start_trace(self, query: str, person: str) -> None:
+        self._trace = {'query': query, 'person': person, 'seconds': 0.0,
+                       'failed': False, 'stages': {}, 'counters': {}}
+
+    def _add_stage(self, stage: str, seconds: float) -> None:
+        stages = self._trace['stages']
+        if stage not in stages:
+            stages[stage] = {'calls': 0, 'seconds': 0.0}
+        stages[stage]['calls'] += 1
+        stages[stage]['seconds'] += seconds
+
+    def _add_counter(self, counter: str, value: int) -> None:
+        counters = self._trace['counters']
+        counters[counter] = counters.get(counter, 0) + value
+
+    def _finish_trace(self) -> None:
+        trace, self._trace = self._trace, None
+        self.queries += 1
+        if trace['failed']:
+            self.failed += 1
+
+        self._histogram('query_us').add(trace['seconds'] * 1e6)
+        for stage, totals in trace['stages'].items():
+            if stage not in self.stages:
+                self.stages[stage] = {'calls': 0, 'seconds': 0.0}
+            self.stages[stage]['calls'] += totals['calls']
+            self.stages[stage]['seconds'] += totals['seconds']
+            self._histogram(stage + '_us').add(totals['seconds'] * 1e6)
+        for counter, value in trace['counters'].items():
+            self.counters[counter] = self.counters.get(counter, 0) + value
+            self._histogram(counter).add(value)
+
+        if self.keep_traces:
+            self.traces.append(trace)
+        if self.callback is not None:
+            self.callback(trace)
+
+    def _histogram(self, name: str) -> Histogram:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def summary(self) -> Dict[str, object]:
+        """Return the totals over all queries as a JSON-serializable
+        dictionary: the number of queries and of failed ones, the calls and
+        seconds of each stage, the counters, and histograms of the per-query
+        stage times (in microseconds, named after the stage with a '_us'
+        suffix, and 'query_us' for the whole query) and counters.
+        """
+
+        return {'queries': self.queries,
+                'failed': self.failed,
+                'stages': self.stages,
+                'counters': self.counters,
+                'histograms': {name: self.histograms[name].to_dict() \
+                               for name in sorted(self.histograms)}}
+
+    def dump_traces(self, trace_file: TextIO) -> None:
+        """Write the kept traces to trace_file, one JSON object per line.
+        """
+
+        for trace in self.traces:
+            trace_file.write(json.dumps(trace) + '\n')
+
+    def format_stages(self) -> List[str]:
+        """Return one line per stage with its share of the total time, from
+        the slowest stage down.
+        """
+
+        total = sum(totals['seconds'] for totals in self.stages.values())
+        lines = []
+        for stage, totals in sorted(self.stages.items(), \
+                                    key=lambda t: -t[1]['seconds']):
+            share = totals['seconds'] / total if total > 0 else 0.0
+            lines.append('{:<28} {:>9} calls {:>10.6f}s {:>6.1%}'.format( \
+                stage, totals['calls'], totals['seconds'], share))
+        return lines
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
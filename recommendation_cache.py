@@ -0,0 +1,141 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import List, Tuple, Callable, Iterable
+from recommendation_engine import RecommendationEngine
+from network_functions import P2F, P2N
+
+
+def estimate_size(recommendations: List[Tuple[str, int]]) -> int:
+    """Return an estimate of the number of bytes a cached list of
+    recommendations takes, not counting the names, which are shared with the
+    graph.
+
+    >>> estimate_size([]) < estimate_size([('Luke Dunphy', 1)])
+    True
+    """
+
+    return sys.getsizeof(recommendations) + \
+        len(recommendations) * sys.getsizeof(('', 0))
+
+
+class RecommendationCache:
+    """An LRU cache of the recommendations of a RecommendationEngine. Entries
+    expire ttl seconds after they are computed, and the least recently used
+    entries are evicted when there are more than max_entries of them or they
+    take more than max_bytes.
+
+    Changes to the graph must go through add_to_friends, add_to_network,
+    remove_from_friends and remove_from_network so that the entries of the
+    people they can affect are evicted.
+
+    >>> cache = RecommendationCache(RecommendationEngine(P2F, P2N))
+    >>> cache.make_recommendations('Alex Dunphy')
+    [('Manny Delgado', 2), ('Phil Dunphy', 2), ('Mitchell Pritchett', 1)]
+    >>> cache.add_to_network('Phil Dunphy', 'Chess Club')
+    >>> cache.make_recommendations('Alex Dunphy')
+    [('Phil Dunphy', 3), ('Manny Delgado', 2), ('Mitchell Pritchett', 1)]
+    """
+
+    def __init__(self, engine: RecommendationEngine, max_entries: int = 4096, \
+                 ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024, \
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize an empty cache of the recommendations of engine.
+        """
+
+        self.engine = engine
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, person: str) -> bool:
+        return person in self._entries
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return the recommendations of the engine for person, from the cache
+        if they are there and have not expired.
+        """
+
+        now = self._clock()
+        entry = self._entries.get(person)
+        if entry is not None:
+            expires, size, recommendations = entry
+            if now < expires:
+                self._entries.move_to_end(person)
+                self.hits += 1
+                return recommendations
+            self._evict(person)
+
+        self.misses += 1
+        recommendations = self.engine.make_recommendations(person)
+        size = estimate_size(recommendations)
+        self._entries[person] = (now + self.ttl, size, recommendations)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or \
+                                 self._bytes > self.max_bytes):
+            self._evict(next(iter(self._entries)))
+        return recommendations
+
+    def invalidate(self, people: Iterable[str]) -> None:
+        """Evict the entries of people.
+        """
+
+        for person in people:
+            if person in self._entries:
+                self._evict(person)
+
+    def clear(self) -> None:
+        """Evict every entry.
+        """
+
+        self._entries.clear()
+        self._bytes = 0
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend to the friends of name in the engine, and evict the
+        entries of the people this can affect.
+        """
+
+        self.engine.add_to_friends(name, friend)
+        self.invalidate(self.engine.affected_by_friend(name, friend))
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Add network to the networks of name in the engine, and evict the
+        entries of the people this can affect.
+        """
+
+        self.engine.add_to_network(name, network)
+        self.invalidate(self.engine.affected_by_network(name, network))
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the friends of name in the engine, and evict the
+        entries of the people this can affect.
+        """
+
+        self.invalidate(self.engine.affected_by_friend(name, friend))
+        self.engine.remove_from_friends(name, friend)
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Remove network from the networks of name in the engine, and evict
+        the entries of the people this can affect.
+        """
+
+        self.invalidate(self.engine.affected_by_network(name, network))
+        self.engine.remove_from_network(name, network)
+
+    def _evict(self, person: str) -> None:
+        expires, size, recommendations = self._entries.pop(person)
+        self._bytes -= size
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,360 @@
+import heapq
+from typing import List, Tuple, Dict, Set
+from family_index import FamilyIndex
+from network_functions import add_to_friends, add_to_network, \
+    remove_from_friends, remove_from_network, P2F, P2N
+from network_index import NetworkIndex
+from symmetric_graph import SymmetricGraph
+
+
+class RecommendationEngine:
+    """A friend recommender built on set-based indexes of person_to_friends
+    and person_to_networks. The indexes are built once, so each query only
+    scores the people within two friendship hops of the person and the
+    members of the person's networks, instead of everyone in the graph.
+
+    The recommendations are the same as the ones make_recommendations gives,
+    unless max_network_expansion is given: then networks with more members
+    than that only contribute a sample of their members as candidates (see
+    NetworkIndex), and is_exact tells whose recommendations may miss some.
+
+    >>> engine = RecommendationEngine(P2F, P2N)
+    >>> engine.make_recommendations('Jay Pritchett')
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1), ('Luke Dunphy', 1), \
+('Phil Dunphy', 1)]
+    >>> engine.make_recommendations('Claire Dunphy')
+    [('Luke Dunphy', 3), ('Gloria Pritchett', 2), ('Cameron Tucker', 1), \
+('Manny Delgado', 1)]
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]], \
+                 max_network_expansion: int = None) -> None:
+        """Index person_to_friends and person_to_networks.
+        """
+
+        self.person_to_friends = person_to_friends
+        self.person_to_networks = person_to_networks
+        self._graph = SymmetricGraph(person_to_friends)
+        self._friends = self._graph.forward
+        self._listed_by = self._graph.reverse
+        self._people = set(self._friends) | set(self._listed_by)
+
+        self._networks = NetworkIndex(person_to_networks, max_network_expansion)
+        self._families = FamilyIndex(person_to_friends)
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend as a value to name in person_to_friends and keep the
+        indexes up to date.
+
+        >>> engine = RecommendationEngine({'Jay Pritchett': ['Claire Dunphy']}, {})
+        >>> engine.add_to_friends('Claire Dunphy', 'Phil Dunphy')
+        >>> engine.person_to_friends['Claire Dunphy']
+        ['Phil Dunphy']
+        """
+
+        add_to_friends(name, friend, self.person_to_friends)
+        self._graph.add_edge(name, friend)
+        self._people.add(name)
+        self._people.add(friend)
+        self._families.add_person(name)
+        self._families.add_person(friend)
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Add network as a value to name in person_to_networks and keep the
+        indexes up to date.
+
+        >>> engine = RecommendationEngine({}, {})
+        >>> engine.add_to_network('Alex Dunphy', 'Chess Club')
+        >>> engine.get_mutual_network_scores('Alex Dunphy')
+        {'Alex Dunphy': 1}
+        """
+
+        self._networks.add_member(network, name)
+        add_to_network(name, network, self.person_to_networks)
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the values of name in person_to_friends and keep
+        the indexes up to date.
+
+        >>> engine = RecommendationEngine({'Jay Pritchett': ['Claire Dunphy']}, {})
+        >>> engine.remove_from_friends('Jay Pritchett', 'Claire Dunphy')
+        >>> engine.person_to_friends, engine.make_recommendations('Jay Pritchett')
+        ({}, [])
+        """
+
+        remove_from_friends(name, friend, self.person_to_friends)
+        self._graph.remove_edge(name, friend)
+        for person in [name, friend]:
+            if person not in self._friends and person not in self._listed_by:
+                self._people.discard(person)
+                self._families.remove_person(person)
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Remove network from the values of name in person_to_networks and
+        keep the indexes up to date.
+
+        >>> engine = RecommendationEngine(P2F, {'Alex Dunphy': ['Chess Club']})
+        >>> engine.remove_from_network('Alex Dunphy', 'Chess Club')
+        >>> engine.get_mutual_network_scores('Alex Dunphy')
+        {}
+        """
+
+        self._networks.remove_member(network, name)
+        remove_from_network(name, network, self.person_to_networks)
+
+    def get_neighbours(self, person: str) -> Set[str]:
+        """Return the people person lists as friends and the people who list
+        person as a friend.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> sorted(engine.get_neighbours('Alex Dunphy'))
+        ['Luke Dunphy']
+        """
+
+        return self._friends.get(person, set()) | \
+            self._listed_by.get(person, set())
+
+    def get_co_members(self, person: str) -> Set[str]:
+        """Return the people who share a network with person.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> sorted(engine.get_co_members('Claire Dunphy'))
+        ['Claire Dunphy', 'Gloria Pritchett']
+        """
+
+        return self._networks.co_members(person)
+
+    def affected_by_friend(self, name: str, friend: str) -> Set[str]:
+        """Return the people whose recommendations can change when friend is
+        added to or removed from the friends of name: everyone within two
+        friendship hops (in either direction) of name or friend, plus the
+        people sharing a network with name or friend if that change takes them
+        in or out of the friendship graph. It must be called while friend is
+        one of the friends of name, so after adding or before removing.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> sorted(engine.affected_by_friend('Dylan D-Money', 'Chairman D-Cat'))
+        ['Chairman D-Cat', 'Dylan D-Money', 'Gilbert D-Cat', \
+'Haley Gwendolyn Dunphy']
+        """
+
+        affected = {name, friend}
+        for person in [name, friend]:
+            neighbours = self.get_neighbours(person)
+            affected.update(neighbours)
+            for neighbour in neighbours:
+                affected.update(self.get_neighbours(neighbour))
+            if not neighbours - {name, friend}:
+                affected.update(self.get_co_members(person))
+        return affected
+
+    def affected_by_network(self, name: str, network: str) -> Set[str]:
+        """Return the people whose recommendations can change when name joins
+        or leaves network: name and the members of network. It must be called
+        while name is a member, so after joining or before leaving.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> sorted(engine.affected_by_network('Luke Dunphy', 'Chess Club'))
+        ['Alex Dunphy', 'Luke Dunphy', 'Manny Delgado']
+        """
+
+        affected = set(self._networks.members(network))
+        affected.add(name)
+        return affected
+
+    def get_mutual_friend_scores(self, person: str) -> Dict[str, int]:
+        """Return a dictionary of the non-zero get_mutual_friend_score of every
+        person with respect to person, or an empty dictionary if person is
+        not a key of person_to_friends.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> engine.get_mutual_friend_scores('Haley Gwendolyn Dunphy')['Chairman D-Cat']
+        1
+        """
+
+        if person not in self._friends:
+            return {}
+        return self._graph.get_mutual_friend_scores(person)
+
+    def get_mutual_network_scores(self, person: str) -> Dict[str, int]:
+        """Return a dictionary of the non-zero get_mutual_network_score of
+        every person with respect to person, leaving out some people when
+        is_exact(person) is false.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> engine.get_mutual_network_scores('Claire Dunphy')
+        {'Claire Dunphy': 1, 'Gloria Pritchett': 1}
+        """
+
+        return self._networks.co_member_counts(person)[0]
+
+    def is_exact(self, person: str) -> bool:
+        """Return whether the recommendations for person are the same as the
+        ones make_recommendations gives, which is false when one of their
+        networks is too large to be expanded in full.
+
+        >>> engine = RecommendationEngine(P2F, P2N, max_network_expansion=1)
+        >>> engine.is_exact('Alex Dunphy'), engine.is_exact('Phil Dunphy')
+        (False, True)
+        """
+
+        return self._networks.is_exact(person)
+
+    def get_partial_scores(self, person: str) -> Dict[str, int]:
+        """Return a dictionary of the potential friends of person with a
+        non-zero mutual friend or mutual network score, and the sum of those
+        two scores. The full score adds the family bonus of 1 to it.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> sorted(engine.get_partial_scores('Claire Dunphy').items())
+        [('Cameron Tucker', 1), ('Gloria Pritchett', 2), ('Luke Dunphy', 2), \
+('Manny Delgado', 1)]
+        """
+
+        if not self._friends:
+            return {}
+
+        excluded = self._friends[person]
+        friend_scores = self.get_mutual_friend_scores(person)
+        network_scores = self.get_mutual_network_scores(person)
+        exact = self.is_exact(person)
+        scores = {}
+
+        for candidate in friend_scores.keys() | network_scores.keys():
+            if candidate == person or candidate in excluded or \
+               candidate not in self._people:
+                continue
+            network_score = network_scores.get(candidate)
+            if network_score is None:
+                # A sampled network expansion may have missed this candidate.
+                network_score = 0 if exact else \
+                    self._networks.shared_count(person, candidate)
+            scores[candidate] = friend_scores.get(candidate, 0) + network_score
+
+        return scores
+
+    def get_scores(self, person: str) -> Dict[str, int]:
+        """Return a dictionary of the potential friends of person and their
+        scores iff the score is greater than 0.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> sorted(engine.get_scores('Claire Dunphy').items())
+        [('Cameron Tucker', 1), ('Gloria Pritchett', 2), ('Luke Dunphy', 3), \
+('Manny Delgado', 1)]
+        """
+
+        scores = self.get_partial_scores(person)
+        last_name = self._families.last_name(person)
+        last_names = self._families.last_name
+
+        for candidate in scores:
+            if last_names(candidate) == last_name:
+                scores[candidate] += 1
+
+        return scores
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return a list of tuples containing the friend recommendations for
+        the given person and their scores, sorted from highest to lowest score
+        and then by name. Only potential friends with non-zero scores are
+        included.
+
+        >>> engine = RecommendationEngine({}, {})
+        >>> engine.make_recommendations('Jay Pritchett')
+        []
+        """
+
+        scores = self.get_scores(person)
+        return sorted(scores.items(), key=lambda t: (-t[1], t[0]))
+
+    def _score_candidate(self, person: str, candidate: str, \
+                         friend_score: int, network_score: int = None) -> int:
+        """Return the score of candidate with respect to person, given their
+        mutual friend score and, if it is already known, their mutual network
+        score.
+        """
+
+        if network_score is None:
+            network_score = self._networks.shared_count(person, candidate)
+        score = friend_score + network_score
+        if score and self._families.last_name(candidate) == \
+           self._families.last_name(person):
+            score += 1
+        return score
+
+    def make_top_recommendations(self, person: str, k: int) -> \
+                                 List[Tuple[str, int]]:
+        """Return the first k tuples of make_recommendations for person.
+
+        Only the mutual friend scores are computed up front. The network
+        score of a candidate is at most the number of networks of person and
+        the family bonus at most 1, so a candidate's score is at most its
+        mutual friend score plus that cap. Candidates are scored in full from
+        the highest mutual friend score down, and the search stops once the
+        k-th best score found beats the bound of every candidate left. The
+        co-members of person who are not friend candidates are only expanded
+        if they can still make the top k.
+
+        >>> engine = RecommendationEngine(P2F, P2N)
+        >>> engine.make_top_recommendations('Claire Dunphy', 2)
+        [('Luke Dunphy', 3), ('Gloria Pritchett', 2)]
+        >>> engine.make_top_recommendations('Claire Dunphy', 0)
+        []
+        """
+
+        if k <= 0 or not self._friends:
+            return []
+
+        excluded = self._friends[person]
+        friend_scores = self.get_mutual_friend_scores(person)
+        cap = len(self.person_to_networks.get(person, [])) + 1
+
+        def eligible(candidate: str) -> bool:
+            return candidate != person and candidate not in excluded and \
+                candidate in self._people
+
+        def rank(t: Tuple[str, int]) -> Tuple[int, str]:
+            return -t[1], t[0]
+
+        groups = {}
+        for candidate, friend_score in friend_scores.items():
+            groups.setdefault(friend_score, []).append(candidate)
+
+        best = []
+        for friend_score in sorted(groups, reverse=True):
+            if len(best) == k and friend_score + cap < best[-1][1]:
+                return best
+            scored = [(candidate, self._score_candidate(person, candidate, \
+                                                        friend_score)) \
+                      for candidate in groups[friend_score] \
+                      if eligible(candidate)]
+            best = heapq.nsmallest(k, best + scored, key=rank)
+
+        if len(best) == k and cap < best[-1][1]:
+            return best
+        scored = [(candidate, self._score_candidate(person, candidate, 0, \
+                                                    network_score)) \
+                  for candidate, network_score \
+                  in self.get_mutual_network_scores(person).items() \
+                  if candidate not in friend_scores and eligible(candidate)]
+        return heapq.nsmallest(k, best + scored, key=rank)
+
+
+def make_top_recommendations(person: str, k: int, person_to_friends: \
+                             Dict[str, List[str]], person_to_networks: \
+                             Dict[str, List[str]]) -> List[Tuple[str, int]]:
+    """Return the first k tuples of make_recommendations(person,
+    person_to_friends, person_to_networks).
+
+    >>> make_top_recommendations('Jay Pritchett', 2, P2F, P2N)
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1)]
+    """
+
+    engine = RecommendationEngine(person_to_friends, person_to_networks)
+    return engine.make_top_recommendations(person, k)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import Executor
+from typing import List, Tuple, Dict, Optional
+from network_functions import load_profiles_many
+from recommendation_engine import RecommendationEngine
+
+
+class RecommendationServer:
+    """An asyncio server answering friend recommendation queries over TCP with
+    a line-based protocol. Each request is a line holding a person's name, and
+    each response is a line holding a JSON object with either their
+    "recommendations" (a list of [name, score] pairs, as make_recommendations
+    returns them, cut to top_k if it is given) or an "error", such as for an
+    unknown person, a line that is not valid UTF-8 or a line longer than the
+    stream limit (64 KiB by default).
+
+    Scoring runs in executor (the event loop's default executor if it is
+    None), so that the event loop keeps serving other clients, and concurrent
+    requests for the same person share one computation.
+    """
+
+    def __init__(self, engine: RecommendationEngine, top_k: int = None, \
+                 executor: Executor = None) -> None:
+        """Initialize a server answering queries with engine.
+        """
+
+        self.engine = engine
+        self.top_k = top_k
+        self.executor = executor
+        self.computed = 0
+        self._pending = {}
+
+    def _recommend(self, person: str) -> List[Tuple[str, int]]:
+        self.computed += 1
+        if self.top_k is None:
+            return self.engine.make_recommendations(person)
+        return self.engine.make_top_recommendations(person, self.top_k)
+
+    async def recommend(self, person: str) -> List[Tuple[str, int]]:
+        """Return the recommendations for person, joining the computation
+        already running for them if there is one.
+        """
+
+        future = self._pending.get(person)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self._recommend, person)
+            self._pending[person] = future
+            future.add_done_callback(lambda f: self._pending.pop(person, None))
+        return await asyncio.shield(future)
+
+    async def answer(self, person: str) -> Dict[str, object]:
+        """Return the response object to a request for person.
+        """
+
+        try:
+            recommendations = await self.recommend(person)
+        except KeyError:
+            return {'person': person, 'error': 'unknown person'}
+        except Exception:
+            return {'person': person, 'error': 'internal error'}
+        return {'person': person, 'recommendations': recommendations}
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> \
+                            Optional[bytes]:
+        """Return the next line from reader, b'' at the end of the stream, or
+        None if the line is longer than the limit of reader, skipping it.
+        """
+
+        too_long = False
+        while True:
+            try:
+                line = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as error:
+                line = error.partial
+            except asyncio.LimitOverrunError as error:
+                # The data is left in the buffer; drop it and read on to the
+                # end of the line.
+                await reader.readexactly(error.consumed)
+                too_long = True
+                continue
+            return None if too_long else line
+
+    async def handle_client(self, reader: asyncio.StreamReader, \
+                            writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one client until it disconnects.
+        """
+
+        try:
+            while True:
+                line = await self._read_request(reader)
+                if line == b'':
+                    break
+                if line is None:
+                    response = {'error': 'line too long'}
+                else:
+                    try:
+                        person = line.decode('utf-8').strip()
+                    except UnicodeDecodeError:
+                        response = {'person': line.decode('utf-8', 'replace') \
+                                    .strip(), 'error': 'invalid UTF-8'}
+                    else:
+                        if person == '':
+                            continue
+                        response = await self.answer(person)
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> \
+                    asyncio.AbstractServer:
+        """Start listening on host and port, and return the asyncio server.
+        """
+
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+async def serve(paths: List[str], host: str, port: int, top_k: int, \
+                max_network_expansion: int = None) -> None:
+    """Load the profiles files at paths once and serve recommendations for
+    them on host and port until cancelled.
+    """
+
+    person_to_friends, person_to_networks = load_profiles_many(paths)
+    engine = RecommendationEngine(person_to_friends, person_to_networks, \
+                                  max_network_expansion)
+    server = await RecommendationServer(engine, top_k).start(host, port)
+    print('Serving recommendations on {}:{}'.format(host, port))
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve friend recommendations.')
+    parser.add_argument('profiles', nargs='*', default=['profiles.txt'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--top-k', type=int, default=None)
+    parser.add_argument('--max-network-expansion', type=int, default=None, \
+                        help='sample networks larger than this (inexact)')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.profiles, args.host, args.port, args.top_k, \
+                          args.max_network_expansion))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,160 @@
+from typing import List, Tuple, Dict
+from network_functions import get_last_name, invert_network, P2F, P2N
+from symmetric_graph import SymmetricGraph
+
+EMPTY = frozenset()
+# The number of networks, the largest ones, that get a bit in the network
+# masks of their members; the other networks of a person are kept as a
+# sorted tuple of ids.
+MASK_BITS = 64
+
+
+def count_common(ids1: Tuple[int, ...], ids2: Tuple[int, ...]) -> int:
+    """Return the number of ids that the sorted tuples ids1 and ids2 have in
+    common.
+
+    >>> count_common((1, 4, 7, 9), (2, 4, 9))
+    2
+    """
+
+    if not ids1 or not ids2:
+        return 0
+    i = j = count = 0
+    length1, length2 = len(ids1), len(ids2)
+    while i < length1 and j < length2:
+        if ids1[i] < ids2[j]:
+            i += 1
+        elif ids1[i] > ids2[j]:
+            j += 1
+        else:
+            count += 1
+            i += 1
+            j += 1
+    return count
+
+
+class ScoringKernel:
+    """A fused version of scoring over integer ids. People are numbered in
+    alphabetical order, the friendships are a SymmetricGraph of ids, and last
+    names are ids too. Networks are numbered from the largest down. Each
+    person's memberships of the mask_bits largest (dense) networks are a
+    bitset of at most mask_bits bits, and their other (sparse) networks are a
+    sorted tuple of ids, so no person costs more than a word per network they
+    are in. Scoring a pair is then one mutual friend set intersection, one
+    popcount and one merge of two short tuples for the mutual networks, and
+    one integer comparison for the family bonus.
+
+    The kernel is built from a fixed person_to_friends and person_to_networks;
+    it must be rebuilt after they change. Friend and network lists must not
+    have duplicates, which add_to_friends and add_to_network guarantee.
+
+    >>> kernel = ScoringKernel(P2F, P2N)
+    >>> kernel.scoring('Claire Dunphy', 'Luke Dunphy')
+    3
+    >>> kernel.make_recommendations('Jay Pritchett')
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1), ('Luke Dunphy', 1), \
+('Phil Dunphy', 1)]
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]], \
+                 mask_bits: int = MASK_BITS) -> None:
+        """Number the people and networks of person_to_friends and
+        person_to_networks and build the id tables, with bitsets for the
+        mask_bits largest networks.
+        """
+
+        people = set(person_to_friends) | set(person_to_networks)
+        for friends in person_to_friends.values():
+            people.update(friends)
+        self.names = sorted(people)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        ids = self.ids
+
+        self._has_friends = bool(person_to_friends)
+        self.graph = SymmetricGraph({ids[person]: [ids[f] for f in friends] \
+                                      for person, friends \
+                                      in person_to_friends.items()})
+        # The people potential_friends picks from, in id (name) order.
+        self._candidates = sorted(set(self.graph.forward) | \
+                                  set(self.graph.reverse))
+
+        members = invert_network(person_to_networks)
+        by_size = sorted(members, key=lambda network: -len(members[network]))
+        self._masks = [0] * len(self.names)
+        sparse_networks = {}
+        for network_id, network in enumerate(by_size):
+            for member in members[network]:
+                if network_id < mask_bits:
+                    self._masks[ids[member]] |= 1 << network_id
+                else:
+                    sparse_networks.setdefault(ids[member], []) \
+                        .append(network_id)
+        # Ids are appended in increasing order, so each tuple is sorted.
+        self._network_ids = [()] * len(self.names)
+        for person_id, network_ids in sparse_networks.items():
+            self._network_ids[person_id] = tuple(network_ids)
+
+        last_names = {}
+        self._last_names = [last_names.setdefault(get_last_name(name), \
+                                                  len(last_names)) \
+                            for name in self.names]
+
+    def score_ids(self, id1: int, id2: int) -> int:
+        """Return scoring for the people with ids id1 and id2.
+        """
+
+        forward = self.graph.forward
+        if id1 in forward:
+            if id2 in forward:
+                reciprocal = self.graph.reciprocal
+                score = len(reciprocal.get(id1, EMPTY) & \
+                            reciprocal.get(id2, EMPTY))
+            else:
+                score = len(forward[id1] & self.graph.reverse.get(id2, EMPTY))
+        elif id2 in forward:
+            score = len(forward[id2] & self.graph.reverse.get(id1, EMPTY))
+        else:
+            score = 0
+        score += (self._masks[id1] & self._masks[id2]).bit_count()
+        score += count_common(self._network_ids[id1], self._network_ids[id2])
+        if score and self._last_names[id1] == self._last_names[id2]:
+            score += 1
+        return score
+
+    def scoring(self, person1: str, person2: str) -> int:
+        """Return the same score as scoring.
+        """
+
+        id1 = self.ids.get(person1)
+        id2 = self.ids.get(person2)
+        if id1 is None or id2 is None:
+            return 0
+        return self.score_ids(id1, id2)
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return the same list as make_recommendations for person, scoring
+        every potential friend with score_ids.
+        """
+
+        if not self._has_friends:
+            return []
+        person_id = self.ids.get(person)
+        if person_id not in self.graph.forward:
+            raise KeyError(person)
+
+        excluded = self.graph.forward[person_id]
+        scored = []
+        for candidate in self._candidates:
+            if candidate != person_id and candidate not in excluded:
+                score = self.score_ids(person_id, candidate)
+                if score:
+                    scored.append((-score, candidate))
+        # Ids follow alphabetical order, so ties are broken by name.
+        scored.sort()
+        return [(self.names[i], -score) for score, i in scored]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,201 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import List, Tuple
+from batch_scoring import BatchScorer
+from graph_store import GraphStore, layout_tables, read_tables
+from network_functions import load_profiles_many, P2F, P2N
+
+MAGIC = b'SNSNAP\x00\x00'
+VERSION = 1
+# magic, version, byte order (0 little, 1 big), number of tables
+HEADER = struct.Struct('<8sIII')
+# format, offset, number of bytes
+TABLE = struct.Struct('<c7xQQ')
+
+
+class Snapshot:
+    """A GraphStore and its BatchScorer read from a snapshot file. The tables
+    are views of a memory map of the file, so opening a snapshot takes
+    constant time and the operating system pages the tables in as they are
+    used.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'profiles.snap')
+    >>> save_snapshot(path, GraphStore.from_dicts(P2F, P2N))
+    >>> snapshot = load_snapshot(path)
+    >>> snapshot.scorer.make_recommendations('Jay Pritchett')
+    [('Mitchell Pritchett', 2), ('Cameron Tucker', 1), ('Luke Dunphy', 1), \
+('Phil Dunphy', 1)]
+    >>> snapshot.members_of('Chess Club')
+    ['Alex Dunphy', 'Manny Delgado']
+    >>> snapshot.close()
+    """
+
+    def __init__(self, store: GraphStore, scorer: BatchScorer, \
+                 mapping: mmap.mmap = None) -> None:
+        """Initialize a snapshot of store and scorer, whose tables live in
+        mapping if it is given.
+        """
+
+        self.store = store
+        self.scorer = scorer
+        self._mapping = mapping
+
+    def members_of(self, network: str) -> List[str]:
+        """Return the members of network in alphabetical order, from the
+        inverted network index (see invert_network) saved in the snapshot.
+        """
+
+        network_id = self.store.network_names.index_of(network)
+        if network_id == -1:
+            raise KeyError(network)
+        return [self.store.names[i] for i in \
+                self.scorer.network_member_ids(network_id)]
+
+    def close(self) -> None:
+        """Release the memory map. The store and scorer must not be used
+        afterwards.
+        """
+
+        if self._mapping is not None:
+            self.store = None
+            self.scorer = None
+            mapping, self._mapping = self._mapping, None
+            try:
+                mapping.close()
+            except BufferError:
+                # Views of the tables are still alive; the map is released
+                # when they are collected.
+                pass
+
+
+def save_snapshot(path: str, store: GraphStore, scorer: BatchScorer = None) \
+                  -> None:
+    """Save store, and the tables of scorer (built from store if it is not
+    given), to a snapshot file at path.
+    """
+
+    if scorer is None:
+        scorer = BatchScorer(store)
+    tables = store.tables() + scorer.tables()
+    layout, size = layout_tables(tables)
+    start = HEADER.size + TABLE.size * len(tables)
+    start += -start % 8
+    byte_order = 0 if sys.byteorder == 'little' else 1
+
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, VERSION, byte_order, \
+                                        len(tables)))
+        for format, offset, nbytes in layout:
+            snapshot_file.write(TABLE.pack(format.encode('ascii'), \
+                                           start + offset, nbytes))
+        for table, (format, offset, nbytes) in zip(tables, layout):
+            snapshot_file.write(bytes(start + offset - snapshot_file.tell()))
+            snapshot_file.write(memoryview(table).cast('B'))
+
+
+def read_layout(header: bytes) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """Return the version and the table layout found in header, the bytes of
+    a snapshot file, raising ValueError if they are not a snapshot this
+    version can read or if its tables do not fit in the file.
+
+    >>> read_layout(HEADER.pack(MAGIC, VERSION, sys.byteorder == 'big', 2))
+    Traceback (most recent call last):
+    ...
+    ValueError: snapshot has 2 tables instead of 19
+    """
+
+    if len(header) < HEADER.size:
+        raise ValueError('not a snapshot file')
+    magic, version, byte_order, count = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError('not a snapshot file')
+    if version != VERSION:
+        raise ValueError('unsupported snapshot version {}'.format(version))
+    if byte_order != (0 if sys.byteorder == 'little' else 1):
+        raise ValueError('snapshot was written with another byte order')
+
+    expected = GraphStore.TABLE_COUNT + BatchScorer.TABLE_COUNT
+    if count != expected:
+        raise ValueError('snapshot has {} tables instead of {}'.format( \
+            count, expected))
+    if len(header) < HEADER.size + count * TABLE.size:
+        raise ValueError('snapshot file is truncated')
+
+    layout = []
+    for i in range(count):
+        format, offset, nbytes = TABLE.unpack_from(header, \
+                                                   HEADER.size + i * TABLE.size)
+        format = format.decode('ascii', 'replace')
+        try:
+            itemsize = struct.calcsize(format)
+        except struct.error:
+            itemsize = 0
+        if not itemsize:
+            raise ValueError('snapshot table {} has an unknown format {!r}' \
+                             .format(i, format))
+        if nbytes % itemsize != 0:
+            raise ValueError('snapshot table {} is not a whole number of '
+                             'items'.format(i))
+        if offset + nbytes > len(header):
+            raise ValueError('snapshot table {} ends past the end of the file'
+                             .format(i))
+        layout.append((format, offset, nbytes))
+    return version, layout
+
+
+def is_current(snapshot_path: str, paths: List[str]) -> bool:
+    """Return whether the snapshot at snapshot_path exists and is not older
+    than any of the profiles files at paths that exist, so that it still
+    holds what they hold.
+    """
+
+    if not os.path.exists(snapshot_path):
+        return False
+    saved = os.path.getmtime(snapshot_path)
+    return all(os.path.getmtime(path) <= saved for path in paths \
+               if os.path.exists(path))
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """Return the Snapshot saved at path, backed by a read-only memory map of
+    the file.
+    """
+
+    with open(path, 'rb') as snapshot_file:
+        mapping = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        version, layout = read_layout(mapping)
+    except ValueError:
+        mapping.close()
+        raise
+    tables = read_tables(memoryview(mapping), layout)
+    store = GraphStore.from_tables(tables[:GraphStore.TABLE_COUNT])
+    scorer = BatchScorer(store, tables[GraphStore.TABLE_COUNT:])
+    return Snapshot(store, scorer, mapping)
+
+
+def convert_profiles(paths: List[str], snapshot_path: str) -> GraphStore:
+    """Load the profiles files at paths and save them as a snapshot at
+    snapshot_path. Return the store that was saved.
+    """
+
+    person_to_friends, person_to_networks = load_profiles_many(paths)
+    store = GraphStore.from_dicts(person_to_friends, person_to_networks)
+    save_snapshot(snapshot_path, store)
+    return store
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( \
+        description='Convert profiles files to a binary snapshot.')
+    parser.add_argument('profiles', nargs='+')
+    parser.add_argument('snapshot')
+    args = parser.parse_args()
+    store = convert_profiles(args.profiles, args.snapshot)
+    print('Saved {} people and {} networks to {}'.format( \
+        len(store.names), len(store.network_names), args.snapshot))
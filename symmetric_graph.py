@@ -0,0 +1,166 @@
+from typing import List, Dict, Set
+from network_functions import P2F
+
+
+class SymmetricGraph:
+    """Forward and reverse adjacency sets of a "person to friends" dictionary,
+    and the set of reciprocal friends of each person (the friends who list
+    them back), so that the three kinds of mutual friends of
+    get_mutual_friend_score are set intersections instead of list scans:
+
+    - mutual_friend_type_1(p1, p2): friends of p1 who list p2, that is
+      forward[p1] & reverse[p2];
+    - mutual_friend_type_2(p1, p2): friends of p2 who list p1, that is
+      forward[p2] & reverse[p1];
+    - mutual_friend_type_3(p1, p2): reciprocal friends of both,
+      reciprocal[p1] & reciprocal[p2].
+
+    Everyone with a (possibly empty) friend list is a key of forward. Friend
+    lists must not have duplicates, which add_to_friends guarantees.
+
+    >>> graph = SymmetricGraph(P2F)
+    >>> graph.get_mutual_friend_score('Claire Dunphy', 'Luke Dunphy')
+    2
+    >>> graph.is_reciprocal('Claire Dunphy', 'Phil Dunphy')
+    True
+    >>> graph.is_reciprocal('Alex Dunphy', 'Luke Dunphy')
+    True
+    >>> graph.is_reciprocal('Haley Gwendolyn Dunphy', 'Gilbert D-Cat')
+    False
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]]) -> None:
+        """Normalize person_to_friends into forward, reverse and reciprocal
+        sets.
+        """
+
+        self.forward = {}
+        self.reverse = {}
+        self.reciprocal = {}
+
+        for person, friends in person_to_friends.items():
+            self.forward[person] = set(friends)
+            for friend in friends:
+                self.reverse.setdefault(friend, set()).add(person)
+        for person, friends in self.forward.items():
+            for friend in friends:
+                if person in self.forward.get(friend, ()):
+                    self.reciprocal.setdefault(person, set()).add(friend)
+
+    def is_key(self, person: str) -> bool:
+        """Return whether person has a friend list.
+        """
+
+        return person in self.forward
+
+    def is_reciprocal(self, person: str, friend: str) -> bool:
+        """Return whether person and friend list each other as friends.
+        """
+
+        return friend in self.reciprocal.get(person, ())
+
+    def add_edge(self, name: str, friend: str) -> None:
+        """Record that name lists friend as a friend.
+
+        >>> graph = SymmetricGraph({'Jay Pritchett': ['Claire Dunphy']})
+        >>> graph.add_edge('Claire Dunphy', 'Jay Pritchett')
+        >>> graph.is_reciprocal('Jay Pritchett', 'Claire Dunphy')
+        True
+        """
+
+        self.forward.setdefault(name, set()).add(friend)
+        self.reverse.setdefault(friend, set()).add(name)
+        if name in self.forward.get(friend, ()):
+            self.reciprocal.setdefault(name, set()).add(friend)
+            self.reciprocal.setdefault(friend, set()).add(name)
+
+    def remove_edge(self, name: str, friend: str) -> None:
+        """Record that name no longer lists friend as a friend. name stops
+        being a key when they have no friends left, as with
+        remove_from_friends.
+        """
+
+        if friend not in self.forward.get(name, ()):
+            return
+        for table, person, other in [(self.forward, name, friend), \
+                                     (self.reverse, friend, name), \
+                                     (self.reciprocal, name, friend), \
+                                     (self.reciprocal, friend, name)]:
+            if person in table:
+                table[person].discard(other)
+                if not table[person]:
+                    del table[person]
+
+    def mutual_friend_type_1(self, person1: str, person2: str) -> int:
+        """Return the same score as mutual_friend_type_1.
+        """
+
+        return len(self.forward.get(person1, set()) & \
+                   self.reverse.get(person2, set()))
+
+    def mutual_friend_type_2(self, person1: str, person2: str) -> int:
+        """Return the same score as mutual_friend_type_2.
+        """
+
+        return len(self.forward.get(person2, set()) & \
+                   self.reverse.get(person1, set()))
+
+    def mutual_friend_type_3(self, person1: str, person2: str) -> int:
+        """Return the same score as mutual_friend_type_3.
+        """
+
+        if person1 not in self.forward or person2 not in self.forward:
+            return 0
+        return len(self.reciprocal.get(person1, set()) & \
+                   self.reciprocal.get(person2, set()))
+
+    def get_mutual_friend_score(self, person1: str, person2: str) -> int:
+        """Return the same score as get_mutual_friend_score.
+        """
+
+        if person1 in self.forward:
+            if person2 in self.forward:
+                return self.mutual_friend_type_3(person1, person2)
+            return self.mutual_friend_type_1(person1, person2)
+        if person2 in self.forward:
+            return self.mutual_friend_type_2(person1, person2)
+        return 0
+
+    def get_mutual_friend_scores(self, person: str) -> Dict[str, int]:
+        """Return a dictionary of the non-zero get_mutual_friend_score of every
+        person with respect to person, walking each kind of mutual friend in
+        the direction that only reaches people with a non-zero score.
+
+        >>> graph = SymmetricGraph(P2F)
+        >>> sorted(graph.get_mutual_friend_scores('Alex Dunphy').items())
+        [('Alex Dunphy', 1), ('Manny Delgado', 1), ('Mitchell Pritchett', 1), \
+('Phil Dunphy', 1)]
+        >>> graph.get_mutual_friend_scores('Chairman D-Cat')
+        {'Haley Gwendolyn Dunphy': 1}
+        """
+
+        scores = {}
+        forward = self.forward
+
+        if person in forward:
+            # Type 1: people without a friend list, listed by a friend.
+            for friend in forward[person]:
+                for candidate in forward.get(friend, ()):
+                    if candidate not in forward:
+                        scores[candidate] = scores.get(candidate, 0) + 1
+            # Type 3: reciprocal friends of a reciprocal friend.
+            for friend in self.reciprocal.get(person, ()):
+                for candidate in self.reciprocal[friend]:
+                    scores[candidate] = scores.get(candidate, 0) + 1
+        else:
+            # Type 2: people listing someone who lists person.
+            for friend in self.reverse.get(person, ()):
+                for candidate in self.reverse.get(friend, ()):
+                    scores[candidate] = scores.get(candidate, 0) + 1
+
+        return scores
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,94 @@
+import copy
+import random
+import unittest
+from unittest import mock
+import network_functions
+from component_index import ComponentIndex, UnionFind
+from test_recommendation_engine import random_profiles
+
+
+class TestComponentIndex(unittest.TestCase):
+
+    def assertMatches(self, index, p2f, p2n):
+        for person in p2f:
+            actual = index.make_recommendations(person)
+            expected = network_functions.make_recommendations(person, p2f, p2n)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+            candidates = network_functions.potential_friends(p2f, person)
+            actual = index.potential_friends(person)
+            expected = [p for p in candidates if p in actual]
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_union_find(self):
+        sets = UnionFind()
+        for i in range(0, 20, 2):
+            sets.union(i, i + 2)
+        actual = len({sets.find(i) for i in range(22)})
+        expected = 12
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_isolated_cluster(self):
+        index = ComponentIndex(network_functions.P2F, network_functions.P2N)
+        actual = index.potential_friends('Dylan D-Money')
+        expected = ['Gilbert D-Cat']
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            self.assertMatches(ComponentIndex(p2f, p2n), p2f, p2n)
+
+
+    def test_changes_random(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            networks = sorted({n for values in p2n.values() for n in values}) + ['Glee Club']
+            index = ComponentIndex(copy.deepcopy(p2f), copy.deepcopy(p2n))
+            for step in range(40):
+                name = rng.choice(people)
+                change = rng.randrange(4)
+                if change == 0:
+                    index.add_to_friends(name, rng.choice(people))
+                elif change == 1:
+                    index.remove_from_friends(name, rng.choice(people))
+                elif change == 2:
+                    index.add_to_network(name, rng.choice(networks))
+                else:
+                    index.remove_from_network(name, rng.choice(networks))
+                if step % 5 == 0:
+                    self.assertMatches(index, index.person_to_friends,
+                                       index.person_to_networks)
+
+
+    def test_additions_do_not_rebuild(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            people += ['New Person {}'.format(i) for i in range(4)]
+            networks = sorted({n for values in p2n.values() for n in values}) + ['Glee Club']
+            index = ComponentIndex(copy.deepcopy(p2f), copy.deepcopy(p2n))
+            with mock.patch.object(ComponentIndex, '_rebuild',
+                                   side_effect=AssertionError('rebuilt')):
+                for step in range(40):
+                    name = rng.choice(people)
+                    if rng.random() < 0.6:
+                        index.add_to_friends(name, rng.choice(people))
+                    else:
+                        index.add_to_network(name, rng.choice(networks))
+                    if step % 5 == 0:
+                        self.assertMatches(index, index.person_to_friends,
+                                           index.person_to_networks)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+import network_functions
+from disk_store import DiskGraph
+from graph_generator import generate_profiles
+from test_recommendation_engine import random_profiles
+
+
+class TestDiskGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_make_recommendations_empty(self):
+        with DiskGraph.from_dicts(':memory:', {}, {}) as graph:
+            actual = graph.make_recommendations('Jay Pritchett')
+            expected = []
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_unknown_person(self):
+        with DiskGraph.from_dicts(':memory:', network_functions.P2F,
+                                  network_functions.P2N) as graph:
+            self.assertRaises(KeyError, graph.make_recommendations, 'John Smith')
+            self.assertRaises(KeyError, graph.make_recommendations, 'Chairman D-Cat')
+
+
+    def test_queries_random_small_cache(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            path = os.path.join(self.directory.name, 'graph{}.db'.format(seed))
+            with DiskGraph.from_dicts(path, p2f, p2n, memory_limit=4096) as graph:
+                for person in p2f:
+                    actual = (graph.make_recommendations(person),
+                              graph.get_friends_of_friends(person),
+                              graph.get_friends(p2f[person]))
+                    expected = (network_functions.make_recommendations(person, p2f, p2n),
+                                network_functions.get_friends_of_friends(p2f, person),
+                                network_functions.get_friends(p2f, p2f[person]))
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+                self.assertLessEqual(graph.cache.nbytes, 2048)
+                self.assertGreater(graph.cache.misses, 0)
+
+
+    def test_from_profiles(self):
+        paths = []
+        for seed in range(3):
+            paths.append(os.path.join(self.directory.name, 'p{}.txt'.format(seed)))
+            with open(paths[-1], 'w') as profiles_file:
+                profiles_file.write(generate_profiles(60, seed=seed))
+        p2f, p2n = network_functions.load_profiles_many(paths)
+        path = os.path.join(self.directory.name, 'graph.db')
+        with DiskGraph.from_profiles(path, paths, memory_limit=1 << 16) as graph:
+            actual = (list(graph.person_to_friends().items()),
+                      list(graph.person_to_networks().items()))
+            expected = (list(p2f.items()), list(p2n.items()))
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+        with DiskGraph(path) as graph:
+            for person in list(p2f)[:20]:
+                actual = graph.make_recommendations(person)
+                expected = network_functions.make_recommendations(person, p2f, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+    def test_load_records_incremental_flags(self):
+        p2f, p2n = random_profiles(2, 24)
+        with DiskGraph.from_dicts(':memory:', p2f, p2n) as expected_graph, \
+             DiskGraph(':memory:') as graph:
+            statements = []
+            graph._connection.set_trace_callback(statements.append)
+            for name in p2f:
+                graph.load_records([(name, p2f[name], p2n.get(name, []))])
+            for name in p2n:
+                graph.load_records([(name, [], p2n[name])])
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            actual = [graph.id_of(name)[1] for name in people]
+            expected = [expected_graph.id_of(name)[1] for name in people]
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+        # Each call only updates the flags of the people in its records.
+        self.assertEqual([sql for sql in statements if 'UPDATE' in sql and
+                          'WHERE id =' not in sql], [])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
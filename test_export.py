@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+import network_functions
+from batch_scoring import BatchScorer
+from export import export_recommendations, read_jsonl, read_binary
+from graph_store import GraphStore
+from test_recommendation_engine import random_profiles
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FailingRecommender:
+
+    def __init__(self, recommender, fail_after):
+        self.recommender = recommender
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def make_recommendations(self, person):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise Interrupted()
+        return self.recommender.make_recommendations(person)
+
+
+class TestExportRecommendations(unittest.TestCase):
+
+    def setUp(self):
+        self.p2f, self.p2n = random_profiles(5, 40)
+        self.store = GraphStore.from_dicts(self.p2f, self.p2n)
+        self.scorer = BatchScorer(self.store)
+        self.people = list(self.p2f) * 3
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+
+
+    def expected(self):
+        return [(person, network_functions.make_recommendations(person, self.p2f, self.p2n))
+                for person in self.people]
+
+
+    def test_export_jsonl(self):
+        path = os.path.join(self.directory, 'recommendations.jsonl')
+        count = export_recommendations(path, self.people, self.scorer, checkpoint_every=7)
+        actual = list(read_jsonl(path))
+        expected = self.expected()
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        self.assertEqual(count, len(self.people))
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+
+    def test_export_binary(self):
+        path = os.path.join(self.directory, 'recommendations.bin')
+        export_recommendations(path, self.people, self.scorer, 'binary', self.store.id_of)
+        names = self.store.names
+        actual = [(names[person], names[candidate], score)
+                  for person, candidate, score in read_binary(path, block_size=100)]
+        expected = [(person, name, score) for person, recommendations in self.expected()
+                    for name, score in recommendations]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_export_resume(self):
+        for format in ['jsonl', 'binary']:
+            path = os.path.join(self.directory, 'complete.' + format)
+            export_recommendations(path, self.people, self.scorer, format, self.store.id_of)
+            with open(path, 'rb') as f:
+                expected = f.read()
+
+            path = os.path.join(self.directory, 'resumed.' + format)
+            failing = FailingRecommender(self.scorer, 17)
+            with self.assertRaises(Interrupted):
+                export_recommendations(path, self.people, failing, format,
+                                       self.store.id_of, checkpoint_every=5)
+            reports = []
+            export_recommendations(path, self.people, self.scorer, format, self.store.id_of,
+                                   resume=True, checkpoint_every=5,
+                                   progress=lambda done, total: reports.append(done))
+            with open(path, 'rb') as f:
+                actual = f.read()
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+            self.assertEqual(reports[0], 20)
+            self.assertEqual(reports[-1], len(self.people))
+
+
+    def test_fresh_export_then_resume(self):
+        path = os.path.join(self.directory, 'recommendations.jsonl')
+        with self.assertRaises(Interrupted):
+            export_recommendations(path, self.people, FailingRecommender(self.scorer, 17),
+                                   checkpoint_every=5)
+        # A fresh export of other people crashes before its first checkpoint.
+        self.people = self.people[::-1]
+        with self.assertRaises(Interrupted):
+            export_recommendations(path, self.people, FailingRecommender(self.scorer, 3),
+                                   checkpoint_every=5)
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+        export_recommendations(path, self.people, self.scorer, resume=True,
+                               checkpoint_every=5)
+        actual = list(read_jsonl(path))
+        expected = self.expected()
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,58 @@
+import unittest
+import network_functions
+from family_index import FamilyIndex
+from recommendation_engine import RecommendationEngine
+from test_recommendation_engine import random_profiles
+
+
+class TestFamilyIndex(unittest.TestCase):
+
+    def test_get_families_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            actual = FamilyIndex(p2f).get_families()
+            expected = network_functions.get_families(p2f)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(list(actual.items()), list(expected.items()), msg)
+
+
+    def test_incremental_families(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            engine = RecommendationEngine({}, p2n)
+            for person, friends in p2f.items():
+                for friend in friends:
+                    engine.add_to_friends(person, friend)
+            for person, friends in list(p2f.items())[::3]:
+                for friend in list(friends):
+                    engine.remove_from_friends(person, friend)
+            actual = engine._families.get_families()
+            expected = network_functions.get_families(engine.person_to_friends)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+            for person in engine.person_to_friends:
+                actual = engine.make_recommendations(person)
+                expected = network_functions.make_recommendations(
+                    person, engine.person_to_friends, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+    def test_scoring_family_bonus(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            for person in p2f:
+                for other in network_functions.potential_friends(p2f, person):
+                    actual = network_functions.scoring(person, other, p2f, p2n)
+                    expected = network_functions.get_mutual_friend_score(
+                        person, other, p2f) + \
+                        network_functions.get_mutual_network_score(
+                            person, other, p2n) + \
+                        network_functions.get_mutual_family_score(
+                            person, other, p2f, p2n)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -75,5 +75,13 @@ class TestGetFamilies(unittest.TestCase):
         self.assertEqual(actual, expected, msg)      
 
 
+    def test_get_families_tuple_friends(self):
+        param = {'Claire Dunphy': ('Luke Dunphy', 'Manny Delgado'), 'Jay Pritchett': ()}
+        actual = network_functions.get_families(param)
+        expected = {'Dunphy': ['Claire', 'Luke'], 'Delgado': ['Manny'], 'Pritchett': ['Jay']}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
 if __name__ == '__main__':
     unittest.main(exit=False)
\ No newline at end of file
@@ -0,0 +1,73 @@
+import io
+import unittest
+from unittest import mock
+import network_functions
+from benchmark import benchmark_size
+from graph_generator import generate_graph, generate_profiles
+
+
+class TestGraphGenerator(unittest.TestCase):
+
+    def test_generate_profiles_seeded(self):
+        actual = generate_profiles(200, seed=5)
+        expected = generate_profiles(200, seed=5)
+        msg = "Expected the same profiles for the same seed"
+        self.assertEqual(actual, expected, msg)
+        self.assertNotEqual(actual, generate_profiles(200, seed=6))
+
+
+    def test_generate_profiles_loads(self):
+        names, friends, network_names, memberships = generate_graph(500, seed=2)
+        p2f, p2n = {}, {}
+        network_functions.load_profiles(io.StringIO(generate_profiles(500, seed=2)),
+                                        p2f, p2n)
+        for person in range(500):
+            name = network_functions.convert_name(names[person])
+            actual = (p2f.get(name, []), p2n.get(name, []))
+            expected = ([network_functions.convert_name(names[friend])
+                         for friend in friends[person]],
+                        [network_names[network] for network in memberships[person]])
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_generate_graph_shape(self):
+        names, friends, network_names, memberships = generate_graph(2000, seed=0)
+        self.assertEqual(len(set(names)), 2000)
+        degrees = sorted(len(friend_ids) for friend_ids in friends)
+        self.assertGreater(degrees[-1], 10 * degrees[len(degrees) // 2])
+        families = network_functions.get_families(
+            {network_functions.convert_name(name): [] for name in names})
+        self.assertLess(len(families), 1000)
+        self.assertEqual(len(network_names), 40)
+        self.assertTrue(any(memberships))
+
+
+    def test_benchmark_size(self):
+        results = benchmark_size(100, queries=3, repeat=1,
+                                 limits={'make_recommendations': 50})
+        names = [result['name'] for result in results]
+        self.assertIn('get_friends_of_friends', names)
+        for result in results:
+            if result['name'] == 'make_recommendations':
+                self.assertTrue(result['skipped'])
+            else:
+                self.assertGreaterEqual(result['seconds_per_call'], 0.0)
+
+
+    def test_benchmark_size_skips_indexes(self):
+        limits = {'RecommendationEngine.make_recommendations': 50,
+                  'ScoringKernel.make_recommendations': 50,
+                  'GraphStatistics.get_average_friend_count': 50}
+        built = AssertionError('index built for a skipped benchmark')
+        with mock.patch('benchmark.ScoringKernel', side_effect=built), \
+             mock.patch('benchmark.GraphStatistics', side_effect=built):
+            results = benchmark_size(100, queries=3, repeat=1, limits=limits)
+        actual = sorted(result['name'] for result in results if result.get('skipped'))
+        expected = sorted(limits)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,108 @@
+import copy
+import math
+import random
+import unittest
+import network_functions
+from graph_stats import Distribution, GraphStatistics
+from test_recommendation_engine import random_profiles
+
+
+class TestGraphStatistics(unittest.TestCase):
+
+    def assertMatches(self, stats, p2f, p2n):
+        actual = stats.get_average_friend_count()
+        expected = network_functions.get_average_friend_count(p2f)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertAlmostEqual(actual, expected, msg=msg)
+        actual = network_functions.get_average_friend_count(p2f, stats)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertAlmostEqual(actual, expected, msg=msg)
+
+        counts = sorted(len(friends) for friends in p2f.values())
+        actual = stats.friend_counts.histogram()
+        expected = {count: counts.count(count) for count in sorted(set(counts))}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        for q in [0, 25, 50, 90, 100]:
+            actual = stats.friend_counts.percentile(q)
+            expected = counts[max(1, math.ceil(q * len(counts) / 100)) - 1] \
+                if counts else 0
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+        actual = stats.friend_counts.top(5)
+        expected = sorted(((p, len(f)) for p, f in p2f.items()), \
+                          key=lambda t: (-t[1], t[0]))[:5]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+        actual = stats.network_sizes.values
+        expected = {network: len(members) for network, members \
+                    in network_functions.invert_network(p2n).items()}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+        actual = (stats.reciprocal_friendships, stats.friendships)
+        expected = (sum(1 for p in p2f for f in p2f[p] if p in p2f.get(f, ())), \
+                    sum(len(friends) for friends in p2f.values()))
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_distribution_empty(self):
+        sizes = Distribution()
+        actual = (sizes.mean(), sizes.percentile(50), sizes.top(3), sizes.histogram())
+        expected = (0, 0, [], {})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_distribution_grows(self):
+        sizes = Distribution()
+        for i in range(100):
+            sizes.set(i, i * 37)
+        sizes.discard(99)
+        sizes.add(0, 5000)
+        actual = (sizes.percentile(100), sizes.top(2), len(sizes))
+        expected = (5000, [(0, 5000), (98, 3626)], 99)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_empty(self):
+        stats = GraphStatistics({}, {})
+        actual = (stats.get_average_friend_count(), stats.reciprocity())
+        expected = (0, 0)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_statistics_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            self.assertMatches(GraphStatistics(p2f, p2n), p2f, p2n)
+
+
+    def test_changes_random(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            networks = sorted({n for values in p2n.values() for n in values}) + ['Glee Club']
+            stats = GraphStatistics(copy.deepcopy(p2f), copy.deepcopy(p2n))
+            for step in range(60):
+                name = rng.choice(people)
+                change = rng.randrange(4)
+                if change == 0:
+                    stats.add_to_friends(name, rng.choice(people))
+                elif change == 1:
+                    stats.remove_from_friends(name, rng.choice(people))
+                elif change == 2:
+                    stats.add_to_network(name, rng.choice(networks))
+                else:
+                    stats.remove_from_network(name, rng.choice(networks))
+                self.assertMatches(stats, stats.person_to_friends, \
+                                   stats.person_to_networks)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
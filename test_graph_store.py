@@ -0,0 +1,45 @@
+import unittest
+import network_functions
+from graph_store import GraphStore
+from test_recommendation_engine import random_profiles
+
+
+class TestGraphStore(unittest.TestCase):
+
+    def test_graph_store_empty(self):
+        store = GraphStore.from_dicts({}, {})
+        actual = (dict(store.person_to_friends()), dict(store.person_to_networks()))
+        expected = ({}, {})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_graph_store_round_trip(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            store = GraphStore.from_dicts(p2f, p2n)
+            actual = (dict(store.person_to_friends()), dict(store.person_to_networks()))
+            expected = (p2f, p2n)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_graph_store_unknown_person(self):
+        store = GraphStore.from_dicts(network_functions.P2F, network_functions.P2N)
+        self.assertRaises(KeyError, store.id_of, 'John Smith')
+        self.assertNotIn('Chairman D-Cat', store.person_to_friends())
+
+
+    def test_graph_store_make_recommendations(self):
+        p2f, p2n = network_functions.P2F, network_functions.P2N
+        store = GraphStore.from_dicts(p2f, p2n)
+        for person in p2f:
+            actual = network_functions.make_recommendations(
+                person, store.person_to_friends(), store.person_to_networks())
+            expected = network_functions.make_recommendations(person, p2f, p2n)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,77 @@
+import random
+import unittest
+import network_functions
+from incremental_engine import IncrementalRecommendationEngine
+from recommendation_engine import RecommendationEngine
+from test_recommendation_engine import random_profiles
+
+
+class TestIncrementalRecommendationEngine(unittest.TestCase):
+
+    def assert_matches_fresh(self, engine, p2f, p2n):
+        fresh = RecommendationEngine(p2f, p2n)
+        people = set(p2f) | set(p2n) | {f for fs in p2f.values() for f in fs}
+        for person in people:
+            actual = (engine.get_mutual_friend_scores(person),
+                      engine.get_mutual_network_scores(person))
+            expected = (fresh.get_mutual_friend_scores(person),
+                        fresh.get_mutual_network_scores(person))
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+        for person in p2f:
+            actual = engine.make_recommendations(person)
+            expected = network_functions.make_recommendations(person, p2f, p2n)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_incremental_build_from_empty(self):
+        p2f, p2n = {}, {}
+        engine = IncrementalRecommendationEngine(p2f, p2n)
+        for name, friends in network_functions.P2F.items():
+            for friend in friends:
+                engine.add_to_friends(name, friend)
+        for name, networks in network_functions.P2N.items():
+            for network in networks:
+                engine.add_to_network(name, network)
+        self.assert_matches_fresh(engine, p2f, p2n)
+
+
+    def test_incremental_remove_everything(self):
+        p2f, p2n = random_profiles(1, 24)
+        engine = IncrementalRecommendationEngine(p2f, p2n)
+        for name in list(p2f):
+            for friend in list(p2f[name]):
+                engine.remove_from_friends(name, friend)
+        for name in list(p2n):
+            for network in list(p2n[name]):
+                engine.remove_from_network(name, network)
+        actual = (p2f, p2n, engine.get_mutual_friend_scores('Ann Dunphy'))
+        expected = ({}, {}, {})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_incremental_random_changes(self):
+        rng = random.Random(0)
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | set(p2n))
+            engine = IncrementalRecommendationEngine(p2f, p2n)
+            for step in range(40):
+                name, other = rng.choice(people), rng.choice(people)
+                network = rng.choice(['Chess Club', 'Orchestra', 'Choir'])
+                change = rng.randrange(4)
+                if change == 0:
+                    engine.add_to_friends(name, other)
+                elif change == 1 and name in p2f:
+                    engine.remove_from_friends(name, rng.choice(p2f[name]))
+                elif change == 2:
+                    engine.add_to_network(name, network)
+                else:
+                    engine.remove_from_network(name, network)
+                self.assert_matches_fresh(engine, p2f, p2n)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import unittest
+import network_functions
+
+PROFILES = 'Pritchett, Jay\nDunphy, Claire\nPritchett, Gloria\n\nDunphy, Claire\n\
+Pritchett, Jay\nParent Teacher Association\n\nPritchett, Jay\nPritchett, Gloria\n\
+Delgado, Manny\n'
+
+
+class TestLoadProfiles(unittest.TestCase):
+
+    def test_load_profiles_empty(self):
+        friends, networks = {}, {}
+        network_functions.load_profiles(io.StringIO(''), friends, networks)
+        actual = (friends, networks)
+        expected = ({}, {})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_load_profiles_repeated_person(self):
+        friends, networks = {}, {}
+        network_functions.load_profiles(io.StringIO(PROFILES), friends, networks)
+        actual = (friends, networks)
+        expected = ({'Jay Pritchett': ['Claire Dunphy', 'Gloria Pritchett', 'Manny Delgado'],
+                     'Claire Dunphy': ['Jay Pritchett']},
+                    {'Claire Dunphy': ['Parent Teacher Association']})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_load_profiles_existing_dicts(self):
+        friends = {'Jay Pritchett': ['Manny Delgado']}
+        networks = {}
+        network_functions.load_profiles(io.StringIO(PROFILES), friends, networks)
+        actual = friends['Jay Pritchett']
+        expected = ['Manny Delgado', 'Claire Dunphy', 'Gloria Pritchett']
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_load_profiles_small_chunks(self):
+        actual = list(network_functions.iter_profiles(io.StringIO(PROFILES), 3))
+        expected = list(network_functions.iter_profiles(io.StringIO(PROFILES)))
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_load_profiles_many(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i, text in enumerate([PROFILES, 'Dunphy, Claire\nDunphy, Phil\n']):
+                path = os.path.join(directory, 'profiles{}.txt'.format(i))
+                with open(path, 'w') as f:
+                    f.write(text)
+                paths.append(path)
+            actual = network_functions.load_profiles_many(paths)
+        expected = {}, {}
+        for text in [PROFILES, 'Dunphy, Claire\nDunphy, Phil\n']:
+            network_functions.load_profiles(io.StringIO(text), *expected)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
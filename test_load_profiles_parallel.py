@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+import network_functions
+from graph_generator import generate_profiles
+from parallel_ingest import find_shards, load_profiles_parallel
+
+AWKWARD = 'Pritchett, Jay\r\nDunphy, Claire\r\n\r\n\r\n\nDunphy, Claire\nChess Club\n\
+\n\n\nDunphy, Phil\nDunphy, Luke\n  \n\nTucker, Cameron\nPritchett, Jay\n'
+
+
+class TestLoadProfilesParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', newline='') as profiles_file:
+            profiles_file.write(text)
+        return path
+
+
+    def test_load_profiles_parallel_empty(self):
+        path = self.write('empty.txt', '')
+        actual = load_profiles_parallel([path], 2, shard_bytes=4)
+        expected = ({}, {})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_shards_cover_file(self):
+        path = self.write('profiles.txt', generate_profiles(300, seed=1))
+        shards = find_shards(path, 500)
+        self.assertGreater(len(shards), 5)
+        self.assertEqual(shards[0][1], 0)
+        self.assertEqual(shards[-1][2], os.path.getsize(path))
+        for before, after in zip(shards, shards[1:]):
+            self.assertEqual(before[2], after[1])
+
+
+    def test_load_profiles_parallel_same_order(self):
+        paths = [self.write('profiles{}.txt'.format(seed),
+                            generate_profiles(200, seed=seed))
+                 for seed in range(4)]
+        paths.append(self.write('awkward.txt', AWKWARD))
+        expected = network_functions.load_profiles_many(paths)
+        for processes, shard_bytes in [(1, 7), (2, 300), (3, 1 << 20)]:
+            actual = load_profiles_parallel(paths, processes, shard_bytes)
+            msg = "Expected the same dictionaries as load_profiles_many"
+            self.assertEqual(actual, expected, msg)
+            for loaded, wanted in zip(actual, expected):
+                self.assertEqual(list(loaded.items()), list(wanted.items()), msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
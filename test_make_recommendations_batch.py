@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+import batch_scoring
+import network_functions
+from batch_scoring import make_recommendations_batch
+from test_recommendation_engine import random_profiles
+
+
+class TestMakeRecommendationsBatch(unittest.TestCase):
+
+    def test_make_recommendations_batch_empty(self):
+        actual = make_recommendations_batch([], network_functions.P2F, network_functions.P2N)
+        expected = []
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_batch_scoring(self):
+        p2f, p2n = network_functions.P2F, network_functions.P2N
+        people = list(p2f)
+        for person, recommendations in zip(people, make_recommendations_batch(people, p2f, p2n)):
+            for name, actual in recommendations:
+                expected = network_functions.scoring(person, name, p2f, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_batch_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            people = list(p2f)
+            actual = make_recommendations_batch(people, p2f, p2n)
+            expected = [network_functions.make_recommendations(person, p2f, p2n)
+                        for person in people]
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_batch_without_scipy(self):
+        p2f, p2n = random_profiles(3, 40)
+        people = list(p2f)
+        expected = make_recommendations_batch(people, p2f, p2n)
+        with mock.patch.object(batch_scoring, 'sparse', None):
+            actual = make_recommendations_batch(people, p2f, p2n)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_batch_unknown_person(self):
+        self.assertRaises(KeyError, make_recommendations_batch, ['Chairman D-Cat'],
+                          network_functions.P2F, network_functions.P2N)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,53 @@
+import unittest
+import network_functions
+from benchmark import benchmark_recall
+from minhash_index import MinHashRecommender, recall_at_k
+from test_recommendation_engine import random_profiles
+
+
+class TestMinHashRecommender(unittest.TestCase):
+
+    def test_subset_of_exact(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            recommender = MinHashRecommender(p2f, p2n, bands=16, seed=seed)
+            for person in p2f:
+                exact = network_functions.make_recommendations(person, p2f, p2n)
+                for bands in [1, 4, 16]:
+                    actual = recommender.make_recommendations(person, bands)
+                    names = {recommender.kernel.names[i]
+                             for i in recommender.candidates(person, bands)}
+                    expected = [t for t in exact if t[0] in names]
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+    def test_more_bands_more_recall(self):
+        p2f, p2n = random_profiles(3, 24)
+        recommender = MinHashRecommender(p2f, p2n, bands=64)
+        previous = 0.0
+        for bands in [1, 4, 16, 64]:
+            recall = sum(recall_at_k(recommender.make_recommendations(person, bands),
+                                     network_functions.make_recommendations(person, p2f, p2n))
+                         for person in p2f) / len(p2f)
+            self.assertGreaterEqual(recall, previous)
+            previous = recall
+        self.assertGreater(previous, 0.9)
+
+
+    def test_not_a_key(self):
+        recommender = MinHashRecommender(network_functions.P2F, network_functions.P2N)
+        with self.assertRaises(KeyError):
+            recommender.make_recommendations('Chairman D-Cat')
+
+
+    def test_benchmark_recall(self):
+        results = benchmark_recall(200, queries=5, band_counts=[4, 16])
+        recalls = [result['recall_at_10'] for result in results if 'bands' in result]
+        self.assertEqual(len(recalls), 2)
+        self.assertLessEqual(recalls[0], recalls[1])
+        self.assertLessEqual(recalls[1], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,242 @@
+import copy
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import network_functions
+from mutation_log import DurableGraph, MutationLog, replay, ADD_FRIEND, REMOVE_FRIEND
+from test_recommendation_engine import random_profiles
+
+
+def mutate(graph, p2f, p2n, rng, people, steps):
+    networks = ['Chess Club', 'Orchestra', 'Glee Club']
+    for step in range(steps):
+        name = rng.choice(people)
+        change = rng.randrange(4)
+        if change == 0:
+            friend = rng.choice(people)
+            graph.add_to_friends(name, friend)
+            network_functions.add_to_friends(name, friend, p2f)
+        elif change == 1:
+            friend = rng.choice(people)
+            graph.remove_from_friends(name, friend)
+            network_functions.remove_from_friends(name, friend, p2f)
+        elif change == 2:
+            network = rng.choice(networks)
+            graph.add_to_network(name, network)
+            network_functions.add_to_network(name, network, p2n)
+        else:
+            network = rng.choice(networks)
+            graph.remove_from_network(name, network)
+            network_functions.remove_from_network(name, network, p2n)
+
+
+class TestMutationLog(unittest.TestCase):
+
+    def make_directory(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        return temporary.name
+
+
+    def test_reopen_random(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            directory = self.make_directory()
+            graph = DurableGraph(directory, p2f, p2n, batch_size=7)
+            p2f, p2n = copy.deepcopy(p2f), copy.deepcopy(p2n)
+            for session in range(3):
+                mutate(graph, p2f, p2n, rng, people, 50)
+                graph.close()
+                graph = DurableGraph(directory, batch_size=7)
+                actual = (graph.person_to_friends, graph.person_to_networks)
+                expected = (p2f, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+            graph.close()
+
+
+    def test_compaction(self):
+        rng = random.Random(1)
+        p2f, p2n = random_profiles(1, 24)
+        people = sorted(p2f)
+        directory = self.make_directory()
+        graph = DurableGraph(directory, p2f, p2n, batch_size=4, compact_every=30)
+        p2f, p2n = copy.deepcopy(p2f), copy.deepcopy(p2n)
+        mutate(graph, p2f, p2n, rng, people, 100)
+        self.assertGreater(graph.generation, 3)
+        graph.close()
+        actual = sorted(os.listdir(directory))
+        expected = ['log-{}.wal'.format(graph.generation),
+                    'snapshot-{}.snap'.format(graph.generation)]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        reopened = DurableGraph(directory)
+        self.assertEqual((reopened.person_to_friends, reopened.person_to_networks), (p2f, p2n))
+        reopened.close()
+
+
+    def test_replay_high_degree(self):
+        rng = random.Random(2)
+        path = os.path.join(self.make_directory(), 'graph.wal')
+        log = MutationLog(path, batch_size=1000)
+        p2f = {'Jay Pritchett': ['Claire Dunphy']}
+        for i in range(20000):
+            name = 'Person {}'.format(i % 2) if i % 3 else 'Jay Pritchett'
+            friend = 'Friend {}'.format(rng.randrange(8000))
+            op = REMOVE_FRIEND if rng.random() < 0.2 else ADD_FRIEND
+            log.append(op, name, friend)
+            if op == ADD_FRIEND:
+                network_functions.add_to_friends(name, friend, p2f)
+            else:
+                network_functions.remove_from_friends(name, friend, p2f)
+        log.close()
+        actual = {'Jay Pritchett': ['Claire Dunphy']}
+        self.assertEqual(replay(path, actual, {}), 20000)
+        msg = "Expected {} people, but returned {}".format(len(p2f), len(actual))
+        self.assertEqual(actual, p2f, msg)
+
+
+    def test_torn_frame_dropped(self):
+        path = os.path.join(self.make_directory(), 'graph.wal')
+        log = MutationLog(path)
+        log.append(ADD_FRIEND, 'Jay Pritchett', 'Claire Dunphy')
+        log.sync()
+        size = os.path.getsize(path)
+        log.append(ADD_FRIEND, 'Jay Pritchett', 'Gloria Pritchett')
+        log.close()
+        with open(path, 'r+b') as log_file:
+            log_file.truncate(os.path.getsize(path) - 3)
+
+        p2f = {}
+        actual = replay(path, p2f, {}), p2f
+        expected = 1, {'Jay Pritchett': ['Claire Dunphy']}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+        log = MutationLog(path)
+        self.assertEqual(os.path.getsize(path), size)
+        log.append(REMOVE_FRIEND, 'Jay Pritchett', 'Claire Dunphy')
+        log.append(ADD_FRIEND, 'Jay Pritchett', 'Manny Delgado')
+        log.close()
+        p2f = {}
+        actual = replay(path, p2f, {}), p2f
+        expected = 3, {'Jay Pritchett': ['Manny Delgado']}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_torn_headers(self):
+        path = os.path.join(self.make_directory(), 'graph.wal')
+        log = MutationLog(path)
+        log.append(ADD_FRIEND, 'Jay Pritchett', 'Claire Dunphy')
+        log.close()
+        size = os.path.getsize(path)
+        log = MutationLog(path)
+        log.append(ADD_FRIEND, 'Jay Pritchett', 'Gloria Pritchett')
+        log.close()
+        # Cut inside the header of the second frame, then inside the header
+        # of the log itself.
+        for cut, expected in [(size + 10, (1, {'Jay Pritchett': ['Claire Dunphy']})),
+                              (5, (0, {}))]:
+            with open(path, 'r+b') as log_file:
+                log_file.truncate(cut)
+            p2f = {}
+            actual = replay(path, p2f, {}), p2f
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+        MutationLog(path).close()
+        self.assertEqual(replay(path, {}, {}), 0)
+
+
+    def test_sync_and_crash(self):
+        directory = self.make_directory()
+        graph = DurableGraph(directory, {}, {}, batch_size=100)
+        graph.add_to_friends('Jay Pritchett', 'Claire Dunphy')
+        graph.sync()
+        graph.add_to_friends('Jay Pritchett', 'Gloria Pritchett')
+        # A crash now loses the unsynced change, and only it.
+        crashed = DurableGraph(directory)
+        actual = crashed.person_to_friends
+        expected = {'Jay Pritchett': ['Claire Dunphy']}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_compaction_counts_pending(self):
+        directory = self.make_directory()
+        graph = DurableGraph(directory, {}, {}, batch_size=100, compact_every=10)
+        for i in range(25):
+            graph.add_to_network('Jay Pritchett', 'Club {}'.format(i))
+        actual = graph.generation
+        expected = 3
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        graph.close()
+
+
+    def test_open_removes_old_generations(self):
+        directory = self.make_directory()
+        graph = DurableGraph(directory, {}, {})
+        graph.add_to_friends('Jay Pritchett', 'Claire Dunphy')
+        graph.close()
+        # A crash after a compaction renamed its snapshot, before the files of
+        # the previous generation were removed.
+        for filename in os.listdir(directory):
+            shutil.copy(os.path.join(directory, filename),
+                        os.path.join(directory, filename.replace('-1.', '-0.')))
+        graph = DurableGraph(directory)
+        actual = (graph.person_to_friends, sorted(os.listdir(directory)))
+        expected = ({'Jay Pritchett': ['Claire Dunphy']}, ['log-1.wal', 'snapshot-1.snap'])
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        graph.close()
+
+
+    def test_failed_compaction_keeps_logging(self):
+        directory = self.make_directory()
+        graph = DurableGraph(directory, {}, {})
+        with mock.patch('mutation_log.save_snapshot', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                graph.compact()
+        graph.add_to_friends('Jay Pritchett', 'Claire Dunphy')
+        graph.close()
+        actual = (DurableGraph(directory).person_to_friends, sorted(os.listdir(directory)))
+        expected = ({'Jay Pritchett': ['Claire Dunphy']}, ['log-1.wal', 'snapshot-1.snap'])
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_failed_automatic_compaction(self):
+        directory = self.make_directory()
+        graph = DurableGraph(directory, {}, {}, compact_every=2)
+        with mock.patch('mutation_log.save_snapshot', side_effect=OSError('disk full')):
+            for i in range(5):
+                graph.add_to_friends('Jay Pritchett', 'Friend {}'.format(i))
+        self.assertIsInstance(graph.compaction_error, OSError)
+        self.assertEqual(graph.generation, 1)
+        # The next attempt waits for compact_every more mutations.
+        graph.add_to_friends('Jay Pritchett', 'Friend 5')
+        self.assertEqual(graph.generation, 2)
+        self.assertIsNone(graph.compaction_error)
+        graph.close()
+        actual = DurableGraph(directory).person_to_friends
+        expected = {'Jay Pritchett': ['Friend {}'.format(i) for i in range(6)]}
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_not_a_log(self):
+        path = os.path.join(self.make_directory(), 'graph.wal')
+        with open(path, 'wb') as log_file:
+            log_file.write(b'Pritchett, Jay\n\n' * 4)
+        with self.assertRaises(ValueError):
+            replay(path, {}, {})
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,92 @@
+import random
+import unittest
+import network_functions
+from network_index import NetworkIndex
+from recommendation_engine import RecommendationEngine
+from test_recommendation_engine import random_profiles
+
+
+def crowded_profiles(seed, size):
+    """Return random_profiles(seed, size) with most people also in one large
+    network.
+    """
+
+    rng = random.Random(seed)
+    p2f, p2n = random_profiles(seed, size)
+    people = set(p2f) | {friend for friends in p2f.values() for friend in friends}
+    for person in sorted(people):
+        if rng.random() < 0.8:
+            network_functions.add_to_network(person, 'Parent Teacher Association', p2n)
+    return p2f, p2n
+
+
+class TestNetworkIndex(unittest.TestCase):
+
+    def test_co_member_counts_exact(self):
+        for seed in range(10):
+            p2f, p2n = crowded_profiles(seed, 24)
+            index = NetworkIndex(p2n)
+            for person in p2n:
+                counts, exact = index.co_member_counts(person)
+                expected = {}
+                for other in p2n:
+                    score = network_functions.get_mutual_network_score(person, other, p2n)
+                    if score > 0:
+                        expected[other] = score
+                msg = "Expected {}, but returned {}".format(expected, counts)
+                self.assertTrue(exact)
+                self.assertEqual(counts, expected, msg)
+
+
+    def test_co_member_counts_capped(self):
+        for seed in range(10):
+            p2f, p2n = crowded_profiles(seed, 24)
+            index = NetworkIndex(p2n, max_expansion=3)
+            for person in p2n:
+                counts, exact = index.co_member_counts(person)
+                self.assertEqual(exact, index.is_exact(person))
+                for other, count in counts.items():
+                    expected = network_functions.get_mutual_network_score(person, other, p2n)
+                    msg = "Expected {}, but returned {}".format(expected, count)
+                    self.assertEqual(count, expected, msg)
+                if not exact:
+                    self.assertLess(len(counts), len(index.co_members(person)))
+
+
+    def test_capped_engine_recommendations(self):
+        for seed in range(10):
+            p2f, p2n = crowded_profiles(seed, 24)
+            engine = RecommendationEngine(p2f, p2n, max_network_expansion=3)
+            for person in p2f:
+                actual = engine.make_recommendations(person)
+                expected = network_functions.make_recommendations(person, p2f, p2n)
+                if engine.is_exact(person):
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+                else:
+                    msg = "Expected a subset of {}, but returned {}".format(expected, actual)
+                    self.assertTrue(set(actual) <= set(expected), msg)
+                    self.assertFalse(engine.is_exact(person))
+
+
+    def test_add_and_remove_members(self):
+        p2f, p2n = crowded_profiles(1, 24)
+        engine = RecommendationEngine(p2f, {}, max_network_expansion=5)
+        for person, networks in p2n.items():
+            for network in networks:
+                engine.add_to_network(person, network)
+        for person in list(p2n)[::2]:
+            engine.remove_from_network(person, 'Parent Teacher Association')
+        fresh = NetworkIndex(engine.person_to_networks, max_expansion=5)
+        for network in ['Parent Teacher Association', 'Chess Club']:
+            actual = engine._networks.members(network)
+            expected = fresh.members(network)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+        for person in engine.person_to_networks:
+            self.assertEqual(engine._networks.co_member_counts(person),
+                             fresh.co_member_counts(person))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
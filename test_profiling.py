@@ -0,0 +1,101 @@
+import io
+import json
+import unittest
+import network_functions
+from profiling import Profiler
+from recommendation_engine import RecommendationEngine
+from test_recommendation_engine import random_profiles
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_profiler_restores_functions(self):
+        before = (network_functions.make_recommendations,
+                  RecommendationEngine.get_scores)
+        with Profiler():
+            self.assertIsNot(network_functions.make_recommendations, before[0])
+        actual = (network_functions.make_recommendations,
+                  RecommendationEngine.get_scores)
+        msg = "Expected the original functions back after the profiler"
+        self.assertEqual(actual, before, msg)
+
+
+    def test_profiler_same_recommendations(self):
+        p2f, p2n = random_profiles(3, 24)
+        engine = RecommendationEngine(p2f, p2n)
+        expected = [(network_functions.make_recommendations(person, p2f, p2n),
+                     engine.make_recommendations(person)) for person in p2f]
+        with Profiler() as profiler:
+            actual = [(network_functions.make_recommendations(person, p2f, p2n),
+                       engine.make_recommendations(person)) for person in p2f]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        self.assertEqual(profiler.queries, 2 * len(p2f))
+
+
+    def test_profiler_traces(self):
+        p2f, p2n = random_profiles(4, 24)
+        engine = RecommendationEngine(p2f, p2n)
+        traces = []
+        with Profiler(callback=traces.append, keep_traces=False) as profiler:
+            for person in p2f:
+                recommendations = engine.make_recommendations(person)
+        self.assertEqual(profiler.traces, [])
+        self.assertEqual(len(traces), len(p2f))
+        for person, trace in zip(p2f, traces):
+            self.assertEqual(trace['query'], 'RecommendationEngine.make_recommendations')
+            self.assertEqual(trace['person'], person)
+            self.assertEqual(trace['counters']['recommendations'],
+                             len(engine.make_recommendations(person)))
+            self.assertLessEqual(sum(stage['seconds'] for stage in
+                                     trace['stages'].values()),
+                                 trace['seconds'] + 1e-9)
+        summary = profiler.summary()
+        self.assertEqual(summary['histograms']['query_us']['count'], len(p2f))
+        self.assertEqual(summary['counters']['recommendations'],
+                         sum(trace['counters']['recommendations']
+                             for trace in traces))
+
+
+    def test_profiler_keyword_person(self):
+        p2f, p2n = network_functions.P2F, network_functions.P2N
+        with Profiler() as profiler:
+            network_functions.make_recommendations(
+                person='Jay Pritchett', person_to_friends=p2f, person_to_networks=p2n)
+            network_functions.get_mutual_family_score(
+                'Claire Dunphy', person2='Luke Dunphy', person_to_friends=p2f,
+                person_to_networks=p2n)
+        actual = [(trace['query'], trace['person']) for trace in profiler.traces]
+        expected = [('make_recommendations', 'Jay Pritchett'),
+                    ('get_mutual_family_score', 'Claire Dunphy')]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        self.assertEqual(profiler.traces[1]['counters']['family_matches'], 1)
+
+
+    def test_profiler_failed_query(self):
+        engine = RecommendationEngine(network_functions.P2F, network_functions.P2N)
+        with Profiler() as profiler:
+            with self.assertRaises(KeyError):
+                engine.make_recommendations('John Smith')
+            engine.make_recommendations('Jay Pritchett')
+        actual = ([(trace['person'], trace['failed']) for trace in profiler.traces],
+                  profiler.summary()['queries'], profiler.summary()['failed'])
+        expected = ([('John Smith', True), ('Jay Pritchett', False)], 2, 1)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_dump_traces(self):
+        with Profiler() as profiler:
+            network_functions.make_recommendations(
+                'Claire Dunphy', network_functions.P2F, network_functions.P2N)
+        dump = io.StringIO()
+        profiler.dump_traces(dump)
+        lines = dump.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['person'], 'Claire Dunphy')
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,105 @@
+import copy
+import random
+import unittest
+import network_functions
+from recommendation_cache import RecommendationCache
+from recommendation_engine import RecommendationEngine
+from test_recommendation_engine import random_profiles
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRecommendationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.p2f = copy.deepcopy(network_functions.P2F)
+        self.p2n = copy.deepcopy(network_functions.P2N)
+        self.clock = FakeClock()
+        self.cache = RecommendationCache(RecommendationEngine(self.p2f, self.p2n),
+                                         max_entries=4, ttl=10, clock=self.clock)
+
+
+    def test_cache_hit(self):
+        first = self.cache.make_recommendations('Jay Pritchett')
+        second = self.cache.make_recommendations('Jay Pritchett')
+        actual = (self.cache.hits, self.cache.misses, second)
+        expected = (1, 1, first)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_cache_ttl(self):
+        self.cache.make_recommendations('Jay Pritchett')
+        self.clock.now = 10
+        self.cache.make_recommendations('Jay Pritchett')
+        actual = self.cache.misses
+        expected = 2
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_cache_lru(self):
+        people = ['Jay Pritchett', 'Claire Dunphy', 'Manny Delgado', 'Alex Dunphy',
+                  'Phil Dunphy']
+        for person in people[:4]:
+            self.cache.make_recommendations(person)
+        self.cache.make_recommendations('Jay Pritchett')
+        self.cache.make_recommendations('Phil Dunphy')
+        actual = [person in self.cache for person in people]
+        expected = [True, False, True, True, True]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_cache_invalidation_is_local(self):
+        self.cache.make_recommendations('Jay Pritchett')
+        self.cache.make_recommendations('Haley Gwendolyn Dunphy')
+        self.cache.add_to_friends('Dylan D-Money', 'Gilbert D-Cat')
+        actual = ('Jay Pritchett' in self.cache, 'Haley Gwendolyn Dunphy' in self.cache)
+        expected = (True, False)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_cache_invalidation_new_person_in_network(self):
+        self.cache.add_to_network('Sal Weiss', 'Chess Club')
+        self.cache.make_recommendations('Alex Dunphy')
+        self.cache.add_to_friends('Jay Pritchett', 'Sal Weiss')
+        actual = self.cache.make_recommendations('Alex Dunphy')
+        expected = network_functions.make_recommendations('Alex Dunphy', self.p2f, self.p2n)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_cache_matches_make_recommendations(self):
+        rng = random.Random(0)
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for fs in p2f.values() for f in fs})
+            cache = RecommendationCache(RecommendationEngine(p2f, p2n))
+            for step in range(30):
+                name, change = rng.choice(people), rng.random()
+                if change < 0.4:
+                    cache.add_to_friends(name, rng.choice(people))
+                elif change < 0.6 and name in p2f:
+                    cache.remove_from_friends(name, rng.choice(p2f[name]))
+                elif change < 0.8:
+                    cache.add_to_network(name, rng.choice(['Chess Club', 'Choir']))
+                else:
+                    cache.remove_from_network(name, rng.choice(['Chess Club', 'Choir']))
+                for person in p2f:
+                    actual = cache.make_recommendations(person)
+                    expected = network_functions.make_recommendations(person, p2f, p2n)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,110 @@
+import random
+import unittest
+from unittest import mock
+import network_functions
+from recommendation_engine import RecommendationEngine
+
+
+def random_profiles(seed, size):
+    """Return a random (person_to_friends, person_to_networks) pair with
+    asymmetric friendships, people who only appear as friends and shared
+    last names.
+    """
+
+    rng = random.Random(seed)
+    names = ['{} {}'.format(first, last) for first in
+             ['Ann', 'Bo', 'Cy', 'Di', 'Ed', 'Flo', 'Gus', 'Hal']
+             for last in ['Dunphy', 'Tucker', 'Pritchett'][:1 + size // 10]]
+    names = names[:size]
+    networks = ['Chess Club', 'Orchestra', 'Law Association', 'Clown School']
+    person_to_friends = {}
+    person_to_networks = {}
+    for name in names[:len(names) * 3 // 4]:
+        for friend in rng.sample(names, rng.randint(0, 5)):
+            if friend != name:
+                network_functions.add_to_friends(name, friend, person_to_friends)
+    for name in names:
+        for network in rng.sample(networks, rng.randint(0, 2)):
+            network_functions.add_to_network(name, network, person_to_networks)
+    return person_to_friends, person_to_networks
+
+
+class TestRecommendationEngine(unittest.TestCase):
+
+    def test_make_recommendations_empty(self):
+        engine = RecommendationEngine({}, {})
+        actual = engine.make_recommendations('Jay Pritchett')
+        expected = []
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_sample(self):
+        engine = RecommendationEngine(network_functions.P2F, network_functions.P2N)
+        for person in network_functions.P2F:
+            actual = engine.make_recommendations(person)
+            expected = network_functions.make_recommendations(
+                person, network_functions.P2F, network_functions.P2N)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            engine = RecommendationEngine(p2f, p2n)
+            for person in p2f:
+                actual = engine.make_recommendations(person)
+                expected = network_functions.make_recommendations(person, p2f, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+    def test_make_top_recommendations_random(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            engine = RecommendationEngine(p2f, p2n)
+            for person in p2f:
+                for k in range(6):
+                    actual = engine.make_top_recommendations(person, k)
+                    expected = network_functions.make_recommendations(person, p2f, p2n)[:k]
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+    def test_make_top_recommendations_capped_random(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            engine = RecommendationEngine(p2f, p2n, max_network_expansion=2)
+            for person in p2f:
+                for k in range(6):
+                    actual = engine.make_top_recommendations(person, k)
+                    expected = engine.make_recommendations(person)[:k]
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+    def test_make_top_recommendations_stops_early(self):
+        # Ann Young shares 10 friends with Top Zane and one with each Cy.
+        friends = ['Fay {}'.format(i) for i in range(10)]
+        p2f = {'Ann Young': friends}
+        for i, friend in enumerate(friends):
+            p2f[friend] = ['Ann Young', 'Top Zane', 'Cy {}'.format(i)]
+        p2n = {'Ann Young': ['Chess Club'], 'Bo Vance': ['Chess Club']}
+        engine = RecommendationEngine(p2f, p2n)
+        with mock.patch.object(engine, '_score_candidate',
+                               wraps=engine._score_candidate) as score:
+            actual = engine.make_top_recommendations('Ann Young', 1)
+        expected = network_functions.make_recommendations('Ann Young', p2f, p2n)[:1]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        self.assertEqual(score.call_count, 1)
+
+
+    def test_make_recommendations_unknown_person(self):
+        engine = RecommendationEngine(network_functions.P2F, network_functions.P2N)
+        self.assertRaises(KeyError, engine.make_recommendations, 'John Smith')
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
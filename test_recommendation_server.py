@@ -0,0 +1,104 @@
+import asyncio
+import time
+import unittest
+import network_functions
+from load_generator import run_load
+from recommendation_engine import RecommendationEngine
+from recommendation_server import RecommendationServer
+
+
+class SlowEngine(RecommendationEngine):
+
+    def make_recommendations(self, person):
+        time.sleep(0.05)
+        return RecommendationEngine.make_recommendations(self, person)
+
+
+class BrokenEngine(RecommendationEngine):
+
+    def make_recommendations(self, person):
+        raise RuntimeError('broken')
+
+
+class TestRecommendationServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        engine = SlowEngine(network_functions.P2F, network_functions.P2N)
+        self.service = RecommendationServer(engine)
+        self.server = await self.service.start('127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+    async def test_server_answers(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b'Jay Pritchett\nJohn Smith\n')
+        actual = [await reader.readline(), await reader.readline()]
+        writer.close()
+        expected = [b'{"person": "Jay Pritchett", "recommendations": [["Mitchell Pritchett", 2], '
+                    b'["Cameron Tucker", 1], ["Luke Dunphy", 1], ["Phil Dunphy", 1]]}\n',
+                    b'{"person": "John Smith", "error": "unknown person"}\n']
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    async def test_server_invalid_utf8(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b'Jay \xffPritchett\nJohn Smith\n')
+        actual = [await reader.readline(), await reader.readline()]
+        writer.close()
+        expected = [b'{"person": "Jay \\ufffdPritchett", "error": "invalid UTF-8"}\n',
+                    b'{"person": "John Smith", "error": "unknown person"}\n']
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    async def test_server_line_too_long(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b'x' * 200000 + b'\nJohn Smith\n')
+        actual = [await reader.readline(), await reader.readline()]
+        writer.close()
+        expected = [b'{"error": "line too long"}\n',
+                    b'{"person": "John Smith", "error": "unknown person"}\n']
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    async def test_server_internal_error(self):
+        engine = BrokenEngine(network_functions.P2F, network_functions.P2N)
+        server = await RecommendationServer(engine).start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'Jay Pritchett\nJay Pritchett\n')
+        actual = [await reader.readline(), await reader.readline()]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        expected = [b'{"person": "Jay Pritchett", "error": "internal error"}\n'] * 2
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    async def test_server_coalesces_requests(self):
+        results = await asyncio.gather(*[self.service.recommend('Claire Dunphy')
+                                         for i in range(5)])
+        actual = (self.service.computed, results[0] == results[4])
+        expected = (1, True)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    async def test_load_generator(self):
+        report = await run_load('127.0.0.1', self.port, list(network_functions.P2F), 20, 4)
+        actual = (report['requests'], report['errors'], report['qps'] > 0)
+        expected = (20, 0, True)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
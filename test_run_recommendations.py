@@ -0,0 +1,30 @@
+import unittest
+import network_functions
+from graph_store import GraphStore
+from parallel_runner import run_recommendations
+from test_recommendation_engine import random_profiles
+
+
+class TestRunRecommendations(unittest.TestCase):
+
+    def test_run_recommendations_empty(self):
+        store = GraphStore.from_dicts(network_functions.P2F, network_functions.P2N)
+        actual = list(run_recommendations([], store, 2))
+        expected = []
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_run_recommendations_in_order(self):
+        p2f, p2n = random_profiles(3, 24)
+        people = list(p2f) * 3
+        store = GraphStore.from_dicts(p2f, p2n)
+        actual = list(run_recommendations(people, store, 2, shard_size=5))
+        expected = [(person, network_functions.make_recommendations(person, p2f, p2n))
+                    for person in people]
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
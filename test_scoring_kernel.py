@@ -0,0 +1,59 @@
+import unittest
+import network_functions
+from scoring_kernel import ScoringKernel
+from test_recommendation_engine import random_profiles
+
+
+class TestScoringKernel(unittest.TestCase):
+
+    def test_scoring_random(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            kernel = ScoringKernel(p2f, p2n)
+            people = sorted(set(p2f) | set(p2n) |
+                            {f for friends in p2f.values() for f in friends})
+            for person1 in people + ['John Smith']:
+                for person2 in people:
+                    actual = kernel.scoring(person1, person2)
+                    expected = network_functions.scoring(person1, person2, p2f, p2n)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            kernel = ScoringKernel(p2f, p2n)
+            for person in p2f:
+                actual = kernel.make_recommendations(person)
+                expected = network_functions.make_recommendations(person, p2f, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+    def test_sparse_networks_random(self):
+        # With fewer mask bits than networks, some networks are kept as
+        # sorted id tuples instead of bits.
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 24)
+            for mask_bits in [0, 2]:
+                kernel = ScoringKernel(p2f, p2n, mask_bits)
+                for person in p2f:
+                    actual = kernel.make_recommendations(person)
+                    expected = network_functions.make_recommendations(person, p2f, p2n)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+    def test_make_recommendations_not_a_key(self):
+        kernel = ScoringKernel(network_functions.P2F, network_functions.P2N)
+        with self.assertRaises(KeyError):
+            kernel.make_recommendations('Chairman D-Cat')
+        actual = ScoringKernel({}, network_functions.P2N).make_recommendations('Claire Dunphy')
+        expected = []
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
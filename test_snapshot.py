@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+import network_functions
+from graph_store import GraphStore
+from snapshot import save_snapshot, load_snapshot, is_current, HEADER, MAGIC, TABLE
+from test_recommendation_engine import random_profiles
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'profiles.snap')
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_snapshot_empty(self):
+        save_snapshot(self.path, GraphStore.from_dicts({}, {}))
+        snapshot = load_snapshot(self.path)
+        actual = (dict(snapshot.store.person_to_friends()),
+                  snapshot.scorer.make_recommendations('Jay Pritchett'))
+        expected = ({}, [])
+        snapshot.close()
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_snapshot_round_trip(self):
+        for seed in range(5):
+            p2f, p2n = random_profiles(seed, 24)
+            save_snapshot(self.path, GraphStore.from_dicts(p2f, p2n))
+            snapshot = load_snapshot(self.path)
+            actual = (dict(snapshot.store.person_to_friends()),
+                      dict(snapshot.store.person_to_networks()),
+                      {network: snapshot.members_of(network)
+                       for network in snapshot.store.network_names},
+                      [snapshot.scorer.make_recommendations(person) for person in p2f])
+            inverted = network_functions.invert_network(p2n)
+            expected = (p2f, p2n, {network: sorted(inverted[network]) for network in inverted},
+                        [network_functions.make_recommendations(person, p2f, p2n)
+                         for person in p2f])
+            snapshot.close()
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_snapshot_not_a_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'Pritchett, Jay\nDunphy, Claire\n')
+        self.assertRaises(ValueError, load_snapshot, self.path)
+
+
+    def test_snapshot_unsupported_version(self):
+        with open(self.path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 99, 0, 0))
+        self.assertRaises(ValueError, load_snapshot, self.path)
+
+
+    def test_snapshot_truncated(self):
+        save_snapshot(self.path, GraphStore.from_dicts(network_functions.P2F,
+                                                       network_functions.P2N))
+        size = os.path.getsize(self.path)
+        for cut in [HEADER.size + 3, size - 1]:
+            with open(self.path, 'r+b') as f:
+                f.truncate(cut)
+            self.assertRaises(ValueError, load_snapshot, self.path)
+
+
+    def test_snapshot_bad_offset(self):
+        save_snapshot(self.path, GraphStore.from_dicts(network_functions.P2F,
+                                                       network_functions.P2N))
+        with open(self.path, 'r+b') as f:
+            f.seek(HEADER.size)
+            f.write(TABLE.pack(b'q', 1 << 40, 16))
+        self.assertRaises(ValueError, load_snapshot, self.path)
+
+
+    def test_is_current(self):
+        profiles = os.path.join(self.directory.name, 'profiles.txt')
+        self.assertFalse(is_current(self.path, [profiles]))
+        save_snapshot(self.path, GraphStore.from_dicts({}, {}))
+        self.assertTrue(is_current(self.path, [profiles]))
+        with open(profiles, 'w') as f:
+            f.write('Pritchett, Jay\n')
+        os.utime(self.path, (0, 0))
+        self.assertFalse(is_current(self.path, [profiles]))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,58 @@
+import random
+import unittest
+import network_functions
+from network_functions import add_to_friends, remove_from_friends
+from test_recommendation_engine import random_profiles
+from symmetric_graph import SymmetricGraph
+
+
+class TestSymmetricGraph(unittest.TestCase):
+
+    def assertMatches(self, graph, p2f):
+        people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+        for person1 in people + ['John Smith']:
+            bulk = graph.get_mutual_friend_scores(person1)
+            for person2 in people:
+                for name in ['mutual_friend_type_1', 'mutual_friend_type_2',
+                             'get_mutual_friend_score']:
+                    actual = getattr(graph, name)(person1, person2)
+                    expected = getattr(network_functions, name)(person1, person2, p2f)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+                if person1 in p2f and person2 in p2f:
+                    actual = graph.mutual_friend_type_3(person1, person2)
+                    expected = network_functions.mutual_friend_type_3(person1, person2, p2f)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+                expected = network_functions.get_mutual_friend_score(person1, person2, p2f)
+                self.assertEqual(bulk.get(person2, 0), expected)
+
+
+    def test_scores_random(self):
+        for seed in range(10):
+            p2f, p2n = random_profiles(seed, 16)
+            self.assertMatches(SymmetricGraph(p2f), p2f)
+
+
+    def test_edges_random(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 16)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            graph = SymmetricGraph(p2f)
+            for step in range(40):
+                name, friend = rng.choice(people), rng.choice(people)
+                if rng.random() < 0.5:
+                    add_to_friends(name, friend, p2f)
+                    graph.add_edge(name, friend)
+                else:
+                    remove_from_friends(name, friend, p2f)
+                    graph.remove_edge(name, friend)
+            fresh = SymmetricGraph(p2f)
+            self.assertEqual((graph.forward, graph.reverse, graph.reciprocal),
+                             (fresh.forward, fresh.reverse, fresh.reciprocal))
+            self.assertMatches(graph, p2f)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
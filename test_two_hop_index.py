@@ -0,0 +1,47 @@
+import copy
+import random
+import unittest
+import network_functions
+from test_recommendation_engine import random_profiles
+from two_hop_index import TwoHopIndex
+
+
+class TestTwoHopIndex(unittest.TestCase):
+
+    def assertMatches(self, index, p2f, people):
+        for person in people:
+            actual = index.get_friends_of_friends(person)
+            expected = network_functions.get_friends_of_friends(p2f, person)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+            counted = index.get_friends_of_friends(person, counted=True)
+            self.assertEqual([name for name, count in counted for i in range(count)],
+                             expected)
+            self.assertEqual(len(counted), len(set(expected)))
+
+
+    def test_get_friends_of_friends_random(self):
+        for seed in range(20):
+            p2f, p2n = random_profiles(seed, 24)
+            self.assertMatches(TwoHopIndex(p2f), p2f, list(p2f) + ['John Smith'])
+
+
+    def test_refresh_random(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            index = TwoHopIndex(copy.deepcopy(p2f))
+            for step in range(60):
+                name, friend = rng.choice(people), rng.choice(people)
+                if rng.random() < 0.5:
+                    index.add_to_friends(name, friend)
+                else:
+                    index.remove_from_friends(name, friend)
+                self.assertMatches(index, index.person_to_friends, people)
+            fresh = TwoHopIndex(copy.deepcopy(index.person_to_friends))
+            self.assertEqual(index.nbytes(), fresh.nbytes())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,262 @@
+import copy
+import random
+import threading
+import unittest
+from unittest import mock
+import network_functions
+from family_index import FamilyIndex
+from network_index import NetworkIndex
+from recommendation_engine import RecommendationEngine
+from symmetric_graph import SymmetricGraph
+from test_recommendation_engine import random_profiles
+from versioned_graph import VersionedGraph, QueryExecutor, LayeredDict, REMOVED
+
+
+def symmetric_profiles(seed, size):
+    """Return random profiles in which every friendship goes both ways.
+    """
+
+    p2f, p2n = random_profiles(seed, size)
+    symmetric = {}
+    for person, friends in p2f.items():
+        for friend in friends:
+            if friend != person:
+                network_functions.add_to_friends(person, friend, symmetric)
+                network_functions.add_to_friends(friend, person, symmetric)
+    return symmetric, p2n
+
+
+class TestVersionedGraph(unittest.TestCase):
+
+    def test_batches_match_dicts(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 24)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            networks = ['Chess Club', 'Orchestra', 'Glee Club']
+            graph = VersionedGraph(p2f, p2n)
+            versions = [(graph.snapshot(), {k: list(v) for k, v in p2f.items()},
+                         {k: list(v) for k, v in p2n.items()})]
+            for step in range(20):
+                with graph.batch() as batch:
+                    for change in range(3):
+                        name = rng.choice(people)
+                        if rng.random() < 0.5:
+                            friend = rng.choice(people)
+                            batch.add_to_friends(name, friend)
+                            network_functions.add_to_friends(name, friend, p2f)
+                        else:
+                            network = rng.choice(networks)
+                            batch.remove_from_network(name, network)
+                            network_functions.remove_from_network(name, network, p2n)
+                versions.append((graph.snapshot(), {k: list(v) for k, v in p2f.items()},
+                                 {k: list(v) for k, v in p2n.items()}))
+            # Earlier versions are unchanged by later batches.
+            for version, friends, networks_of in versions:
+                actual = ({k: list(v) for k, v in version.person_to_friends.items()},
+                          {k: list(v) for k, v in version.person_to_networks.items()})
+                expected = (friends, networks_of)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+            for person in p2f:
+                actual = graph.snapshot().make_recommendations(person)
+                expected = network_functions.make_recommendations(person, p2f, p2n)
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+    def test_read_only_helpers_on_versions(self):
+        p2f, p2n = random_profiles(7, 24)
+        graph = VersionedGraph(p2f, p2n)
+        p2f, p2n = copy.deepcopy(p2f), copy.deepcopy(p2n)
+        with graph.batch() as batch:
+            batch.add_to_friends('Ann Dunphy', 'Bo Tucker')
+            batch.add_to_network('Bo Tucker', 'Glee Club')
+        network_functions.add_to_friends('Ann Dunphy', 'Bo Tucker', p2f)
+        network_functions.add_to_network('Bo Tucker', 'Glee Club', p2n)
+        version = graph.snapshot()
+        f, n = version.person_to_friends, version.person_to_networks
+        helpers = [
+            lambda f, n: network_functions.get_average_friend_count(f),
+            lambda f, n: network_functions.get_families(f),
+            lambda f, n: network_functions.invert_network(n),
+            lambda f, n: [network_functions.get_friends_of_friends(f, p) for p in sorted(p2f)],
+            lambda f, n: [network_functions.make_recommendations(p, f, n) for p in sorted(p2f)]]
+        for helper in helpers:
+            actual = helper(f, n)
+            expected = helper(p2f, p2n)
+            msg = "Expected {}, but returned {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+
+    def test_every_version_matches_dicts(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            p2f, p2n = random_profiles(seed, 16)
+            people = sorted(set(p2f) | {f for friends in p2f.values() for f in friends})
+            networks = ['Chess Club', 'Orchestra', 'Glee Club']
+            graph = VersionedGraph(p2f, p2n)
+            versions = []
+            for step in range(150):
+                name = rng.choice(people)
+                change = rng.randrange(4)
+                if change == 0:
+                    friend = rng.choice(people)
+                    graph.add_to_friends(name, friend)
+                    network_functions.add_to_friends(name, friend, p2f)
+                elif change == 1:
+                    friend = rng.choice(people)
+                    graph.remove_from_friends(name, friend)
+                    network_functions.remove_from_friends(name, friend, p2f)
+                elif change == 2:
+                    network = rng.choice(networks)
+                    graph.add_to_network(name, network)
+                    network_functions.add_to_network(name, network, p2n)
+                else:
+                    network = rng.choice(networks)
+                    graph.remove_from_network(name, network)
+                    network_functions.remove_from_network(name, network, p2n)
+                if step % 10 == 0:
+                    versions.append((graph.snapshot(), copy.deepcopy(p2f), copy.deepcopy(p2n)))
+            for version, friends, networks_of in versions:
+                for person in friends:
+                    actual = version.make_recommendations(person)
+                    expected = network_functions.make_recommendations(person, friends, networks_of)
+                    msg = "Expected {}, but returned {}".format(expected, actual)
+                    self.assertEqual(actual, expected, msg)
+
+
+    def test_one_edge_batch_does_not_rebuild(self):
+        p2f, p2n = random_profiles(3, 24)
+        graph = VersionedGraph(p2f, p2n)
+        before = graph.snapshot()
+        rebuilt = AssertionError('indexes rebuilt')
+        with mock.patch.object(RecommendationEngine, '__init__', side_effect=rebuilt), \
+             mock.patch.object(SymmetricGraph, '__init__', side_effect=rebuilt), \
+             mock.patch.object(NetworkIndex, '__init__', side_effect=rebuilt), \
+             mock.patch.object(FamilyIndex, '__init__', side_effect=rebuilt):
+            graph.add_to_friends('Alex Dunphy', 'Jay Pritchett')
+            graph.snapshot().make_recommendations('Alex Dunphy')
+        after = graph.snapshot()
+        # The new version shares the tables of the old one, plus one layer.
+        actual = (after.tables.forward.layers[0] is before.tables.forward.layers[0],
+                  after.tables.forward.layers[-1])
+        expected = (True, {'Alex Dunphy': after.tables.forward['Alex Dunphy']})
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_network_join_shares_members(self):
+        p2n = {'Person {}'.format(i): ['Chess Club'] for i in range(1000)}
+        graph = VersionedGraph({'Person 0': ['Person 1']}, p2n)
+        before = graph.snapshot()
+        graph.add_to_network('Alex Dunphy', 'Chess Club')
+        graph.remove_from_network('Person 5', 'Chess Club')
+        members = graph.snapshot().tables.members['Chess Club']
+        # The members of the network are shared; the two batches' layers merge.
+        actual = (members.layers[0] is before.tables.members['Chess Club'].layers[0],
+                  members.layers[1:], len(members), 'Person 5' in members)
+        expected = (True, ({'Alex Dunphy': True, 'Person 5': REMOVED},), 1000, False)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_layered_dict_merges(self):
+        expected = {}
+        layered = LayeredDict()
+        rng = random.Random(0)
+        for step in range(500):
+            key = rng.randrange(50)
+            if rng.random() < 0.3:
+                layered = layered.updated({key: REMOVED})
+                expected.pop(key, None)
+            else:
+                layered = layered.updated({key: step})
+                expected[key] = step
+        actual = (dict(layered), len(layered), len(layered.layers) <= 8)
+        expected = (expected, len(expected), True)
+        msg = "Expected {}, but returned {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_failed_batch_not_published(self):
+        graph = VersionedGraph(network_functions.P2F, network_functions.P2N)
+        with self.assertRaises(ValueError):
+            with graph.batch() as batch:
+                batch.add_to_friends('Alex Dunphy', 'Jay Pritchett')
+                raise ValueError()
+        version = graph.snapshot()
+        self.assertEqual(version.epoch, 0)
+        self.assertEqual(version.person_to_friends['Alex Dunphy'], ('Luke Dunphy',))
+
+
+    def test_stress_readers_see_whole_batches(self):
+        p2f, p2n = symmetric_profiles(7, 24)
+        people = sorted(p2f)
+        graph = VersionedGraph(p2f, p2n)
+        done = threading.Event()
+        errors = []
+
+        def write():
+            rng = random.Random(0)
+            try:
+                for step in range(300):
+                    with graph.batch() as batch:
+                        for change in range(4):
+                            name, friend = rng.sample(people, 2)
+                            if rng.random() < 0.5:
+                                batch.add_to_friends(name, friend)
+                                batch.add_to_friends(friend, name)
+                            else:
+                                batch.remove_from_friends(name, friend)
+                                batch.remove_from_friends(friend, name)
+            finally:
+                done.set()
+
+        def read():
+            epoch = -1
+            while not done.is_set():
+                version = graph.snapshot()
+                if version.epoch < epoch:
+                    errors.append('epoch went back')
+                epoch = version.epoch
+                friends = version.person_to_friends
+                for person in friends:
+                    for friend in friends[person]:
+                        if person not in friends.get(friend, ()):
+                            errors.append('half-applied batch {}'.format(epoch))
+
+        readers = [threading.Thread(target=read) for i in range(4)]
+        writer = threading.Thread(target=write)
+        for thread in readers + [writer]:
+            thread.start()
+        with QueryExecutor(graph, 4) as executor:
+            while not done.is_set():
+                for epoch, recommendations in executor.map(people[:6]):
+                    self.assertGreaterEqual(epoch, 0)
+        for thread in readers + [writer]:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(graph.snapshot().epoch, 300)
+
+
+    def test_query_executor_consistent(self):
+        p2f, p2n = random_profiles(4, 24)
+        graph = VersionedGraph(p2f, p2n)
+        graph.add_to_network(next(iter(p2f)), 'Glee Club')
+        version = graph.snapshot()
+        with QueryExecutor(graph, 3) as executor:
+            futures = [executor.submit(person) for person in p2f]
+            graph.add_to_friends(next(iter(p2f)), 'John Smith')
+            for person, future in zip(p2f, futures):
+                epoch, actual = future.result()
+                snapshot = version if epoch == 1 else graph.snapshot()
+                expected = network_functions.make_recommendations(
+                    person, dict(snapshot.person_to_friends),
+                    dict(snapshot.person_to_networks))
+                msg = "Expected {}, but returned {}".format(expected, actual)
+                self.assertEqual(actual, expected, msg)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,181 @@
+from array import array
+from bisect import bisect_left
+from typing import List, Tuple, Dict
+from network_functions import add_to_friends, remove_from_friends, P2F
+
+
+class TwoHopIndex:
+    """A materialized index of the friends of friends of everyone in
+    person_to_friends. For each person it stores the distinct ids of the
+    people in their get_friends list (the friends of their friends) in an
+    array sorted by name, with the number of times each one appears in a
+    parallel count array, instead of the duplicate-laden list of names.
+    Queries then read the arrays in order, without sorting.
+
+    Changes to the graph must go through add_to_friends and
+    remove_from_friends, which refresh only the entries they affect: the
+    person whose friends change, and the people who list them as a friend.
+
+    >>> index = TwoHopIndex(P2F)
+    >>> index.get_friends_of_friends('Claire Dunphy')
+    ['Cameron Tucker', 'Gloria Pritchett', 'Luke Dunphy', 'Luke Dunphy', \
+'Manny Delgado']
+    >>> index.get_friends_of_friends('Claire Dunphy', counted=True)
+    [('Cameron Tucker', 1), ('Gloria Pritchett', 1), ('Luke Dunphy', 2), \
+('Manny Delgado', 1)]
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]]) -> None:
+        """Index the friends of friends of everyone in person_to_friends, which
+        must not have duplicate friends.
+        """
+
+        self.person_to_friends = person_to_friends
+        self._ids = {}
+        self._names = []
+        self._listed_by = {}
+        self._entries = {}
+
+        for person in person_to_friends:
+            person_id = self._id_of(person)
+            for friend in person_to_friends[person]:
+                self._listed_by.setdefault(self._id_of(friend), set()).add( \
+                    person_id)
+        for person in person_to_friends:
+            self._rebuild(person)
+
+    def _id_of(self, name: str) -> int:
+        """Return the id of name, giving them a new one if they have none.
+        """
+
+        person_id = self._ids.get(name)
+        if person_id is None:
+            person_id = len(self._names)
+            self._ids[name] = person_id
+            self._names.append(name)
+        return person_id
+
+    def _rebuild(self, person: str) -> None:
+        """Recompute the entry of person from person_to_friends.
+        """
+
+        counts = {}
+        for friend in self.person_to_friends.get(person, []):
+            for friend_of_friend in self.person_to_friends.get(friend, []):
+                friend_id = self._ids[friend_of_friend]
+                counts[friend_id] = counts.get(friend_id, 0) + 1
+
+        person_id = self._ids[person]
+        if counts:
+            ids = sorted(counts, key=self._names.__getitem__)
+            self._entries[person_id] = (array('i', ids), \
+                                        array('i', [counts[i] for i in ids]))
+        else:
+            self._entries.pop(person_id, None)
+
+    def _add_count(self, person_id: int, friend_id: int, count: int) -> None:
+        """Add count to the number of times friend_id is a friend of a friend
+        of person_id.
+        """
+
+        ids, counts = self._entries.setdefault(person_id, \
+                                               (array('i'), array('i')))
+        i = bisect_left(ids, self._names[friend_id], \
+                        key=self._names.__getitem__)
+        if i < len(ids) and ids[i] == friend_id:
+            counts[i] += count
+            if counts[i] == 0:
+                del ids[i]
+                del counts[i]
+                if not ids:
+                    del self._entries[person_id]
+        else:
+            ids.insert(i, friend_id)
+            counts.insert(i, count)
+
+    def _refresh(self, name: str, friend: str, count: int) -> None:
+        """Refresh the entries affected by count (1 or -1) friendships from
+        name to friend, once person_to_friends has the change.
+        """
+
+        name_id = self._ids[name]
+        friend_id = self._ids[friend]
+        self._rebuild(name)
+        for person_id in self._listed_by.get(name_id, set()):
+            if person_id != name_id:
+                self._add_count(person_id, friend_id, count)
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend as a value to name in person_to_friends and refresh the
+        index.
+
+        >>> index = TwoHopIndex({'Jay Pritchett': ['Claire Dunphy']})
+        >>> index.add_to_friends('Claire Dunphy', 'Phil Dunphy')
+        >>> index.get_friends_of_friends('Jay Pritchett', counted=True)
+        []
+        >>> index.add_to_friends('Claire Dunphy', 'Jay Pritchett')
+        >>> index.get_friends_of_friends('Jay Pritchett', counted=True)
+        [('Phil Dunphy', 1)]
+        """
+
+        if friend in self.person_to_friends.get(name, []):
+            return
+        add_to_friends(name, friend, self.person_to_friends)
+        name_id = self._id_of(name)
+        self._listed_by.setdefault(self._id_of(friend), set()).add(name_id)
+        self._refresh(name, friend, 1)
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the values of name in person_to_friends and
+        refresh the index.
+        """
+
+        if friend not in self.person_to_friends.get(name, []):
+            return
+        remove_from_friends(name, friend, self.person_to_friends)
+        self._listed_by[self._ids[friend]].discard(self._ids[name])
+        self._refresh(name, friend, -1)
+
+    def get_friends_of_friends(self, person: str, counted: bool = False) -> \
+                               List:
+        """Return the same list as get_friends_of_friends for person, or if
+        counted is true, the list of the distinct names in it paired with the
+        number of times they appear.
+        """
+
+        if person not in self.person_to_friends:
+            return []
+        person_id = self._ids[person]
+        ids, counts = self._entries.get(person_id, ((), ()))
+
+        # get_friends_of_friends only lists anyone when person is a friend of
+        # one of their friends.
+        names = self._names
+        i = bisect_left(ids, person, key=names.__getitem__)
+        if i == len(ids) or ids[i] != person_id:
+            return []
+
+        if counted:
+            return [(names[j], count) for j, count in zip(ids, counts) \
+                    if j != person_id]
+        if max(counts) == 1:
+            friends_of_friends = list(map(names.__getitem__, ids))
+            del friends_of_friends[i]
+            return friends_of_friends
+        friends_of_friends = []
+        for j, count in zip(ids, counts):
+            if j != person_id:
+                friends_of_friends.extend([names[j]] * count)
+        return friends_of_friends
+
+    def nbytes(self) -> int:
+        """Return the number of bytes taken by the id and count arrays.
+        """
+
+        return sum(ids.itemsize * len(ids) * 2 for ids, counts \
+                   in self._entries.values())
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,512 @@
+import sys
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
+from typing import List, Tuple, Dict, Iterable, Iterator, Hashable, Callable
+from family_index import FamilyIndex
+from network_functions import add_to_friends, add_to_network, \
+    remove_from_friends, remove_from_network, invert_network, get_last_name, \
+    P2F, P2N
+from network_index import NetworkIndex
+from recommendation_engine import RecommendationEngine
+from symmetric_graph import SymmetricGraph
+
+# The value of a key removed in a layer of a LayeredDict.
+REMOVED = object()
+_ABSENT = object()
+
+
+class LayeredDict(Mapping):
+    """An immutable dictionary made of a stack of dictionaries, each one
+    overriding the ones below it, with REMOVED as the value of the keys it
+    removes. updated returns a new LayeredDict that shares the layers of this
+    one and adds a layer of changes on top. The top layers are merged the way
+    a binary counter carries, whenever a layer is no larger than the one on
+    top of it, so a dictionary of n keys has O(log n) layers and each change
+    is copied O(log n) times.
+
+    >>> first = LayeredDict({'a': 1, 'b': 2})
+    >>> second = first.updated({'b': REMOVED, 'c': 3})
+    >>> dict(first), dict(second), len(second)
+    ({'a': 1, 'b': 2}, {'a': 1, 'c': 3}, 2)
+    """
+
+    def __init__(self, base: Dict[Hashable, object] = None) -> None:
+        """Initialize a LayeredDict holding the items of base, which must not
+        be modified afterwards.
+        """
+
+        self.layers = (base,) if base else ()
+        self._length = len(base) if base else 0
+
+    def __getitem__(self, key: Hashable) -> object:
+        value = self.get(key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        for layer in reversed(self.layers):
+            value = layer.get(key, _ABSENT)
+            if value is not _ABSENT:
+                return default if value is REMOVED else value
+        return default
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _ABSENT) is not _ABSENT
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Hashable]:
+        merged = {}
+        for layer in self.layers:
+            merged.update(layer)
+        return (key for key, value in merged.items() if value is not REMOVED)
+
+    def updated(self, changes: Dict[Hashable, object]) -> 'LayeredDict':
+        """Return a LayeredDict with the items of this one changed by changes,
+        which must not be modified afterwards.
+        """
+
+        if not changes:
+            return self
+        length = self._length
+        for key, value in changes.items():
+            length += (value is not REMOVED) - (key in self)
+        layers = list(self.layers) + [changes]
+        while len(layers) > 1 and len(layers[-2]) <= len(layers[-1]):
+            top = layers.pop()
+            merged = dict(layers.pop())
+            merged.update(top)
+            if not layers:
+                merged = {key: value for key, value in merged.items() \
+                          if value is not REMOVED}
+            layers.append(merged)
+        updated = LayeredDict()
+        updated.layers = tuple(layers)
+        updated._length = length
+        return updated
+
+
+_NO_MEMBERS = LayeredDict()
+
+
+def _changed_sets(table: LayeredDict, \
+                  changes: List[Tuple[str, Tuple[bool, str]]]) -> \
+                  Dict[str, object]:
+    """Return the layer of changes to the frozensets of table that adds (if
+    the flag is true) or removes the values of changes, given by key.
+    """
+
+    sets = {}
+    for key, (add, value) in changes:
+        if key not in sets:
+            sets[key] = set(table.get(key, ()))
+        if add:
+            sets[key].add(value)
+        else:
+            sets[key].discard(value)
+    return {key: frozenset(values) if values else REMOVED \
+            for key, values in sets.items()}
+
+
+class VersionTables:
+    """The tables of a version of a VersionedGraph: person_to_friends and
+    person_to_networks as LayeredDicts of tuples, and the indexes of a
+    RecommendationEngine as LayeredDicts of frozensets, with the members of
+    each network as a nested LayeredDict, so that a version shares everything
+    but the changed entries with the one it was made from.
+
+    Publishing a change costs O(log n) per changed entry, except that the
+    friend, reverse and reciprocal sets of a person whose friendships change
+    are copied whole, so a friendship change costs O(degree) too. A network
+    join or leave only adds to the layers of the network's members.
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]]) -> None:
+        """Build the tables of person_to_friends and person_to_networks.
+        """
+
+        graph = SymmetricGraph(person_to_friends)
+        self.person_to_friends = LayeredDict( \
+            {name: tuple(friends) for name, friends \
+             in person_to_friends.items()})
+        self.person_to_networks = LayeredDict( \
+            {name: tuple(networks) for name, networks \
+             in person_to_networks.items()})
+        self.forward, self.reverse, self.reciprocal = \
+            [LayeredDict({name: frozenset(values) for name, values \
+                          in table.items()}) \
+             for table in [graph.forward, graph.reverse, graph.reciprocal]]
+        people = set(graph.forward) | set(graph.reverse)
+        self.people = LayeredDict(dict.fromkeys(people, True))
+        # Interned, so that equal last names compare by identity.
+        self.last_names = LayeredDict( \
+            {name: sys.intern(get_last_name(name)) for name in people})
+        # The members of each network, as a LayeredDict of its own, so that
+        # a join or a leave adds a layer instead of copying the network.
+        members = invert_network(person_to_networks)
+        self.members = LayeredDict({network: LayeredDict( \
+            dict.fromkeys(names, True)) for network, names in members.items()})
+        self.member_sets = self.members
+
+    def updated(self, friends: Dict[str, List[str]], \
+                networks: Dict[str, List[str]], \
+                friend_pairs: Iterable[Tuple[str, str]], \
+                network_pairs: Iterable[Tuple[str, str]]) -> 'VersionTables':
+        """Return the tables of the next version, in which the people of
+        friends and networks have those lists of friends and networks (None
+        if they have none), and friend_pairs and network_pairs are the
+        (name, friend) and (name, network) pairs that may have changed.
+        """
+
+        tables = VersionTables.__new__(VersionTables)
+        tables.person_to_friends = self.person_to_friends.updated( \
+            {name: REMOVED if values is None else tuple(values) \
+             for name, values in friends.items()})
+        tables.forward = self.forward.updated( \
+            {name: REMOVED if values is None else frozenset(values) \
+             for name, values in friends.items()})
+
+        reverse = []
+        reciprocal = []
+        for name, friend in friend_pairs:
+            listed = friend in tables.forward.get(name, ())
+            if listed != (friend in self.forward.get(name, ())):
+                reverse.append((friend, (listed, name)))
+            mutual = listed and name in tables.forward.get(friend, ())
+            if mutual != (friend in self.reciprocal.get(name, ())):
+                reciprocal.append((name, (mutual, friend)))
+                reciprocal.append((friend, (mutual, name)))
+        tables.reverse = self.reverse.updated(_changed_sets(self.reverse, \
+                                                            reverse))
+        tables.reciprocal = self.reciprocal.updated( \
+            _changed_sets(self.reciprocal, reciprocal))
+
+        people = {}
+        last_names = {}
+        for name, friend in friend_pairs:
+            for person in [name, friend]:
+                present = person in tables.forward or person in tables.reverse
+                if present != (person in self.people):
+                    people[person] = True if present else REMOVED
+                if present and person not in self.last_names:
+                    last_names[person] = sys.intern(get_last_name(person))
+        tables.people = self.people.updated(people)
+        tables.last_names = self.last_names.updated(last_names)
+
+        tables.person_to_networks = self.person_to_networks.updated( \
+            {name: REMOVED if values is None else tuple(values) \
+             for name, values in networks.items()})
+        joins = {}
+        for name, network in network_pairs:
+            joined = network in tables.person_to_networks.get(name, ())
+            if joined != (network in self.person_to_networks.get(name, ())):
+                joins.setdefault(network, {})[name] = \
+                    True if joined else REMOVED
+        members = {}
+        for network, changes in joins.items():
+            names = self.members.get(network, _NO_MEMBERS).updated(changes)
+            members[network] = names if names else REMOVED
+        tables.members = self.members.updated(members)
+        tables.member_sets = tables.members
+        return tables
+
+
+class _VersionGraph(SymmetricGraph):
+    """A SymmetricGraph reading the tables of a version.
+    """
+
+    def __init__(self, tables: VersionTables) -> None:
+        self.forward = tables.forward
+        self.reverse = tables.reverse
+        self.reciprocal = tables.reciprocal
+
+
+class _VersionNetworks(NetworkIndex):
+    """A NetworkIndex, expanding networks in full, reading the tables of a
+    version.
+    """
+
+    def __init__(self, tables: VersionTables) -> None:
+        self.person_to_networks = tables.person_to_networks
+        self.max_expansion = None
+        self.seed = 0
+        self._members = tables.members
+        self._member_sets = tables.member_sets
+        self._samples = {}
+
+
+class _VersionFamilies(FamilyIndex):
+    """A FamilyIndex reading the last names of the tables of a version. Only
+    last_name and same_family are supported.
+    """
+
+    def __init__(self, tables: VersionTables) -> None:
+        self._last_names = tables.last_names
+        self._families = {}
+
+
+class VersionEngine(RecommendationEngine):
+    """A RecommendationEngine answering queries from the tables of a version,
+    which it shares instead of indexing the graph again. It must not be
+    modified.
+    """
+
+    def __init__(self, tables: VersionTables) -> None:
+        self.person_to_friends = tables.person_to_friends
+        self.person_to_networks = tables.person_to_networks
+        self._graph = _VersionGraph(tables)
+        self._friends = tables.forward
+        self._listed_by = tables.reverse
+        self._people = tables.people
+        self._networks = _VersionNetworks(tables)
+        self._families = _VersionFamilies(tables)
+
+
+class GraphVersion:
+    """An immutable version of a VersionedGraph. person_to_friends and
+    person_to_networks are read-only dictionaries of tuples, which the
+    functions of network_functions that only read them (such as
+    get_families, invert_network and make_recommendations) accept.
+
+    >>> version = VersionedGraph(P2F, P2N).snapshot()
+    >>> version.epoch, version.person_to_friends['Alex Dunphy']
+    (0, ('Luke Dunphy',))
+    >>> version.make_recommendations('Alex Dunphy')
+    [('Manny Delgado', 2), ('Phil Dunphy', 2), ('Mitchell Pritchett', 1)]
+    """
+
+    def __init__(self, epoch: int, tables: VersionTables) -> None:
+        """Initialize version epoch of a graph, made of tables.
+        """
+
+        self.epoch = epoch
+        self.tables = tables
+        self.person_to_friends = tables.person_to_friends
+        self.person_to_networks = tables.person_to_networks
+        self._engine = VersionEngine(tables)
+
+    def engine(self) -> RecommendationEngine:
+        """Return the RecommendationEngine of this version. It must not be
+        modified.
+        """
+
+        return self._engine
+
+    def make_recommendations(self, person: str) -> List[Tuple[str, int]]:
+        """Return the same list as make_recommendations for person in this
+        version.
+        """
+
+        return self._engine.make_recommendations(person)
+
+
+class GraphBatch:
+    """The changes of a VersionedGraph batch to the latest version. Only the
+    lists of the people it changes are copied, and publishing it only builds
+    the changed entries of the tables of the new version; everything else is
+    shared with the versions it was made from.
+    """
+
+    def __init__(self, version: GraphVersion) -> None:
+        """Start a batch of changes to version.
+        """
+
+        self._version = version
+        self._friends = {}
+        self._networks = {}
+        self._friend_pairs = {}
+        self._network_pairs = {}
+
+    @staticmethod
+    def _change(changed: Dict[str, List[str]], \
+                current: Mapping, mutate: Callable, name: str, \
+                value: str) -> None:
+        """Apply mutate to name and value on the list of name in changed,
+        copied from current the first time name changes. The list is None
+        when name is not a key.
+        """
+
+        if name not in changed:
+            changed[name] = list(current[name]) if name in current else None
+        person_to_values = {} if changed[name] is None \
+            else {name: changed[name]}
+        mutate(name, value, person_to_values)
+        changed[name] = person_to_values.get(name)
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Add friend as a value to name in the friends of this batch.
+        """
+
+        self._change(self._friends, self._version.person_to_friends, \
+                     add_to_friends, name, friend)
+        self._friend_pairs[(name, friend)] = None
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Add network as a value to name in the networks of this batch.
+        """
+
+        self._change(self._networks, self._version.person_to_networks, \
+                     add_to_network, name, network)
+        self._network_pairs[(name, network)] = None
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Remove friend from the values of name in the friends of this batch.
+        """
+
+        self._change(self._friends, self._version.person_to_friends, \
+                     remove_from_friends, name, friend)
+        self._friend_pairs[(name, friend)] = None
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Remove network from the values of name in the networks of this
+        batch.
+        """
+
+        self._change(self._networks, self._version.person_to_networks, \
+                     remove_from_network, name, network)
+        self._network_pairs[(name, network)] = None
+
+    def publish(self, epoch: int) -> GraphVersion:
+        """Return the version epoch made of the latest version and the
+        changes of this batch.
+        """
+
+        tables = self._version.tables.updated( \
+            self._friends, self._networks, self._friend_pairs, \
+            self._network_pairs)
+        return GraphVersion(epoch, tables)
+
+
+class VersionedGraph:
+    """A "person to friends" and "person to networks" graph with copy-on-write
+    versions, so that it can be read from many threads while it changes.
+
+    Readers take the latest GraphVersion with snapshot, without a lock, and
+    see it whole however long they keep it. Writers group changes in a batch,
+    which is published as a new version by replacing the latest version in a
+    single assignment, or dropped if the batch raises. Writers wait for each
+    other.
+
+    >>> graph = VersionedGraph(P2F, P2N)
+    >>> before = graph.snapshot()
+    >>> with graph.batch() as batch:
+    ...     batch.add_to_network('Phil Dunphy', 'Chess Club')
+    ...     batch.add_to_friends('Phil Dunphy', 'Alex Dunphy')
+    >>> graph.snapshot().make_recommendations('Alex Dunphy')[0]
+    ('Phil Dunphy', 3)
+    >>> before.person_to_networks['Phil Dunphy']
+    ('Real Estate Association',)
+    >>> graph.snapshot().epoch
+    1
+    """
+
+    def __init__(self, person_to_friends: Dict[str, List[str]], \
+                 person_to_networks: Dict[str, List[str]]) -> None:
+        """Make version 0 a copy of person_to_friends and person_to_networks.
+        """
+
+        self._version = GraphVersion(0, VersionTables(person_to_friends, \
+                                                      person_to_networks))
+        self._write_lock = threading.Lock()
+
+    def snapshot(self) -> GraphVersion:
+        """Return the latest published version.
+        """
+
+        return self._version
+
+    @contextmanager
+    def batch(self) -> Iterator[GraphBatch]:
+        """Return a context manager giving a GraphBatch, whose changes are
+        published as one new version when the block ends without raising.
+        """
+
+        with self._write_lock:
+            version = self._version
+            batch = GraphBatch(version)
+            yield batch
+            self._version = batch.publish(version.epoch + 1)
+
+    def add_to_friends(self, name: str, friend: str) -> None:
+        """Publish a version with friend added to the friends of name.
+        """
+
+        with self.batch() as batch:
+            batch.add_to_friends(name, friend)
+
+    def add_to_network(self, name: str, network: str) -> None:
+        """Publish a version with network added to the networks of name.
+        """
+
+        with self.batch() as batch:
+            batch.add_to_network(name, network)
+
+    def remove_from_friends(self, name: str, friend: str) -> None:
+        """Publish a version with friend removed from the friends of name.
+        """
+
+        with self.batch() as batch:
+            batch.remove_from_friends(name, friend)
+
+    def remove_from_network(self, name: str, network: str) -> None:
+        """Publish a version with network removed from the networks of name.
+        """
+
+        with self.batch() as batch:
+            batch.remove_from_network(name, network)
+
+
+class QueryExecutor:
+    """A thread pool answering recommendation queries on a VersionedGraph.
+    Each query is answered on the latest version when it starts, and returns
+    the epoch of that version with the recommendations.
+
+    >>> with QueryExecutor(VersionedGraph(P2F, P2N), 2) as executor:
+    ...     list(executor.map(['Jay Pritchett', 'Alex Dunphy']))[1]
+    (0, [('Manny Delgado', 2), ('Phil Dunphy', 2), ('Mitchell Pritchett', 1)])
+    """
+
+    def __init__(self, graph: VersionedGraph, max_workers: int = None) -> None:
+        """Start a pool of max_workers threads (the ThreadPoolExecutor default
+        if None) reading graph.
+        """
+
+        self.graph = graph
+        self._pool = ThreadPoolExecutor(max_workers)
+
+    def _query(self, person: str) -> Tuple[int, List[Tuple[str, int]]]:
+        version = self.graph.snapshot()
+        return version.epoch, version.make_recommendations(person)
+
+    def submit(self, person: str) -> Future:
+        """Return a Future of the (epoch, recommendations) of person.
+        """
+
+        return self._pool.submit(self._query, person)
+
+    def map(self, people: Iterable[str]) -> \
+            Iterator[Tuple[int, List[Tuple[str, int]]]]:
+        """Return an iterator over the (epoch, recommendations) of each person
+        in people, in order.
+        """
+
+        return self._pool.map(self._query, people)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self) -> 'QueryExecutor':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()